@@ -20,7 +20,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import binascii, logging, struct, io
+import binascii, collections, hashlib, logging, struct, io, threading
 try:
     import zlib
     haszlib = True
@@ -28,6 +28,7 @@ except:
     haszlib = False
 
 from . import bbox, baseclasses, pswriter, pdfwriter, trafo, unit
+from .writer import ascii85lines, ascii85stream, asciihexlines, asciihexstream, deflate
 
 logger = logging.getLogger("pyx")
 
@@ -40,57 +41,80 @@ decodestrings = {"L": "[0 1]",
                  "P": "[0 255]"}
 
 
-def ascii85lines(datalen):
-    if datalen < 4:
-        return 1
-    return (datalen + 56)/60
-
-def ascii85stream(file, data):
-    """Encodes the string data in ASCII85 and writes it to
-    the stream file. The number of lines written to the stream
-    is known just from the length of the data by means of the
-    ascii85lines function. Note that the tailing newline character
-    of the last line is not added by this function, but it is taken
-    into account in the ascii85lines function."""
-    i = 3 # go on smoothly in case of data length equals zero
-    l = 0
-    l = [None, None, None, None]
-    for i in range(len(data)):
-        c = data[i]
-        l[i%4] = c
-        if i%4 == 3:
-            if i%60 == 3 and i != 3:
-                file.write("\n")
-            if l:
-                # instead of
-                # l[3], c5 = divmod(256*256*256*l[0]+256*256*l[1]+256*l[2]+l[3], 85)
-                # l[2], c4 = divmod(l[3], 85)
-                # we have to avoid number > 2**31 by
-                l[3], c5 = divmod(256*256*l[0]+256*256*l[1]+256*l[2]+l[3], 85)
-                l[2], c4 = divmod(256*256*3*l[0]+l[3], 85)
-                l[1], c3 = divmod(l[2], 85)
-                c1  , c2 = divmod(l[1], 85)
-                file.write_bytes(struct.pack("BBBBB", c1+33, c2+33, c3+33, c4+33, c5+33))
-            else:
-                file.write("z")
-    if i%4 != 3:
-        for j in range((i%4) + 1, 4):
-            l[j] = 0
-        l[3], c5 = divmod(256*256*l[0]+256*256*l[1]+256*l[2]+l[3], 85)
-        l[2], c4 = divmod(256*256*3*l[0]+l[3], 85)
-        l[1], c3 = divmod(l[2], 85)
-        c1  , c2 = divmod(l[1], 85)
-        file.write_bytes(struct.pack("BBBB", c1+33, c2+33, c3+33, c4+33)[:(i%4)+2])
-
-_asciihexlinelength = 64
-def asciihexlines(datalen):
-    return (datalen*2 + _asciihexlinelength - 1) / _asciihexlinelength
-
-def asciihexstream(file, data):
-    hexdata = binascii.b2a_hex(data)
-    for i in range((len(hexdata)-1)/_asciihexlinelength + 1):
-        file.write(hexdata[i*_asciihexlinelength: i*_asciihexlinelength+_asciihexlinelength])
-        file.write("\n")
+def interleave(bands):
+    """Returns the bytes of the bands interleaved pixel by pixel.
+
+    The interleaving is done by extended slice assignments, i.e. at the
+    buffer level without creating Python objects for the pixels."""
+    count = len(bands)
+    result = bytearray(len(bands[0]) * count)
+    for i, band in enumerate(bands):
+        result[i::count] = band
+    return result
+
+
+def imagechunks(im, chunksize=1<<16):
+    """Iterate over the image data in chunks of rows.
+
+    For PIL images, the raw data of the whole image is not created at
+    once, but a band of rows after the other."""
+    if isinstance(im, image):
+        yield im.tobytes()
+        return
+    width, height = im.size
+    rows = max(1, chunksize // (width * len(im.getbands())))
+    for y in range(0, height, rows):
+        yield im.crop((0, y, width, min(y+rows, height))).tobytes()
+
+
+class encodedimagecache:
+
+    """Cache of the encoded image data of bitmaps.
+
+    The entries are keyed by a hash of the image content and the encoding
+    parameters. Thus an image used several times, even within different
+    documents, is encoded only once per process. The entries are evicted
+    in least recently used order when their total size exceeds maxsize.
+    The access is thread safe, as bitmaps are encoded by the threads of
+    the compress_workers of the PDF writer."""
+
+    def __init__(self, maxsize=50000000):
+        self.maxsize = maxsize
+        self.size = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def entrysize(self, entry):
+        mode, data, alpha, palettemode, palettedata = entry
+        return sum(len(x) for x in [data, alpha, palettedata] if isinstance(x, (bytes, bytearray)))
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+            return entry
+
+    def store(self, key, entry):
+        size = self.entrysize(entry)
+        if size > self.maxsize:
+            return
+        with self.lock:
+            oldentry = self.entries.pop(key, None)
+            if oldentry is not None:
+                self.size -= self.entrysize(oldentry)
+            self.entries[key] = entry
+            self.size += size
+            while self.size > self.maxsize:
+                key, entry = self.entries.popitem(last=False)
+                self.size -= self.entrysize(entry)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+imagedatacache = encodedimagecache()
 
 
 class palette:
@@ -234,7 +258,7 @@ class PSimagedata(pswriter.PSresource):
             datalen = len(self.data)
             tailpos = datalen - datalen % self.maxstrlen
             file.write("%%%%BeginData: %i ASCII Lines\n" %
-                       ((tailpos/self.maxstrlen) * ascii85lines(self.maxstrlen) +
+                       ((tailpos//self.maxstrlen) * ascii85lines(self.maxstrlen) +
                         ascii85lines(datalen-tailpos)))
             file.write("[ ")
             for i in range(0, tailpos, self.maxstrlen):
@@ -267,6 +291,50 @@ class PDFimagepalettedata(pdfwriter.PDFobject):
                    "endstream\n")
 
 
+class deferredimagedata:
+
+    """imagedata of a bitmap_trafo encoded on first access
+
+    The access is thread safe, such that the image and its alpha band
+    can be requested in parallel by their PDFimage objects. Note that the
+    raw image bands are kept until the encoding, which in non-streaming
+    mode takes place when the whole document is written."""
+
+    def __init__(self, bitmap, bands):
+        self.bitmap = bitmap
+        self.bands = bands
+        self.result = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.result is None:
+                self.result = self.bitmap.imagedata(False, self.bands)
+                self.bitmap = self.bands = None
+            return self.result
+
+    def __getstate__(self):
+        # encode before pickling, the lock cannot be pickled anyhow
+        return {"result": self.get()}
+
+    def __setstate__(self, state):
+        self.result = state["result"]
+        self.bitmap = self.bands = None
+        self.lock = threading.Lock()
+
+
+class deferredband:
+
+    """band (the data or alpha item) of a deferredimagedata"""
+
+    def __init__(self, imagedata, index):
+        self.imagedata = imagedata
+        self.index = index
+
+    def get(self):
+        return self.imagedata.get()[self.index]
+
+
 class PDFimage(pdfwriter.PDFobject):
 
     def __init__(self, name, width, height, palettemode, palettedata, mode,
@@ -297,6 +365,10 @@ class PDFimage(pdfwriter.PDFobject):
         self.data = data
         self.smask = smask
 
+    def prepare(self, writer):
+        if isinstance(self.data, deferredband):
+            self.data = self.data.get()
+
     def write(self, file, writer, registry):
         file.write("<<\n"
                    "/Type /XObject\n"
@@ -312,6 +384,7 @@ class PDFimage(pdfwriter.PDFobject):
         if self.smask:
             file.write("/SMask %d 0 R\n" % registry.getrefno(self.smask))
         file.write("/BitsPerComponent %d\n" % self.bitspercomponent)
+        self.prepare(writer)
         file.write("/Length %d\n" % len(self.data))
         if self.compressmode:
             file.write("/Filter /%sDecode\n" % self.compressmode)
@@ -356,7 +429,34 @@ class bitmap_trafo(baseclasses.canvasitem):
             logger.warning("zlib module not available, disable compression")
             self.compressmode = None
 
-    def imagedata(self, interleavealpha):
+        # hash of the image content, see imagehash
+        self._imagehash = None
+
+    def imagehash(self):
+        """ Returns a hash of the image content (mode, size, palette, and data). """
+        if self._imagehash is None:
+            h = hashlib.sha1(repr((self.image.mode, self.image.size, self.imagecompressed)).encode("ascii"))
+            palette = getattr(self.image, "palette", None)
+            if palette is not None:
+                h.update(repr(palette.getdata()).encode("ascii"))
+            for chunk in imagechunks(self.image):
+                h.update(chunk)
+            self._imagehash = h.hexdigest()
+        return self._imagehash
+
+    def imagedatakey(self, interleavealpha):
+        return (self.imagehash(), interleavealpha, self.compressmode, self.flatecompresslevel,
+                self.dctquality, self.dctoptimize, self.dctprogression)
+
+    def imagename(self, interleavealpha):
+        """ Returns a name of the encoded image derived from imagedatakey. """
+        return "image-%s" % hashlib.sha1(repr(self.imagedatakey(interleavealpha)).encode("ascii")).hexdigest()
+
+    def hasimagedata(self, interleavealpha):
+        """ Returns whether the imagedata is available in the imagedatacache. """
+        return imagedatacache.get(self.imagedatakey(interleavealpha)) is not None
+
+    def imagedata(self, interleavealpha, bands=None):
         """ Returns a tuple (mode, data, alpha, palettemode, palettedata)
         where mode does not contain the alpha channel anymore.
 
@@ -364,8 +464,22 @@ class bitmap_trafo(baseclasses.canvasitem):
         returned as a band in alpha itself. For interleavealpha == True
         alpha will be True and the channel is interleaved in front of each
         pixel in data.
-        """
 
+        The result is taken from the imagedatacache when the same image
+        was encoded with the same parameters before. The result of
+        imagebands can be passed in bands if already available.
+        """
+        key = self.imagedatakey(interleavealpha)
+        result = imagedatacache.get(key)
+        if result is None:
+            result = self.encodeimagedata(interleavealpha, bands)
+            imagedatacache.store(key, result)
+        return result
+
+    def imagebands(self, interleavealpha):
+        """ Returns a tuple (mode, data, alpha, palettemode, palettedata)
+        like imagedata, but with the image data and alpha band not being
+        encoded, i.e. data and alpha (if not True or None) are images. """
         alpha = palettemode = palettedata = None
         data = self.image
         mode = data.mode
@@ -377,9 +491,7 @@ class bitmap_trafo(baseclasses.canvasitem):
                 bands = data.split()
                 alpha = bands[0]
                 data = image(self.imagewidth, self.imageheight, mode,
-                             b"".join([bytes(values)
-                                       for values in zip(*[band.tobytes()
-                                                           for band in bands[1:]])]), palette=data.palette)
+                             interleave([band.tobytes() for band in bands[1:]]), palette=data.palette)
         if mode.endswith("A"):
             bands = data.split()
             mode = mode[:-1]
@@ -387,15 +499,11 @@ class bitmap_trafo(baseclasses.canvasitem):
                 alpha = True
                 bands = list(bands[-1:]) + list(bands[:-1])
                 data = image(self.imagewidth, self.imageheight, "A%s" % mode,
-                             b"".join([bytes(values)
-                                       for values in zip(*[band.tobytes()
-                                                           for band in bands])]), palette=data.palette)
+                             interleave([band.tobytes() for band in bands]), palette=data.palette)
             else:
                 alpha = bands[-1]
                 data = image(self.imagewidth, self.imageheight, mode,
-                             b"".join([bytes(values)
-                                       for values in zip(*[band.tobytes()
-                                                           for band in bands[:-1]])]), palette=data.palette)
+                             interleave([band.tobytes() for band in bands[:-1]]), palette=data.palette)
 
         if mode == "P":
             palettemode, palettedata = data.palette.getdata()
@@ -415,8 +523,14 @@ class bitmap_trafo(baseclasses.canvasitem):
             data = data.convert("RGB")
             mode = "RGB"
 
+        return mode, data, alpha, palettemode, palettedata
+
+    def encodeimagedata(self, interleavealpha, bands=None):
+        """ Encodes the image data as returned by imagedata. The result
+        of imagebands can be passed in bands if already available. """
+        mode, data, alpha, palettemode, palettedata = bands or self.imagebands(interleavealpha)
         if self.compressmode == "Flate":
-            data = zlib.compress(data.tobytes(), self.flatecompresslevel)
+            data = b"".join(deflate(imagechunks(data), self.flatecompresslevel))
         elif self.compressmode == "DCT":
             data = data.tobytes("jpeg", mode, self.dctquality, self.dctoptimize, self.dctprogression)
         else:
@@ -424,7 +538,7 @@ class bitmap_trafo(baseclasses.canvasitem):
         if alpha and not interleavealpha:
             # we might want a separate alphacompressmode
             if self.compressmode == "Flate":
-                alpha = zlib.compress(alpha.tobytes(), self.flatecompresslevel)
+                alpha = b"".join(deflate(imagechunks(alpha), self.flatecompresslevel))
             elif self.compressmode == "DCT":
                 alpha = alpha.tobytes("jpeg", mode, self.dctquality, self.dctoptimize, self.dctprogression)
             else:
@@ -446,9 +560,9 @@ class bitmap_trafo(baseclasses.canvasitem):
 
         PSsinglestring = self.PSstoreimage and len(data) < self.PSmaxstrlen
         if PSsinglestring:
-            PSimagename = "image-%d-%s-singlestring" % (id(self.image), self.compressmode)
+            PSimagename = "%s-singlestring" % self.imagename(True)
         else:
-            PSimagename = "image-%d-%s-stringarray" % (id(self.image), self.compressmode)
+            PSimagename = "%s-stringarray" % self.imagename(True)
 
         if self.PSstoreimage and not PSsinglestring:
             registry.add(pswriter.PSdefinition("imagedataaccess",
@@ -536,9 +650,19 @@ class bitmap_trafo(baseclasses.canvasitem):
         file.write("grestore\n")
 
     def processPDF(self, file, writer, context, registry, bbox):
-        mode, data, alpha, palettemode, palettedata = self.imagedata(False)
+        if writer.compress_workers is not None and not self.hasimagedata(False):
+            # defer the encoding to PDFimage.prepare running in parallel threads
+            bands = self.imagebands(False)
+            mode, data, alpha, palettemode, palettedata = bands
+            encoded = deferredimagedata(self, bands)
+            data = deferredband(encoded, 1)
+            if alpha:
+                alpha = deferredband(encoded, 2)
+        else:
+            mode, data, alpha, palettemode, palettedata = self.imagedata(False)
 
-        name = "image-%d-%s" % (id(self.image), self.compressmode or self.imagecompressed)
+        # equal images share a single XObject as the registry merges objects of the same name
+        name = self.imagename(False)
         if alpha:
             alpha = PDFimage("%s-smask" % name, self.imagewidth, self.imageheight,
                              None, None, "L", 8,
@@ -20,7 +20,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import configparser, io, logging, os, pkgutil, subprocess, shutil
+import atexit, configparser, io, logging, os, pickle, pkgutil, subprocess, shutil, tempfile
 
 logger = logging.getLogger("pyx")
 logger_execute = logging.getLogger("pyx.execute")
@@ -206,8 +206,57 @@ class kpsewhich:
 
     def __init__(self):
         self.kpsewhich = get("filelocator", "kpsewhich", "kpsewhich")
+        # full filenames resolved by prefetch
+        self.prefetched = {}
+
+    def find(self, filenames, name, extensions):
+        """returns a list of full filenames for filenames of format name
+
+        All filenames are resolved by a single kpsewhich call. Entries for
+        files not found are None. Returns None if kpsewhich is not available.
+        """
+        try:
+            with Popen([self.kpsewhich, '--format', name] + list(filenames), stdout=subprocess.PIPE).stdout as output:
+                with io.TextIOWrapper(output, encoding="ascii", errors="surrogateescape") as text_output:
+                    full_filenames = [line.rstrip() for line in text_output if line.rstrip()]
+        except OSError:
+            return None
+        # kpsewhich reports the files found in the order of the arguments,
+        # silently skipping the files not found
+        result = [None] * len(filenames)
+        i = 0
+        for full_filename in full_filenames:
+            basename = os.path.basename(full_filename)
+            for j in range(i, len(filenames)):
+                if basename in [filenames[j]+extension for extension in extensions]:
+                    result[j] = full_filename
+                    i = j + 1
+                    break
+        return result
+
+    def prefetch(self, filenames, names, extensions):
+        if not names:
+            return
+        filenames = [filename for filename in filenames
+                     if (filename, names) not in self.prefetched and filelocatorcache.get(filename, names) is _marker]
+        if not filenames:
+            return
+        full_filenames = self.find(filenames, names[0], extensions)
+        if full_filenames is None:
+            return
+        for filename, full_filename in zip(filenames, full_filenames):
+            if full_filename:
+                self.prefetched[(filename, names)] = fix_cygwin(full_filename)
+            elif len(names) == 1:
+                filelocatorcache.store(filename, names, None)
 
     def openers(self, filename, names, extensions):
+        if (filename, names) in self.prefetched:
+            full_filename = self.prefetched[(filename, names)]
+            return [lambda: builtinopen(full_filename, "rb")]
+        if filelocatorcache.get(filename, names) is None:
+            # not found by an earlier call
+            return []
         full_filename = None
         for name in names:
             try:
@@ -219,6 +268,7 @@ class kpsewhich:
             if full_filename:
                 break
         else:
+            filelocatorcache.store(filename, names, None)
             return []
 
         full_filename = fix_cygwin(full_filename)
@@ -332,10 +382,145 @@ def getlist(section, option, default=_marker):
     return l
 
 
+def getcachedir():
+    """returns the directory for persistent caches or None when disabled"""
+    cachedir = get("general", "cachedir", None)
+    if cachedir is None:
+        if os.name == "nt":
+            cachedir = os.path.join(os.environ.get("LOCALAPPDATA", os.environ.get("APPDATA", "")), "pyx")
+        else:
+            cachedir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "pyx")
+    elif not cachedir:
+        return None
+    cachedir = os.path.expanduser(cachedir)
+    try:
+        os.makedirs(cachedir, exist_ok=True)
+    except OSError:
+        logger.warning("cannot create cache directory '%s', persistent caches disabled" % cachedir)
+        return None
+    return cachedir
+
+
+class locatorcache:
+    """persistent cache of the results of the file locators
+
+    The cache maps the arguments of open to the name of the locator method
+    and the full filename found by it or to None for files not found by
+    kpsewhich. A cached file is used at the position of its method in the
+    list of methods only, thus the preceding methods, like a file in the
+    current directory, still take precedence. When the 'cache' option of the
+    filelocator section is enabled, the found files are stored in the cache
+    directory and invalidated whenever one of the ls-R files of the TeX
+    installation or the locator configuration changes. Files not found are
+    remembered for the running process only, as files might be added to
+    directories without an ls-R file like TEXMFHOME."""
+
+    def __init__(self, filename=_marker):
+        """create a locator cache stored in filename, which defaults to a
+        file in the cache directory when enabled by the configuration; None
+        disables the persistent storage"""
+        self._filename = filename
+        self.entries = None
+        self.modified = False
+
+    def filename(self):
+        if self._filename is _marker:
+            cachedir = getcachedir()
+            if cachedir is None or not getboolean("filelocator", "cache", False):
+                self._filename = None
+            else:
+                self._filename = os.path.join(cachedir, "filelocator.pickle")
+        return self._filename
+
+    def findlsRs(self):
+        """returns the ls-R files of the TeX installation"""
+        lsRs = getlist("filelocator", "ls-R", [])
+        if lsRs:
+            return lsRs
+        try:
+            with Popen([get("filelocator", "kpsewhich", "kpsewhich"), "--expand-path=$TEXMFDBS"], stdout=subprocess.PIPE).stdout as output:
+                with io.TextIOWrapper(output, encoding="ascii", errors="surrogateescape") as text_output:
+                    dirs = text_output.read().strip()
+        except OSError:
+            return []
+        return [os.path.join(fix_cygwin(dir), "ls-R") for dir in dirs.split(os.pathsep) if dir]
+
+    def stamp(self, lsRs):
+        stamp = [getlist("filelocator", "methods", []), get("filelocator", "kpsewhich", "kpsewhich")]
+        for lsR in lsRs:
+            try:
+                stat = os.stat(lsR)
+            except OSError:
+                stamp.append((lsR, None))
+            else:
+                stamp.append((lsR, stat.st_mtime_ns, stat.st_size))
+        return stamp
+
+    def load(self):
+        self.entries = {}
+        filename = self.filename()
+        if filename is None:
+            return
+        try:
+            with builtinopen(filename, "rb") as cachefile:
+                lsRs, stamp, entries = pickle.load(cachefile)
+        except Exception:
+            pass
+        else:
+            if stamp == self.stamp(lsRs):
+                self.entries = {key: entry for key, entry in entries.items() if isinstance(entry, tuple)}
+                self.lsRs = lsRs
+                return
+        self.lsRs = self.findlsRs()
+        self.setmodified()
+
+    def get(self, filename, names):
+        """returns the method name and full filename, None for a file not
+        found, or _marker if unknown"""
+        if self.entries is None:
+            self.load()
+        return self.entries.get((filename, names), _marker)
+
+    def setmodified(self):
+        if not self.modified:
+            self.modified = True
+            atexit.register(self.save)
+
+    def store(self, filename, names, method, full_filename=None):
+        """stores the full filename found by the named method or None for a
+        file not found (in which case method is None as well)"""
+        if self.entries is None:
+            self.load()
+        entry = None if full_filename is None else (method, full_filename)
+        if self.entries.get((filename, names), _marker) != entry:
+            self.entries[(filename, names)] = entry
+            self.setmodified()
+
+    def remove(self, filename, names):
+        if self.entries.pop((filename, names), _marker) is not _marker:
+            self.setmodified()
+
+    def save(self):
+        filename = self.filename()
+        if filename is None or not self.modified:
+            return
+        entries = {key: entry for key, entry in self.entries.items() if entry is not None}
+        # write to a temporary file first to never expose an incomplete cache
+        try:
+            fd, tmpfilename = tempfile.mkstemp(dir=os.path.dirname(filename))
+            with os.fdopen(fd, "wb") as cachefile:
+                pickle.dump((self.lsRs, self.stamp(self.lsRs), entries), cachefile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfilename, filename)
+        except OSError as e:
+            logger.warning("Could not store the file locator cache: %s" % e)
+        self.modified = False
+
+
 space = get("general", "space", "SPACE")
 methods = [locator_classes[method]()
            for method in getlist("filelocator", "methods", ["local", "internal", "pykpathsea", "kpsewhich"])]
 opener_cache = {}
+filelocatorcache = locatorcache()
 
 
 def open(filename, formats, ascii=False):
@@ -356,7 +541,20 @@ def open(filename, formats, ascii=False):
     if (filename, names) in opener_cache:
         file = opener_cache[(filename, names)]()
     else:
+        # a file found by the locator cache replaces the run of the method,
+        # which found it before; the preceding methods are still run
+        cached = filelocatorcache.get(filename, names)
         for method in methods:
+            if cached is not None and cached is not _marker and cached[0] == method.__class__.__name__:
+                full_filename = cached[1]
+                try:
+                    file = builtinopen(full_filename, "rb")
+                except EnvironmentError:
+                    filelocatorcache.remove(filename, names)
+                else:
+                    logger_filelocator.info("PyX filelocator found {} in the locator cache at {}".format(filename, full_filename))
+                    opener_cache[(filename, names)] = lambda: builtinopen(full_filename, "rb")
+                    break
             openers = method.openers(filename, names, extensions)
             for opener in openers:
                 try:
@@ -369,6 +567,8 @@ def open(filename, formats, ascii=False):
                         info += " at {}".format(file.name)
                     logger_filelocator.info(info)
                     opener_cache[(filename, names)] = opener
+                    if isinstance(getattr(file, "name", None), str) and os.path.isabs(file.name):
+                        filelocatorcache.store(filename, names, method.__class__.__name__, file.name)
                     break
             # break two loops here
             else:
@@ -383,6 +583,22 @@ def open(filename, formats, ascii=False):
         return file
 
 
+def prefetch(filenames, formats):
+    """locate several files in advance
+
+    This allows locators like kpsewhich to resolve all files at once instead
+    of one after the other when they are opened."""
+    extensions = set([""])
+    for format in formats:
+        for extension in format.extensions:
+            extensions.add(extension)
+    names = tuple([format.name for format in formats])
+    filenames = [filename for filename in filenames if (filename, names) not in opener_cache]
+    for method in methods:
+        if hasattr(method, "prefetch"):
+            method.prefetch(filenames, names, extensions)
+
+
 class format:
     def __init__(self, name, extensions):
         self.name = name
@@ -1516,44 +1516,44 @@ class parallel(baseclasses.deformer): # <<<
 
         dist = self.dist_pt
 
-        n = len(np)
+        # pairs of nsp-items with overlapping control boxes, in the order
+        # of nsp_i, nsp_j, nspitem_i, nspitem_j with nspitem_i < nspitem_j
+        # within the same normsubpath
+        indices = [(nsp_i, nspitem_i) for nsp_i in range(len(np)) for nspitem_i in range(len(np[nsp_i]))]
+        nspitems = [np[nsp_i][nspitem_i] for nsp_i, nspitem_i in indices]
+        candidates = sorted((indices[i][0], indices[j][0], indices[i][1], indices[j][1])
+                            for i, j in normpath._intersectioncandidates(nspitems, nspitems, epsilon) if i < j)
+
         forwardpairs = {}
-        for nsp_i in range(n):
-            for nsp_j in range(nsp_i, n):
-                for nspitem_i in range(len(np[nsp_i])):
-                    if nsp_j == nsp_i:
-                        nspitem_j_range = list(range(nspitem_i+1, len(np[nsp_j])))
-                    else:
-                        nspitem_j_range = list(range(len(np[nsp_j])))
-                    for nspitem_j in nspitem_j_range:
-                        intsparams = np[nsp_i][nspitem_i].intersect(np[nsp_j][nspitem_j], epsilon)
-                        if intsparams:
-                            for intsparam_i, intsparam_j in intsparams:
-                                npp_i = mynormpathparam(np, nsp_i, nspitem_i, intsparam_i)
-                                npp_j = mynormpathparam(np, nsp_j, nspitem_j, intsparam_j)
-
-                                # skip successive nsp-items
-                                if nsp_i == nsp_j:
-                                    if nspitem_j == nspitem_i+1 and (npp_i.is_end_of_nspitem(epsilon) or npp_j.is_beg_of_nspitem(epsilon)):
-                                        continue
-                                    if np[nsp_i].closed and ((npp_i.is_beg_of_nsp(epsilon) and npp_j.is_end_of_nsp(epsilon)) or
-                                                             (npp_j.is_beg_of_nsp(epsilon) and npp_i.is_end_of_nsp(epsilon))):
-                                        continue
-
-                                # correct the order of the pair, such that we can use it to continue on the path
-                                if not self._can_continue(npp_i, npp_j, epsilon):
-                                    assert self._can_continue(npp_j, npp_i, epsilon)
-                                    npp_i, npp_j = npp_j, npp_i
-
-                                # if the intersection is between two nsp-items, take the smallest -> largest
-                                npp_i = npp_i.smaller_equiv(5*epsilon)
-                                npp_j = npp_j.larger_equiv(5*epsilon)
-
-                                # because of the above change of npp_ij, and because there may be intersections between nsp-items,
-                                # it may happen that we try to insert two times the same pair
-                                if self._skip_intersection_doublet(npp_i, npp_j, forwardpairs, eps_comparepairs):
-                                    continue
-                                forwardpairs[npp_i] = npp_j
+        for nsp_i, nsp_j, nspitem_i, nspitem_j in candidates:
+            intsparams = np[nsp_i][nspitem_i].intersect(np[nsp_j][nspitem_j], epsilon)
+            if intsparams:
+                for intsparam_i, intsparam_j in intsparams:
+                    npp_i = mynormpathparam(np, nsp_i, nspitem_i, intsparam_i)
+                    npp_j = mynormpathparam(np, nsp_j, nspitem_j, intsparam_j)
+
+                    # skip successive nsp-items
+                    if nsp_i == nsp_j:
+                        if nspitem_j == nspitem_i+1 and (npp_i.is_end_of_nspitem(epsilon) or npp_j.is_beg_of_nspitem(epsilon)):
+                            continue
+                        if np[nsp_i].closed and ((npp_i.is_beg_of_nsp(epsilon) and npp_j.is_end_of_nsp(epsilon)) or
+                                                 (npp_j.is_beg_of_nsp(epsilon) and npp_i.is_end_of_nsp(epsilon))):
+                            continue
+
+                    # correct the order of the pair, such that we can use it to continue on the path
+                    if not self._can_continue(npp_i, npp_j, epsilon):
+                        assert self._can_continue(npp_j, npp_i, epsilon)
+                        npp_i, npp_j = npp_j, npp_i
+
+                    # if the intersection is between two nsp-items, take the smallest -> largest
+                    npp_i = npp_i.smaller_equiv(5*epsilon)
+                    npp_j = npp_j.larger_equiv(5*epsilon)
+
+                    # because of the above change of npp_ij, and because there may be intersections between nsp-items,
+                    # it may happen that we try to insert two times the same pair
+                    if self._skip_intersection_doublet(npp_i, npp_j, forwardpairs, eps_comparepairs):
+                        continue
+                    forwardpairs[npp_i] = npp_j
 
         # this is partially done in _skip_intersection_doublet
         #forwardpairs = self._elim_intersection_doublets(forwardpairs, eps_comparepairs)
@@ -1572,16 +1572,16 @@ class parallel(baseclasses.deformer): # <<<
         oparams = []
         for nsp_i in range(len(orig_np)):
             for nsp_j in range(len(par_np)):
-                for nspitem_i in range(len(orig_np[nsp_i])):
-                    for nspitem_j in range(len(par_np[nsp_j])):
-                        intsparams = orig_np[nsp_i][nspitem_i].intersect(par_np[nsp_j][nspitem_j], epsilon)
-                        if intsparams:
-                            for intsparam_i, intsparam_j in intsparams:
-                                npp_i = mynormpathparam(orig_np, nsp_i, nspitem_i, intsparam_i)
-                                npp_j = mynormpathparam(par_np, nsp_j, nspitem_j, intsparam_j)
-
-                                oparams.append(npp_i)
-                                params.append(npp_j)
+                for nspitem_i, nspitem_j in normpath._intersectioncandidates(orig_np[nsp_i].normsubpathitems,
+                                                                              par_np[nsp_j].normsubpathitems, epsilon):
+                    intsparams = orig_np[nsp_i][nspitem_i].intersect(par_np[nsp_j][nspitem_j], epsilon)
+                    if intsparams:
+                        for intsparam_i, intsparam_j in intsparams:
+                            npp_i = mynormpathparam(orig_np, nsp_i, nspitem_i, intsparam_i)
+                            npp_j = mynormpathparam(par_np, nsp_j, nspitem_j, intsparam_j)
+
+                            oparams.append(npp_i)
+                            params.append(npp_j)
         return params, oparams
     # >>>
     def _can_continue(self, param1, param2, epsilon=None): # <<<
@@ -22,7 +22,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
 import io, logging, math, re, string, struct, sys
-from pyx import  bbox, canvas, color, epsfile, config, path, reader, trafo, unit
+from pyx import  bbox, canvas, color, epsfile, path, reader, trafo, unit
 from . import texfont, tfmfile
 
 logger = logging.getLogger("pyx")
@@ -102,7 +102,12 @@ class DVIfile:
         # stack for self.file, self.fonts and self.stack, needed for VF inclusion
         self.statestack = []
 
-        self.file = reader.reader(self.filename)
+        self.file = reader.mmapreader(self.filename)
+
+        # page offsets by pageid and the font definitions of the postamble
+        # (see _indexpages), built when a page is requested by its pageid
+        self.pageoffsets = None
+        self.postfontdefs = []
 
         # currently read byte in file (for debugging output)
         self.filepos = None
@@ -200,12 +205,9 @@ class DVIfile:
         #        Note that q is actually s in large parts of the documentation.
         # d:     design size (fix_word)
 
-        # check whether it's a virtual font by trying to open it. if this fails, it is an ordinary TeX font
-        try:
-            with config.open(fontname, [config.format.vf]) as fontfile:
-                afont = texfont.virtualfont(fontname, fontfile, c, q/self.tfmconv, d/self.tfmconv, self.tfmconv, self.pyxconv, self.debug>1)
-        except EnvironmentError:
-            afont = texfont.TeXfont(fontname, c, q/self.tfmconv, d/self.tfmconv, self.tfmconv, self.pyxconv, self.debug>1)
+        # the metrics of the font (and whether it is a virtual font) are taken
+        # from the metric cache shared by all dvi files
+        afont = texfont.loadfont(fontname, c, q/self.tfmconv, d/self.tfmconv, self.tfmconv, self.pyxconv, self.debug>1)
 
         self.fonts[num] = afont
 
@@ -338,7 +340,7 @@ class DVIfile:
         # This yields the following scale factor for the height and width of rects:
         self.scale = fontsize/2**20/self.pyxconv
 
-        self.file = reader.bytesreader(dvi)
+        self.file = reader.bufferreader(dvi)
         self.fonts = fonts
         self.stack = []
         self.filepos = 0
@@ -397,28 +399,114 @@ class DVIfile:
             else:
                 raise DVIError
 
+    def _readfontdef(self, cmd):
+        afile = self.file
+        # Cool, here we have according to docu a signed int for four byte font numbers. Why?
+        num = afile.readint(cmd - _DVI_FNTDEF1234 + 1, cmd == _DVI_FNTDEF1234 + 3)
+        c = afile.readint32()
+        q = afile.readint32()
+        d = afile.readint32()
+        fontname = afile.read(afile.readuchar()+afile.readuchar()).decode("ascii")
+        return cmd-_DVI_FNTDEF1234+1, num, c, q, d, fontname
+
+    def _indexpages(self):
+        """ index the page offsets by following the back pointers from the postamble
+
+        The index is only available for complete dvi files. The font definitions
+        of the postamble are kept to be able to skip pages."""
+        self.pageoffsets = {}
+        self.postfontdefs = []
+        afile = self.file
+        pos = afile.tell()
+        try:
+            afile.update()
+            end = afile.size - 1
+            while end >= 0 and afile.data[end] == 223:
+                end -= 1
+            if end < 5 or afile.data[end] != _DVI_VERSION or afile.data[end-5] != _DVI_POSTPOST:
+                return
+            afile.seek(end - 4)
+            postpos = afile.readuint32()
+            afile.seek(postpos)
+            if afile.readuchar() != _DVI_POST:
+                return
+            bop = afile.readint32()
+            afile.seek(afile.tell() + 24)
+            while True:
+                cmd = afile.readuchar()
+                if cmd == _DVI_POSTPOST:
+                    break
+                elif _DVI_FNTDEF1234 <= cmd < _DVI_FNTDEF1234 + 4:
+                    self.postfontdefs.append(self._readfontdef(cmd))
+                elif cmd != _DVI_NOP:
+                    raise DVIError
+            offsets = []
+            while bop != -1:
+                afile.seek(bop)
+                if afile.readuchar() != _DVI_BOP:
+                    raise DVIError
+                offsets.append((tuple([afile.readint32() for i in range(10)]), bop))
+                bop = afile.readint32()
+            for ispageid, offset in reversed(offsets):
+                self.pageoffsets.setdefault(ispageid, []).append(offset)
+        except (struct.error, DVIError):
+            # an incomplete (e.g. still written by TeX) or corrupt dvi file
+            self.pageoffsets = {}
+            self.postfontdefs = []
+        finally:
+            afile.seek(pos)
+
+    def _seekpage(self, pageid):
+        """ seek to the page pageid using the page index (if available) """
+        if self.pageoffsets is None:
+            self._indexpages()
+        offsets = self.pageoffsets.get(tuple(pageid))
+        if not offsets:
+            return
+        pos = self.file.tell()
+        # for several pages with the same pageid take the next one
+        offset = ([offset for offset in offsets if offset >= pos] or offsets)[0]
+        # skip the reading only if something else than nops is in between
+        self.file.seek(pos)
+        while pos < offset and self.file.readuchar() == _DVI_NOP:
+            pos += 1
+        if pos != offset:
+            for fontdef in self.postfontdefs:
+                if fontdef[1] not in self.fonts:
+                    self.definefont(*fontdef)
+        self.file.seek(offset)
+
     def readpage(self, pageid=None, fontmap=None, singlecharmode=False, attrs=[]):
         """ reads a page from the dvi file
 
         This routine reads a page from the dvi file which is
         returned as a canvas. When there is no page left in the
-        dvifile, None is returned and the file is closed properly."""
+        dvifile, None is returned and the file is closed properly.
+
+        When pageid is given and the dvi file is complete, the page
+        is located by an index of the page offsets. Otherwise the
+        next page is read and checked to be the requested page."""
 
         self.singlecharmode = singlecharmode
 
+        if pageid is not None:
+            self._seekpage(pageid)
+
         while True:
             self.filepos = self.file.tell()
             cmd = self.file.readuchar()
             if cmd == _DVI_NOP:
                 pass
             elif cmd == _DVI_BOP:
-                ispageid = [self.file.readuint32() for i in range(10)]
-                if pageid is not None and ispageid != pageid:
+                ispageid = [self.file.readint32() for i in range(10)]
+                if pageid is not None and ispageid != list(pageid):
                     raise DVIError("invalid pageid")
                 if self.debug:
                     self.debugfile.write("%d: beginning of page %i\n" % (self.filepos, ispageid[0]))
                 self.file.readuint32()
                 break
+            elif cmd >= _DVI_FNTDEF1234 and cmd < _DVI_FNTDEF1234 + 4:
+                self.definefont(*self._readfontdef(cmd))
             elif cmd == _DVI_POST:
                 self.file.close()
                 return None # nothing left
@@ -432,9 +520,10 @@ class DVIfile:
         # tuple (hpos, vpos, codepoints) to be output, or None if no output is pending
         self.activetext = None
 
+        dispatch = self._dispatch
         while True:
             afile = self.file
-            self.filepos = afile.tell()
+            self.filepos = afile.pos
             try:
                 cmd = afile.readuchar()
             except struct.error:
@@ -442,172 +531,212 @@ class DVIfile:
                 # so we have to continue with the rest of the dvi file
                 self._pop_dvistring(fontmap)
                 continue
-            if cmd == _DVI_NOP:
-                pass
-            if cmd >= _DVI_CHARMIN and cmd <= _DVI_CHARMAX:
-                self.putchar(cmd, True, 0, fontmap)
-            elif cmd >= _DVI_SET1234 and cmd < _DVI_SET1234 + 4:
-                self.putchar(afile.readint(cmd - _DVI_SET1234 + 1), True, cmd-_DVI_SET1234+1, fontmap)
-            elif cmd == _DVI_SETRULE:
-                self.putrule(afile.readint32()*self.scale, afile.readint32()*self.scale, True, fontmap)
-            elif cmd >= _DVI_PUT1234 and cmd < _DVI_PUT1234 + 4:
-                self.putchar(afile.readint(cmd - _DVI_PUT1234 + 1), False, cmd-_DVI_SET1234+1, fontmap)
-            elif cmd == _DVI_PUTRULE:
-                self.putrule(afile.readint32()*self.scale, afile.readint32()*self.scale, False, fontmap)
-            elif cmd == _DVI_EOP:
-                self.flushtext(fontmap)
-                if self.debug:
-                    self.debugfile.write("%d: eop\n \n" % self.filepos)
+            if dispatch[cmd](self, cmd, afile, fontmap):
                 return self.actpage
-            elif cmd == _DVI_PUSH:
-                self.stack.append(list(self.pos))
-                if self.debug:
-                    self.debugfile.write("%s: push\n"
-                                         "level %d:(h=%d,v=%d,w=%d,x=%d,y=%d,z=%d,hh=???,vv=???)\n" %
-                                         ((self.filepos, len(self.stack)-1) + tuple(self.pos)))
-            elif cmd == _DVI_POP:
-                self.flushtext(fontmap)
-                self.pos = self.stack.pop()
-                if self.debug:
-                    self.debugfile.write("%s: pop\n"
-                                         "level %d:(h=%d,v=%d,w=%d,x=%d,y=%d,z=%d,hh=???,vv=???)\n" %
-                                         ((self.filepos, len(self.stack)) + tuple(self.pos)))
-            elif cmd >= _DVI_RIGHT1234 and cmd < _DVI_RIGHT1234 + 4:
-                self.flushtext(fontmap)
-                dh = afile.readint(cmd - _DVI_RIGHT1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: right%d %d h:=%d%+d=%d, hh:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_RIGHT1234 + 1,
-                                          dh,
-                                          self.pos[_POS_H],
-                                          dh,
-                                          self.pos[_POS_H]+dh))
-                self.pos[_POS_H] += dh
-            elif cmd == _DVI_W0:
-                self.flushtext(fontmap)
-                if self.debug:
-                    self.debugfile.write("%d: w0 %d h:=%d%+d=%d, hh:=???\n" %
-                                         (self.filepos,
-                                          self.pos[_POS_W],
-                                          self.pos[_POS_H],
-                                          self.pos[_POS_W],
-                                          self.pos[_POS_H]+self.pos[_POS_W]))
-                self.pos[_POS_H] += self.pos[_POS_W]
-            elif cmd >= _DVI_W1234 and cmd < _DVI_W1234 + 4:
-                self.flushtext(fontmap)
-                self.pos[_POS_W] = afile.readint(cmd - _DVI_W1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: w%d %d h:=%d%+d=%d, hh:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_W1234 + 1,
-                                          self.pos[_POS_W],
-                                          self.pos[_POS_H],
-                                          self.pos[_POS_W],
-                                          self.pos[_POS_H]+self.pos[_POS_W]))
-                self.pos[_POS_H] += self.pos[_POS_W]
-            elif cmd == _DVI_X0:
-                self.flushtext(fontmap)
-                if self.debug:
-                    self.debugfile.write("%d: x0 %d h:=%d%+d=%d, hh:=???\n" %
-                                         (self.filepos,
-                                          self.pos[_POS_X],
-                                          self.pos[_POS_H],
-                                          self.pos[_POS_X],
-                                          self.pos[_POS_H]+self.pos[_POS_X]))
-                self.pos[_POS_H] += self.pos[_POS_X]
-            elif cmd >= _DVI_X1234 and cmd < _DVI_X1234 + 4:
-                self.flushtext(fontmap)
-                self.pos[_POS_X] = afile.readint(cmd - _DVI_X1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: x%d %d h:=%d%+d=%d, hh:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_X1234 + 1,
-                                          self.pos[_POS_X],
-                                          self.pos[_POS_H],
-                                          self.pos[_POS_X],
-                                          self.pos[_POS_H]+self.pos[_POS_X]))
-                self.pos[_POS_H] += self.pos[_POS_X]
-            elif cmd >= _DVI_DOWN1234 and cmd < _DVI_DOWN1234 + 4:
-                self.flushtext(fontmap)
-                dv = afile.readint(cmd - _DVI_DOWN1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: down%d %d v:=%d%+d=%d, vv:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_DOWN1234 + 1,
-                                          dv,
-                                          self.pos[_POS_V],
-                                          dv,
-                                          self.pos[_POS_V]+dv))
-                self.pos[_POS_V] += dv
-            elif cmd == _DVI_Y0:
-                self.flushtext(fontmap)
-                if self.debug:
-                    self.debugfile.write("%d: y0 %d v:=%d%+d=%d, vv:=???\n" %
-                                         (self.filepos,
-                                          self.pos[_POS_Y],
-                                          self.pos[_POS_V],
-                                          self.pos[_POS_Y],
-                                          self.pos[_POS_V]+self.pos[_POS_Y]))
-                self.pos[_POS_V] += self.pos[_POS_Y]
-            elif cmd >= _DVI_Y1234 and cmd < _DVI_Y1234 + 4:
-                self.flushtext(fontmap)
-                self.pos[_POS_Y] = afile.readint(cmd - _DVI_Y1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: y%d %d v:=%d%+d=%d, vv:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_Y1234 + 1,
-                                          self.pos[_POS_Y],
-                                          self.pos[_POS_V],
-                                          self.pos[_POS_Y],
-                                          self.pos[_POS_V]+self.pos[_POS_Y]))
-                self.pos[_POS_V] += self.pos[_POS_Y]
-            elif cmd == _DVI_Z0:
-                self.flushtext(fontmap)
-                if self.debug:
-                    self.debugfile.write("%d: z0 %d v:=%d%+d=%d, vv:=???\n" %
-                                         (self.filepos,
-                                          self.pos[_POS_Z],
-                                          self.pos[_POS_V],
-                                          self.pos[_POS_Z],
-                                          self.pos[_POS_V]+self.pos[_POS_Z]))
-                self.pos[_POS_V] += self.pos[_POS_Z]
-            elif cmd >= _DVI_Z1234 and cmd < _DVI_Z1234 + 4:
-                self.flushtext(fontmap)
-                self.pos[_POS_Z] = afile.readint(cmd - _DVI_Z1234 + 1, 1) * self.scale
-                if self.debug:
-                    self.debugfile.write("%d: z%d %d v:=%d%+d=%d, vv:=???\n" %
-                                         (self.filepos,
-                                          cmd - _DVI_Z1234 + 1,
-                                          self.pos[_POS_Z],
-                                          self.pos[_POS_V],
-                                          self.pos[_POS_Z],
-                                          self.pos[_POS_V]+self.pos[_POS_Z]))
-                self.pos[_POS_V] += self.pos[_POS_Z]
-            elif cmd >= _DVI_FNTNUMMIN and cmd <= _DVI_FNTNUMMAX:
-                self.usefont(cmd - _DVI_FNTNUMMIN, 0, fontmap)
-            elif cmd >= _DVI_FNT1234 and cmd < _DVI_FNT1234 + 4:
-                # note that according to the DVI docs, for four byte font numbers,
-                # the font number is signed. Don't ask why!
-                fntnum = afile.readint(cmd - _DVI_FNT1234 + 1, cmd == _DVI_FNT1234 + 3)
-                self.usefont(fntnum, cmd-_DVI_FNT1234+1, fontmap)
-            elif cmd >= _DVI_SPECIAL1234 and cmd < _DVI_SPECIAL1234 + 4:
-                self.special(afile.read(afile.readint(cmd - _DVI_SPECIAL1234 + 1)).decode("ascii"), fontmap)
-            elif cmd >= _DVI_FNTDEF1234 and cmd < _DVI_FNTDEF1234 + 4:
-                if cmd == _DVI_FNTDEF1234:
-                    num = afile.readuchar()
-                elif cmd == _DVI_FNTDEF1234+1:
-                    num = afile.readuint16()
-                elif cmd == _DVI_FNTDEF1234+2:
-                    num = afile.readuint24()
-                elif cmd == _DVI_FNTDEF1234+3:
-                    # Cool, here we have according to docu a signed int. Why?
-                    num = afile.readint32()
-                self.definefont(cmd-_DVI_FNTDEF1234+1,
-                                num,
-                                afile.readint32(),
-                                afile.readint32(),
-                                afile.readint32(),
-                                afile.read(afile.readuchar()+afile.readuchar()).decode("ascii"))
-            else:
-                raise DVIError
+
+    # handlers of the dvi commands within a page, dispatched by the table _dispatch
+    # (a true result terminates the page)
+
+    def _dvi_nop(self, cmd, afile, fontmap):
+        pass
+
+    def _dvi_invalid(self, cmd, afile, fontmap):
+        raise DVIError
+
+    def _dvi_setchar(self, cmd, afile, fontmap):
+        self.putchar(cmd, True, 0, fontmap)
+
+    def _dvi_set(self, cmd, afile, fontmap):
+        self.putchar(afile.readint(cmd - _DVI_SET1234 + 1), True, cmd-_DVI_SET1234+1, fontmap)
+
+    def _dvi_setrule(self, cmd, afile, fontmap):
+        self.putrule(afile.readint32()*self.scale, afile.readint32()*self.scale, True, fontmap)
+
+    def _dvi_put(self, cmd, afile, fontmap):
+        self.putchar(afile.readint(cmd - _DVI_PUT1234 + 1), False, cmd-_DVI_PUT1234+1, fontmap)
+
+    def _dvi_putrule(self, cmd, afile, fontmap):
+        self.putrule(afile.readint32()*self.scale, afile.readint32()*self.scale, False, fontmap)
+
+    def _dvi_eop(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        if self.debug:
+            self.debugfile.write("%d: eop\n \n" % self.filepos)
+        return True
+
+    def _dvi_push(self, cmd, afile, fontmap):
+        self.stack.append(list(self.pos))
+        if self.debug:
+            self.debugfile.write("%s: push\n"
+                                 "level %d:(h=%d,v=%d,w=%d,x=%d,y=%d,z=%d,hh=???,vv=???)\n" %
+                                 ((self.filepos, len(self.stack)-1) + tuple(self.pos)))
+
+    def _dvi_pop(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        self.pos = self.stack.pop()
+        if self.debug:
+            self.debugfile.write("%s: pop\n"
+                                 "level %d:(h=%d,v=%d,w=%d,x=%d,y=%d,z=%d,hh=???,vv=???)\n" %
+                                 ((self.filepos, len(self.stack)) + tuple(self.pos)))
+
+    def _dvi_right(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        dh = afile.readint(cmd - _DVI_RIGHT1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: right%d %d h:=%d%+d=%d, hh:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_RIGHT1234 + 1,
+                                  dh,
+                                  self.pos[_POS_H],
+                                  dh,
+                                  self.pos[_POS_H]+dh))
+        self.pos[_POS_H] += dh
+
+    def _dvi_w0(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        if self.debug:
+            self.debugfile.write("%d: w0 %d h:=%d%+d=%d, hh:=???\n" %
+                                 (self.filepos,
+                                  self.pos[_POS_W],
+                                  self.pos[_POS_H],
+                                  self.pos[_POS_W],
+                                  self.pos[_POS_H]+self.pos[_POS_W]))
+        self.pos[_POS_H] += self.pos[_POS_W]
+
+    def _dvi_w(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        self.pos[_POS_W] = afile.readint(cmd - _DVI_W1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: w%d %d h:=%d%+d=%d, hh:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_W1234 + 1,
+                                  self.pos[_POS_W],
+                                  self.pos[_POS_H],
+                                  self.pos[_POS_W],
+                                  self.pos[_POS_H]+self.pos[_POS_W]))
+        self.pos[_POS_H] += self.pos[_POS_W]
+
+    def _dvi_x0(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        if self.debug:
+            self.debugfile.write("%d: x0 %d h:=%d%+d=%d, hh:=???\n" %
+                                 (self.filepos,
+                                  self.pos[_POS_X],
+                                  self.pos[_POS_H],
+                                  self.pos[_POS_X],
+                                  self.pos[_POS_H]+self.pos[_POS_X]))
+        self.pos[_POS_H] += self.pos[_POS_X]
+
+    def _dvi_x(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        self.pos[_POS_X] = afile.readint(cmd - _DVI_X1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: x%d %d h:=%d%+d=%d, hh:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_X1234 + 1,
+                                  self.pos[_POS_X],
+                                  self.pos[_POS_H],
+                                  self.pos[_POS_X],
+                                  self.pos[_POS_H]+self.pos[_POS_X]))
+        self.pos[_POS_H] += self.pos[_POS_X]
+
+    def _dvi_down(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        dv = afile.readint(cmd - _DVI_DOWN1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: down%d %d v:=%d%+d=%d, vv:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_DOWN1234 + 1,
+                                  dv,
+                                  self.pos[_POS_V],
+                                  dv,
+                                  self.pos[_POS_V]+dv))
+        self.pos[_POS_V] += dv
+
+    def _dvi_y0(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        if self.debug:
+            self.debugfile.write("%d: y0 %d v:=%d%+d=%d, vv:=???\n" %
+                                 (self.filepos,
+                                  self.pos[_POS_Y],
+                                  self.pos[_POS_V],
+                                  self.pos[_POS_Y],
+                                  self.pos[_POS_V]+self.pos[_POS_Y]))
+        self.pos[_POS_V] += self.pos[_POS_Y]
+
+    def _dvi_y(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        self.pos[_POS_Y] = afile.readint(cmd - _DVI_Y1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: y%d %d v:=%d%+d=%d, vv:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_Y1234 + 1,
+                                  self.pos[_POS_Y],
+                                  self.pos[_POS_V],
+                                  self.pos[_POS_Y],
+                                  self.pos[_POS_V]+self.pos[_POS_Y]))
+        self.pos[_POS_V] += self.pos[_POS_Y]
+
+    def _dvi_z0(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        if self.debug:
+            self.debugfile.write("%d: z0 %d v:=%d%+d=%d, vv:=???\n" %
+                                 (self.filepos,
+                                  self.pos[_POS_Z],
+                                  self.pos[_POS_V],
+                                  self.pos[_POS_Z],
+                                  self.pos[_POS_V]+self.pos[_POS_Z]))
+        self.pos[_POS_V] += self.pos[_POS_Z]
+
+    def _dvi_z(self, cmd, afile, fontmap):
+        self.flushtext(fontmap)
+        self.pos[_POS_Z] = afile.readint(cmd - _DVI_Z1234 + 1, 1) * self.scale
+        if self.debug:
+            self.debugfile.write("%d: z%d %d v:=%d%+d=%d, vv:=???\n" %
+                                 (self.filepos,
+                                  cmd - _DVI_Z1234 + 1,
+                                  self.pos[_POS_Z],
+                                  self.pos[_POS_V],
+                                  self.pos[_POS_Z],
+                                  self.pos[_POS_V]+self.pos[_POS_Z]))
+        self.pos[_POS_V] += self.pos[_POS_Z]
+
+    def _dvi_fntnum(self, cmd, afile, fontmap):
+        self.usefont(cmd - _DVI_FNTNUMMIN, 0, fontmap)
+
+    def _dvi_fnt(self, cmd, afile, fontmap):
+        # note that according to the DVI docs, for four byte font numbers,
+        # the font number is signed. Don't ask why!
+        fntnum = afile.readint(cmd - _DVI_FNT1234 + 1, cmd == _DVI_FNT1234 + 3)
+        self.usefont(fntnum, cmd-_DVI_FNT1234+1, fontmap)
+
+    def _dvi_special(self, cmd, afile, fontmap):
+        self.special(afile.read(afile.readint(cmd - _DVI_SPECIAL1234 + 1)).decode("ascii"), fontmap)
+
+    def _dvi_fntdef(self, cmd, afile, fontmap):
+        self.definefont(*self._readfontdef(cmd))
+
+    _dispatch = [_dvi_invalid] * 256
+    _dispatch[_DVI_CHARMIN:_DVI_CHARMAX+1] = [_dvi_setchar] * (_DVI_CHARMAX+1 - _DVI_CHARMIN)
+    _dispatch[_DVI_SET1234:_DVI_SET1234+4] = [_dvi_set] * 4
+    _dispatch[_DVI_SETRULE] = _dvi_setrule
+    _dispatch[_DVI_PUT1234:_DVI_PUT1234+4] = [_dvi_put] * 4
+    _dispatch[_DVI_PUTRULE] = _dvi_putrule
+    _dispatch[_DVI_NOP] = _dvi_nop
+    _dispatch[_DVI_EOP] = _dvi_eop
+    _dispatch[_DVI_PUSH] = _dvi_push
+    _dispatch[_DVI_POP] = _dvi_pop
+    _dispatch[_DVI_RIGHT1234:_DVI_RIGHT1234+4] = [_dvi_right] * 4
+    _dispatch[_DVI_W0] = _dvi_w0
+    _dispatch[_DVI_W1234:_DVI_W1234+4] = [_dvi_w] * 4
+    _dispatch[_DVI_X0] = _dvi_x0
+    _dispatch[_DVI_X1234:_DVI_X1234+4] = [_dvi_x] * 4
+    _dispatch[_DVI_DOWN1234:_DVI_DOWN1234+4] = [_dvi_down] * 4
+    _dispatch[_DVI_Y0] = _dvi_y0
+    _dispatch[_DVI_Y1234:_DVI_Y1234+4] = [_dvi_y] * 4
+    _dispatch[_DVI_Z0] = _dvi_z0
+    _dispatch[_DVI_Z1234:_DVI_Z1234+4] = [_dvi_z] * 4
+    _dispatch[_DVI_FNTNUMMIN:_DVI_FNTNUMMAX+1] = [_dvi_fntnum] * (_DVI_FNTNUMMAX+1 - _DVI_FNTNUMMIN)
+    _dispatch[_DVI_FNT1234:_DVI_FNT1234+4] = [_dvi_fnt] * 4
+    _dispatch[_DVI_SPECIAL1234:_DVI_SPECIAL1234+4] = [_dvi_special] * 4
+    _dispatch[_DVI_FNTDEF1234:_DVI_FNTDEF1234+4] = [_dvi_fntdef] * 4
@@ -20,7 +20,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import io, logging, os.path, re
+import hashlib, io, logging, os, pickle, re, tempfile
 from pyx import font, config
 from pyx.font import t1file, afmfile, pfmfile
 from pyx.dvi import encfile
@@ -163,22 +163,153 @@ class MAPline:
 
 # generate fontmap
 
-def readfontmap(filenames):
-    """ read font map from filename (without path) """
-    fontmap = {}
+class fontmap:
+
+    """mapping of TeX font names to MAPline instances
+
+    The MAPline instances are constructed from the lines of the font mapping
+    files when the TeX font name is first looked up. As in the font mapping
+    files, later lines take precedence over earlier ones, unless they cannot
+    be parsed."""
+
+    def __init__(self):
+        # list of tuples (filename, index) with indices as returned by buildindex
+        self.indices = []
+        self.maplines = {}
+
+    def addindex(self, filename, index):
+        self.indices.append((filename, index))
+
+    def get(self, texname, default=None):
+        try:
+            return self.maplines[texname]
+        except KeyError:
+            pass
+        for filename, index in reversed(self.indices):
+            for lineno, line in reversed(index.get(texname, [])):
+                try:
+                    fm = MAPline(line)
+                except (ParseError, UnsupportedPSFragment) as e:
+                    logger.warning("Ignoring line %i in mapping file '%s': %s" % (lineno, filename, e))
+                except UnsupportedFontFormat as e:
+                    pass
+                else:
+                    self.maplines[texname] = fm
+                    return fm
+        return default
+
+    def __getitem__(self, texname):
+        fm = self.get(texname)
+        if fm is None:
+            raise KeyError(texname)
+        return fm
+
+    def __contains__(self, texname):
+        return self.get(texname) is not None
+
+
+# version of the index format, to be increased on incompatible changes
+_indexversion = 1
+
+def _indexfilename(cachedir, filename):
+    return os.path.join(cachedir, "fontmap-%s.pickle" % hashlib.md5(filename.encode("utf-8", errors="surrogateescape")).hexdigest())
+
+def buildindex(mapfile, filename):
+    """ return index of the lines in mapfile by their TeX font names """
+    index = {}
+    lineno = 0
+    for line in mapfile.readlines():
+        lineno += 1
+        line = line.rstrip()
+        if not (line=="" or line[0] in (" ", "%", "*", ";" , "#")):
+            if line[0] in ("<", '"'):
+                # the TeX font name is not the first token and we need to tokenize the full line
+                try:
+                    texname = MAPline(line).texname
+                except (ParseError, UnsupportedPSFragment) as e:
+                    logger.warning("Ignoring line %i in mapping file '%s': %s" % (lineno, filename, e))
+                    continue
+                except UnsupportedFontFormat as e:
+                    continue
+            else:
+                texname = line.split(None, 1)[0]
+            index.setdefault(texname, []).append((lineno, line))
+    return index
+
+def readindex(filename, cachedir=None):
+    """ return the index of the font map filename (without path)
+
+    When a cachedir is given, the index is stored in this directory and
+    reused as long as path, modification time and size of the font map
+    file are unchanged.
+    """
+    with config.open(filename, [config.format.fontmap, config.format.dvips_config], ascii=True) as mapfile:
+        if cachedir is not None:
+            try:
+                path = os.path.abspath(mapfile.name)
+                stat = os.stat(path)
+            except (EnvironmentError, AttributeError):
+                # not a plain file, like a map file from the PyX data tree
+                cachedir = None
+            else:
+                key = _indexversion, path, stat.st_mtime_ns, stat.st_size
+                indexfilename = _indexfilename(cachedir, path)
+                try:
+                    with open(indexfilename, "rb") as indexfile:
+                        indexkey, index = pickle.load(indexfile)
+                except Exception:
+                    pass
+                else:
+                    if indexkey == key:
+                        return index
+        index = buildindex(mapfile, filename)
+    if cachedir is not None:
+        # write to a temporary file first to never expose an incomplete index
+        try:
+            fd, tmpfilename = tempfile.mkstemp(dir=cachedir)
+            with os.fdopen(fd, "wb") as indexfile:
+                pickle.dump((key, index), indexfile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfilename, indexfilename)
+        except EnvironmentError as e:
+            logger.warning("Could not store index of mapping file '%s': %s" % (filename, e))
+    return index
+
+def readfontmap(filenames, cachedir=_marker):
+    """ read font map from filename (without path)
+
+    The indices of the font map files are cached in cachedir, which defaults
+    to the cache directory of the PyX configuration. The MAPline instances
+    are created lazily by the returned fontmap.
+    """
+    if cachedir is _marker:
+        cachedir = config.getcachedir()
+    fm = fontmap()
     for filename in filenames:
-        with config.open(filename, [config.format.fontmap, config.format.dvips_config], ascii=True) as mapfile:
-            lineno = 0
-            for line in mapfile.readlines():
-                lineno += 1
-                line = line.rstrip()
-                if not (line=="" or line[0] in (" ", "%", "*", ";" , "#")):
-                    try:
-                        fm = MAPline(line)
-                    except (ParseError, UnsupportedPSFragment) as e:
-                        logger.warning("Ignoring line %i in mapping file '%s': %s" % (lineno, filename, e))
-                    except UnsupportedFontFormat as e:
-                        pass
-                    else:
-                        fontmap[fm.texname] = fm
-    return fontmap
+        fm.addindex(filename, readindex(filename, cachedir))
+    return fm
+
+
+def main(argv=None):
+    """prebuild the indices of the font map files given as arguments or
+    configured in the text section of the PyX configuration"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m pyx.dvi.mapfile",
+                                     description="Prebuild the indices of font map files in the PyX cache directory.")
+    parser.add_argument("mapfiles", nargs="*", help="font map files (default: configured psfontmaps and pdffontmaps)")
+    parser.add_argument("--cachedir", help="cache directory (default: %(default)s)", default=config.getcachedir())
+    args = parser.parse_args(argv)
+    if not args.cachedir:
+        parser.error("no cache directory available")
+    os.makedirs(args.cachedir, exist_ok=True)
+    mapfiles = args.mapfiles or (config.getlist("text", "psfontmaps", ["psfonts.map"]) +
+                                 config.getlist("text", "pdffontmaps", ["pdftex.map"]))
+    for filename in mapfiles:
+        try:
+            index = readindex(filename, args.cachedir)
+        except EnvironmentError as e:
+            logger.warning("Could not read mapping file '%s': %s" % (filename, e))
+        else:
+            print("%s: %i fonts" % (filename, len(index)))
+
+if __name__ == "__main__":
+    main()
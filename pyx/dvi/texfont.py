@@ -21,11 +21,110 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
 
+import atexit, logging, os, pickle, tempfile
 from pyx import bbox, font, config
 from . import tfmfile, vffile
 
+logger = logging.getLogger("pyx")
+
 class TeXFontError(Exception): pass
 
+
+class metriccache:
+
+    """cache of parsed TFM and VF files shared by all DVI files
+
+    The entries are keyed by the font name and the checksum of the font
+    definition. When a filename is given, the cache is read from this file
+    and the parsed metrics are written back at exit, such that new processes
+    start with the metrics of the fonts used before. Like the file locator
+    cache, the file is stamped by the ls-R files of the TeX installation and
+    discarded once they change. Fonts not being virtual are only remembered
+    within the process."""
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.TFMfiles = {}
+        # VFdata instances or None for fonts not being virtual
+        self.VFdatas = {}
+        self.lsRs = None
+        self.modified = False
+        if filename is not None:
+            try:
+                with open(filename, "rb") as cachefile:
+                    lsRs, stamp, TFMfiles, VFdatas = pickle.load(cachefile)
+            except Exception:
+                pass
+            else:
+                if stamp == config.filelocatorcache.stamp(lsRs):
+                    self.lsRs = lsRs
+                    self.TFMfiles = TFMfiles
+                    self.VFdatas = VFdatas
+            atexit.register(self.save)
+
+    def hasfont(self, name, c):
+        return (name, c) in self.TFMfiles and (name, c) in self.VFdatas
+
+    def getTFMfile(self, name, c, debug=0):
+        try:
+            return self.TFMfiles[(name, c)]
+        except KeyError:
+            pass
+        with config.open(name, [config.format.tfm]) as file:
+            TFMfile = self.TFMfiles[(name, c)] = tfmfile.TFMfile(file, debug)
+        self.modified = True
+        return TFMfile
+
+    def getVFdata(self, name, c):
+        """return the VFdata for the font or None if it is not a virtual font"""
+        try:
+            return self.VFdatas[(name, c)]
+        except KeyError:
+            pass
+        try:
+            with config.open(name, [config.format.vf]) as file:
+                VFdata = vffile.VFdata(file)
+        except EnvironmentError:
+            VFdata = None
+        self.VFdatas[(name, c)] = VFdata
+        if VFdata is not None:
+            self.modified = True
+        return VFdata
+
+    def save(self):
+        if self.filename is None or not self.modified:
+            return
+        if self.lsRs is None:
+            self.lsRs = config.filelocatorcache.findlsRs()
+        VFdatas = {key: VFdata for key, VFdata in self.VFdatas.items() if VFdata is not None}
+        # write to a temporary file first to never expose an incomplete cache
+        try:
+            fd, tmpfilename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.filename)))
+            with os.fdopen(fd, "wb") as cachefile:
+                pickle.dump((self.lsRs, config.filelocatorcache.stamp(self.lsRs), self.TFMfiles, VFdatas), cachefile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfilename, self.filename)
+        except EnvironmentError as e:
+            logger.warning("Could not store the metric cache: %s" % e)
+        self.modified = False
+
+
+def _metriccachefilename():
+    if config.getboolean("text", "metriccache", False):
+        cachedir = config.getcachedir()
+        if cachedir is not None:
+            return os.path.join(cachedir, "metrics.pickle")
+
+metrics = metriccache(_metriccachefilename())
+
+
+def loadfont(name, c, q, d, tfmconv, pyxconv, debug=0):
+    """ return a virtualfont or, if the font is not virtual, a TeXfont """
+    VFdata = metrics.getVFdata(name, c)
+    if VFdata is not None:
+        return virtualfont(name, VFdata, c, q, d, tfmconv, pyxconv, debug)
+    return TeXfont(name, c, q, d, tfmconv, pyxconv, debug)
+
+
 class TeXfont:
 
     def __init__(self, name, c, q, d, tfmconv, pyxconv, debug=0):
@@ -34,8 +133,7 @@ class TeXfont:
         self.d = d                  # design size of font (fix_word) in TeX points
         self.tfmconv = tfmconv      # conversion factor from tfm units to dvi units
         self.pyxconv = pyxconv      # conversion factor from dvi units to PostScript points
-        with config.open(self.name, [config.format.tfm]) as file:
-            self.TFMfile = tfmfile.TFMfile(file, debug)
+        self.TFMfile = metrics.getTFMfile(self.name, c, debug)
 
         # We only check for equality of font checksums if none of them
         # is zero. The case c == 0 happend in some VF files and
@@ -137,9 +235,9 @@ class TeXfont:
 
 class virtualfont(TeXfont):
 
-    def __init__(self, name, file, c, q, d, tfmconv, pyxconv, debug=0):
+    def __init__(self, name, VFdata, c, q, d, tfmconv, pyxconv, debug=0):
         TeXfont.__init__(self, name, c, q, d, tfmconv, pyxconv, debug)
-        self.vffile = vffile.vffile(file, 1.0*q/d, tfmconv, pyxconv, debug > 1)
+        self.vffile = vffile.vffile(VFdata, 1.0*q/d, tfmconv, pyxconv, debug > 1)
 
     def getfonts(self):
         """ return fonts used in virtual font itself """
@@ -30,14 +30,12 @@ _VF_ID         = 202   # VF id byte
 
 class VFError(Exception): pass
 
-class vffile:
+class VFdata:
 
-    def __init__(self, file, scale, tfmconv, pyxconv, debug=0):
-        self.scale = scale
-        self.tfmconv = tfmconv
-        self.pyxconv = pyxconv
-        self.debug = debug
-        self.fonts = {}            # used fonts
+    """parsed content of a VF file, independent of the size the font is used at"""
+
+    def __init__(self, file):
+        self.fontdefs = []         # tuples (num, fontname, c, s, d) of the font definitions
         self.widths = {}           # widths of defined chars
         self.chardefs = {}         # dvi chunks for defined chars
 
@@ -68,24 +66,7 @@ class vffile:
                 s = afile.readint32()     # relative scaling used for font (fix_word)
                 d = afile.readint32()     # design size of font
                 fontname = afile.read(afile.readuchar() + afile.readuchar()).decode("ascii")
-
-                # rescaled size of font: s is relative to the scaling
-                # of the virtual font itself.  Note that realscale has
-                # to be a fix_word (like s)
-                # XXX: check rounding
-                reals = int(round(self.scale * (16*self.ds/16777216) * s))
-
-                # print ("defining font %s -- VF scale: %g, VF design size: %d, relative font size: %d => real size: %d" %
-                #        (fontname, self.scale, self.ds, s, reals)
-                #        )
-
-                from pyx import config
-                from . import texfont
-                try:
-                    with config.open(fontname, [config.format.vf]) as fontfile:
-                        self.fonts[num] = texfont.virtualfont(fontname, fontfile, c, reals, d, self.tfmconv, self.pyxconv, self.debug>1)
-                except EnvironmentError:
-                    self.fonts[num] = texfont.TeXfont(fontname, c, reals, d, self.tfmconv, self.pyxconv, self.debug>1)
+                self.fontdefs.append((num, fontname, c, s, d))
             elif cmd == _VF_LONG_CHAR:
                 # character packet (long form)
                 pl = afile.readuint32()   # packet length
@@ -106,6 +87,43 @@ class vffile:
             else:
                 raise VFError
 
+
+class vffile:
+
+    def __init__(self, data, scale, tfmconv, pyxconv, debug=0):
+        """ create virtual font from the VFdata instance data used at scale """
+        self.scale = scale
+        self.tfmconv = tfmconv
+        self.pyxconv = pyxconv
+        self.debug = debug
+        self.fonts = {}            # used fonts
+        self.widths = data.widths
+        self.chardefs = data.chardefs
+        self.cs = data.cs
+        self.ds = data.ds
+
+        from pyx import config
+        from . import texfont
+
+        # locate the fonts not yet known to the metric cache at once
+        fontnames = [fontname for num, fontname, c, s, d in data.fontdefs
+                     if not texfont.metrics.hasfont(fontname, c)]
+        config.prefetch(fontnames, [config.format.vf])
+        config.prefetch(fontnames, [config.format.tfm])
+
+        for num, fontname, c, s, d in data.fontdefs:
+            # rescaled size of font: s is relative to the scaling
+            # of the virtual font itself.  Note that realscale has
+            # to be a fix_word (like s)
+            # XXX: check rounding
+            reals = int(round(self.scale * (16*self.ds/16777216) * s))
+
+            # print ("defining font %s -- VF scale: %g, VF design size: %d, relative font size: %d => real size: %d" %
+            #        (fontname, self.scale, self.ds, s, reals)
+            #        )
+
+            self.fonts[num] = texfont.loadfont(fontname, c, reals, d, self.tfmconv, self.pyxconv, self.debug>1)
+
     def getfonts(self):
         return self.fonts
 
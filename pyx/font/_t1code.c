@@ -10,6 +10,7 @@
  *  USA.
  */
 
+#define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <stdlib.h>
 #include <stdint.h>
@@ -31,28 +32,42 @@ def decoder(code, r, n):
 
 static PyObject *py_decoder(PyObject *self, PyObject *args)
 {
-    unsigned char *code;
-    int lcode, pr, n;
-
-    if (PyArg_ParseTuple(args, "y#ii", (char **) &code, &lcode, &pr, &n)) {
-      unsigned char *data;
-      int i;
+    Py_buffer code;
+    int pr;
+    Py_ssize_t n;
+
+    if (PyArg_ParseTuple(args, "y*in", &code, &pr, &n)) {
+      unsigned char *codebuf = (unsigned char *) code.buf;
+      Py_ssize_t lcode = code.len;
+      Py_ssize_t i;
       unsigned char x;
       uint16_t r=pr;
       PyObject *result;
+      unsigned char *data;
 
-      if (! (data = (unsigned char *) malloc(lcode)) )
+      if (n < 0)
+          n = 0;
+      if (n > lcode)
+          n = lcode;
+
+      /* the first n chars are skipped, hence the result is written directly */
+      result = PyBytes_FromStringAndSize(NULL, lcode - n);
+      if (!result) {
+          PyBuffer_Release(&code);
           return NULL;
+      }
+      data = (unsigned char *) PyBytes_AS_STRING(result);
 
+      Py_BEGIN_ALLOW_THREADS
       for (i=0; i<lcode; i++) {
-        x = code[i];
-        data[i] = x ^ ( r >> 8);
+        x = codebuf[i];
+        if (i >= n)
+          data[i-n] = x ^ ( r >> 8);
         r = (x + r) * C1 + C2;
       }
+      Py_END_ALLOW_THREADS
 
-      /* convert result to string stripping first n chars */
-      result = PyBytes_FromStringAndSize((const char *)data + n, lcode - n);
-      free(data);
+      PyBuffer_Release(&code);
       return result;
     }
     else return NULL;
@@ -72,31 +87,41 @@ def encoder(data, r, random):
 
 static PyObject *py_encoder(PyObject *self, PyObject *args)
 {
-    unsigned char *data;
-    unsigned char *random;
-    int ldata, pr, lrandom;
-
-    if (PyArg_ParseTuple(args, "y#iy#", (char **) &data, &ldata, &pr, (char **) &random, &lrandom)) {
-      unsigned char *code;
-      int i;
+    Py_buffer data;
+    Py_buffer random;
+    int pr;
+
+    if (PyArg_ParseTuple(args, "y*iy*", &data, &pr, &random)) {
+      unsigned char *databuf = (unsigned char *) data.buf;
+      unsigned char *randombuf = (unsigned char *) random.buf;
+      Py_ssize_t ldata = data.len, lrandom = random.len;
+      Py_ssize_t i;
       uint16_t r=pr;
       PyObject *result;
+      unsigned char *code;
 
-      if (! (code = (unsigned char *) malloc(ldata + lrandom)) )
+      result = PyBytes_FromStringAndSize(NULL, ldata + lrandom);
+      if (!result) {
+          PyBuffer_Release(&data);
+          PyBuffer_Release(&random);
           return NULL;
+      }
+      code = (unsigned char *) PyBytes_AS_STRING(result);
 
+      Py_BEGIN_ALLOW_THREADS
       for (i=0; i<lrandom; i++) {
-        code[i] = random[i] ^ ( r >> 8);
+        code[i] = randombuf[i] ^ ( r >> 8);
         r = (code[i] + r) * C1 + C2;
       }
 
       for (i=0; i<ldata; i++) {
-        code[i+lrandom] = data[i] ^ ( r >> 8);
+        code[i+lrandom] = databuf[i] ^ ( r >> 8);
         r = (code[i+lrandom] + r) * C1 + C2;
       }
+      Py_END_ALLOW_THREADS
 
-      result = PyBytes_FromStringAndSize((const char *)code, ldata + lrandom);
-      free(code);
+      PyBuffer_Release(&data);
+      PyBuffer_Release(&random);
       return result;
     }
     else return NULL;
@@ -54,7 +54,7 @@ class PST1file(pswriter.PSresource):
                 file.write("%%Included glyphs: %s\n" % " ".join(self.glyphnames))
             if self.charcodes:
                 file.write("%%Included charcodes: %s\n" % " ".join([str(charcode) for charcode in self.charcodes]))
-            self.t1file.getstrippedfont(self.glyphnames, self.charcodes).outputPS(file, writer)
+            t1file.strippedfonts.getstrippedfont(self.t1file, self.glyphnames, self.charcodes).outputPS(file, writer)
         else:
             self.t1file.outputPS(file, writer)
         file.write("\n%%EndFont\n")
@@ -275,7 +275,7 @@ class PDFfontfile(pdfwriter.PDFobject):
 
     def write(self, file, writer, registry):
         if writer.strip_fonts:
-            self.t1file.getstrippedfont(self.glyphnames, self.charcodes).outputPDF(file, writer)
+            t1file.strippedfonts.getstrippedfont(self.t1file, self.glyphnames, self.charcodes).outputPDF(file, writer)
         else:
             self.t1file.outputPDF(file, writer)
 
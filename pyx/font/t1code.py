@@ -19,24 +19,32 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import array
+# Pure Python fallback of the _t1code C extension module. The key update is
+# looked up in a precomputed table indexed by cipher byte + key and the xor
+# with the key stream is done on long integers at once.
 
 c1 = 52845
-c1_16, c1_8 = divmod(c1, 0x100) # to avoid overflow (or conversion to the slow long integers)
 c2 = 22719
 
-def decoder(code, r, n):
-    plain = array.array("B")
-    for x in array.array("B", code):
-        plain.append(x ^ (r >> 8))
-        # r = ((x + r) * c1 + c2) & 0xffff # this might overflow
-        r = ((((x + r) * c1_16) & 0xff) * 0x100 + (x + r) * c1_8 + c2) & 0xffff
-    return plain.tobytes()[n:]
+_nextkey = [(s * c1 + c2) & 0xffff for s in range(0x10000 + 0x100)]
 
-def encoder(data, r, random):
-    code = array.array("B")
-    for x in array.array("B", random+data):
-        code.append(x ^ (r>>8))
-        # r = ((code[-1] + r) * c1 + c2) & 0xffff # this might overflow
-        r = ((((code[-1] + r) * c1_16) & 0xff) * 0x100 + (code[-1] + r) * c1_8 + c2) & 0xffff
-    return code.tobytes()
+def decoder(code, r, n, nextkey=_nextkey):
+    key = bytearray(len(code))
+    i = 0
+    for x in code:
+        key[i] = r >> 8
+        r = nextkey[x + r]
+        i += 1
+    plain = int.from_bytes(code, "big") ^ int.from_bytes(key, "big")
+    return plain.to_bytes(len(code), "big")[n:]
+
+def encoder(data, r, random, nextkey=_nextkey):
+    plain = bytes(random) + bytes(data)
+    code = bytearray(len(plain))
+    i = 0
+    for x in plain:
+        x ^= r >> 8
+        code[i] = x
+        r = nextkey[x + r]
+        i += 1
+    return bytes(code)
@@ -20,7 +20,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import array, binascii, io, logging, math, re
+import array, binascii, collections, hashlib, io, logging, math, os, pickle, re, tempfile
 try:
     import zlib
     haszlib = True
@@ -29,7 +29,7 @@ except ImportError:
 
 logger = logging.getLogger("pyx")
 
-from pyx import trafo, reader, writer
+from pyx import config, trafo, reader, writer
 from pyx.path import path, moveto_pt, lineto_pt, curveto_pt, closepath
 
 try:
@@ -661,6 +661,9 @@ class T1File:
         # marker and value for standard encoding check
         self.encoding = None
 
+        # marker and value for the checksum of the font data
+        self._checksum = None
+
         self.name, = self.fontnamepattern.search(self.data1).groups()
         m11, m12, m21, m22, v1, v2 = list(map(float, self.fontmatrixpattern.search(self.data1).groups()[:6]))
         self.fontmatrix = trafo.trafo_pt(matrix=((m11, m12), (m21, m22)), vector=(v1, v2))
@@ -1002,6 +1005,14 @@ class T1File:
     uniqueidbytespattern = re.compile(b"%?/UniqueID\s+\d+\s+def\s+")
         # when UniqueID is commented out (as in modern latin), prepare to remove the comment character as well
 
+    def getchecksum(self):
+        """return a checksum of the font data"""
+        if self._checksum is None or not self._data2eexec:
+            self._checksum = hashlib.sha1(self.data1.encode("ascii", errors="surrogateescape") +
+                                          self.getdata2eexec() +
+                                          self.data3.encode("ascii", errors="surrogateescape")).hexdigest()
+        return self._checksum
+
     def getstrippedfont(self, glyphs, charcodes):
         """create a T1File instance containing only certain glyphs
 
@@ -1243,3 +1254,102 @@ class T1File:
         with open(filename, "rb") as file:
             t1file = cls.from_PF_bytes(file.read())
         return t1file
+
+
+class subsetcache:
+
+    """cache of stripped fonts
+
+    The stripped fonts are keyed by the font name, the checksum of the font
+    data and the sorted glyph names and character codes. They are kept in
+    memory and, when a directory is given, on disk to be reused by later
+    runs. The disk entries are evicted in least recently used order as soon
+    as their total size exceeds maxsize."""
+
+    def __init__(self, directory=None, maxentries=100, maxsize=20000000):
+        self.directory = directory
+        self.maxentries = maxentries
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        if directory is not None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except EnvironmentError as e:
+                logger.warning("Failed to create font subset cache directory '%s' (%s)." % (directory, e))
+                self.directory = None
+
+    def key(self, t1file, glyphs, charcodes):
+        return (t1file.name, t1file.getchecksum(), tuple(sorted(glyphs)), tuple(sorted(charcodes)))
+
+    def _filename(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".t1subset")
+
+    def _diskentries(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".t1subset"):
+                filename = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(filename)
+                except EnvironmentError:
+                    continue
+                yield filename, stat.st_mtime, stat.st_size
+
+    def _evictdisk(self):
+        disksize = 0
+        for filename, mtime, size in sorted(self._diskentries(), key=lambda entry: entry[1], reverse=True):
+            if disksize + size > self.maxsize:
+                try:
+                    os.unlink(filename)
+                except EnvironmentError:
+                    logger.warning("Failed to remove font subset cache entry '%s'." % filename)
+            else:
+                disksize += size
+
+    def _load(self, key):
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as cachefile:
+                filekey, data1, data2eexec, data3 = pickle.load(cachefile)
+            os.utime(filename)
+        except Exception:
+            return None
+        if filekey != key:
+            return None
+        return T1File(data1, data2eexec, data3)
+
+    def _store(self, key, t1file):
+        try:
+            fd, tmpfilename = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as cachefile:
+                pickle.dump((key, t1file.data1, t1file.getdata2eexec(), t1file.data3), cachefile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfilename, self._filename(key))
+        except EnvironmentError as e:
+            logger.warning("Failed to write font subset cache entry (%s)." % e)
+            return
+        self._evictdisk()
+
+    def getstrippedfont(self, t1file, glyphs, charcodes):
+        """return t1file stripped to glyphs and charcodes (see T1File.getstrippedfont)
+
+        In contrast to T1File.getstrippedfont, glyphs is not modified."""
+        key = self.key(t1file, glyphs, charcodes)
+        stripped = self.entries.pop(key, None)
+        if stripped is None and self.directory is not None:
+            stripped = self._load(key)
+        if stripped is None:
+            stripped = t1file.getstrippedfont(set(glyphs), charcodes)
+            if self.directory is not None:
+                self._store(key, stripped)
+        self.entries[key] = stripped
+        while len(self.entries) > self.maxentries:
+            self.entries.popitem(last=False)
+        return stripped
+
+
+def _subsetcachedirectory():
+    if config.getboolean("general", "fontsubsetcache", False):
+        cachedir = config.getcachedir()
+        if cachedir is not None:
+            return os.path.join(cachedir, "t1subsets")
+
+strippedfonts = subsetcache(_subsetcachedirectory())
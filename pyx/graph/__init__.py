@@ -21,7 +21,7 @@
 
 
 import importlib
-__allmodules__ = ["data", "key", "style", "axis"]
+__allmodules__ = ["data", "key", "style", "axis", "decimate"]
 for module in __allmodules__:
     importlib.import_module('.' + module, package='pyx.graph')
 
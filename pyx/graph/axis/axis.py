@@ -44,6 +44,18 @@ class axisdata:
 class _axis:
     """axis"""
 
+    def convertlist(self, data, values):
+        """axis coordinates -> graph coordinates for a list of values
+
+        Values failing the conversion are converted to None."""
+        result = []
+        for value in values:
+            try:
+                result.append(self.convert(data, value))
+            except (ArithmeticError, ValueError, TypeError):
+                result.append(None)
+        return result
+
     def createlinked(self, data, positioner, graphtexrunner, errorname, linkpainter):
         canvas = painter.axiscanvas(self.painter, graphtexrunner)
         if linkpainter is not None:
@@ -246,6 +258,23 @@ class linear(_regularaxis):
         else:
             return (float(value) - data.min) / (data.max - data.min)
 
+    def convertlist(self, data, values):
+        if type(self).convert is not linear.convert:
+            return _axis.convertlist(self, data, values)
+        # same arithmetics as in convert, but with the attribute lookups done once
+        min = data.min
+        max = data.max
+        result = []
+        for value in values:
+            try:
+                if self.reverse:
+                    result.append((max - float(value)) / (max - min))
+                else:
+                    result.append((float(value) - min) / (max - min))
+            except (ArithmeticError, ValueError, TypeError):
+                result.append(None)
+        return result
+
     def create(self, data, positioner, graphtexrunner, errorname):
         return _regularaxis._create(self, data, positioner, graphtexrunner, self.parter, self.rater, errorname)
 
@@ -270,6 +299,26 @@ class logarithmic(_regularaxis):
         else:
             return (math.log(float(value)) - math.log(data.min)) / (math.log(data.max) - math.log(data.min))
 
+    def convertlist(self, data, values):
+        if type(self).convert is not logarithmic.convert:
+            return _axis.convertlist(self, data, values)
+        # same arithmetics as in convert, but with the logarithms of the range calculated once
+        try:
+            logmin = math.log(data.min)
+            logmax = math.log(data.max)
+        except (ArithmeticError, ValueError, TypeError):
+            return [None]*len(values)
+        result = []
+        for value in values:
+            try:
+                if self.reverse:
+                    result.append((logmax - math.log(float(value))) / (logmax - logmin))
+                else:
+                    result.append((math.log(float(value)) - logmin) / (logmax - logmin))
+            except (ArithmeticError, ValueError, TypeError):
+                result.append(None)
+        return result
+
     def create(self, data, positioner, graphtexrunner, errorname):
         try:
             return _regularaxis._create(self, data, positioner, graphtexrunner, self.parter, self.rater, errorname)
@@ -533,6 +582,11 @@ class anchoredaxis:
         self.docreate()
         return self.axis.convert(self.data, x)
 
+    def convertlist(self, values):
+        """convert a list of values; None is returned for invalid values"""
+        self.docreate()
+        return self.axis.convertlist(self.data, values)
+
     def adjustaxis(self, columndata):
         if self.canvas is None:
             self.axis.adjustaxis(self.data, columndata, self.graphtexrunner, self.errorname)
@@ -179,7 +179,9 @@ class regular(_title):
         maxticklevel, maxlabellevel = tick.maxlevels(data.ticks)
         labeldist_pt = unit.topt(self.labeldist)
 
-        # create & align t.temp_labelbox
+        # create & align t.temp_labelbox (all labels are typeset at once)
+        labelticks = []
+        labeltexts = []
         for t in data.ticks:
             if t.labellevel is not None:
                 labelattrs = attr.selectattrs(self.labelattrs, t.labellevel, maxlabellevel)
@@ -189,7 +191,10 @@ class regular(_title):
                         labelattrs.append(self.labeldirection.trafo(t.temp_dx, t.temp_dy))
                     if t.labelattrs is not None:
                         labelattrs.extend(t.labelattrs)
-                    t.temp_labelbox = canvas.texrunner.text_pt(t.temp_x_pt, t.temp_y_pt, t.label, labelattrs)
+                    labelticks.append(t)
+                    labeltexts.append((t.temp_x_pt, t.temp_y_pt, t.label, labelattrs))
+        for t, labelbox in zip(labelticks, canvas.texrunner.text_pt_many(labeltexts)):
+            t.temp_labelbox = labelbox
         if len(data.ticks) > 1:
             equaldirection = 1
             for t in data.ticks[1:]:
@@ -309,11 +314,13 @@ class bar(_title):
             namepos.append((v, x, y, dx, dy))
         nameboxes = []
         if self.nameattrs is not None:
+            nametexts = []
             for (v, x, y, dx, dy), name in zip(namepos, data.names):
                 nameattrs = self.defaultnameattrs + self.nameattrs
                 if self.namedirection is not None:
                     nameattrs.append(self.namedirection.trafo(dx, dy))
-                nameboxes.append(canvas.texrunner.text_pt(x, y, str(name), nameattrs))
+                nametexts.append((x, y, str(name), nameattrs))
+            nameboxes = canvas.texrunner.text_pt_many(nametexts)
         labeldist_pt = canvas.extent_pt + unit.topt(self.namedist)
         if len(namepos) > 1:
             equaldirection = 1
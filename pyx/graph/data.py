@@ -21,11 +21,19 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import math, re, configparser, struct
-from pyx import text
+import array, collections, hashlib, itertools, logging, math, os, pickle, re, configparser, struct, tempfile
+from pyx import config, text, unit
 from . import style
 builtinlist = list
 
+logger = logging.getLogger("pyx")
+
+try:
+    import numpy
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
 
 def splitatvalue(value, *splitpoints):
     section = 0
@@ -62,6 +70,160 @@ _mathglobals = {"neg": lambda x: -x,
                 "pi": math.pi,
                 "e": math.e}
 
+if has_numpy:
+    # numpy counterparts of _mathglobals used for vectorized evaluations; an
+    # expression failing on arrays (like splitatvalue) is evaluated pointwise
+    _numpymathglobals = dict(_mathglobals)
+    _numpymathglobals.update({"abs": numpy.abs,
+                              "sgn": lambda x: numpy.where(x < 0, -1, 1),
+                              "sqrt": numpy.sqrt,
+                              "exp": numpy.exp,
+                              "log": numpy.log,
+                              "sin": numpy.sin,
+                              "cos": numpy.cos,
+                              "tan": numpy.tan,
+                              "asin": numpy.arcsin,
+                              "acos": numpy.arccos,
+                              "atan": numpy.arctan,
+                              "sind": lambda x: numpy.sin(math.pi/180*x),
+                              "cosd": lambda x: numpy.cos(math.pi/180*x),
+                              "tand": lambda x: numpy.tan(math.pi/180*x),
+                              "asind": lambda x: 180/math.pi*numpy.arcsin(x),
+                              "acosd": lambda x: 180/math.pi*numpy.arccos(x),
+                              "atand": lambda x: 180/math.pi*numpy.arctan(x),
+                              "norm": numpy.hypot})
+
+
+def _checkvectorized(vectorized):
+    if vectorized and not has_numpy:
+        raise ValueError("numpy is not available")
+    return vectorized
+
+
+def _vectorizedeval(expression, context, varname, values):
+    """evaluate expression for all values of varname at once
+
+    Returns the result of the expression or None, when the expression cannot
+    be evaluated on numpy arrays."""
+    context = context.copy()
+    context[varname] = values
+    try:
+        with numpy.errstate(all="ignore"):
+            return eval(expression, _numpymathglobals, context)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+
+
+def _vectorizedcolumn(value, shape):
+    """return value as a real array of the given shape or None"""
+    try:
+        value = numpy.asarray(value)
+        if value.dtype.kind not in "biuf":
+            return None
+        return numpy.broadcast_to(value, shape)
+    except (ValueError, TypeError):
+        return None
+
+
+class _devicemap:
+    """estimate device coordinates of value tuples
+
+    The adaptive sampling of functions happens before the axes ranges are
+    known. Thus values are mapped to device coordinates by the length of the
+    graph axes using the fixed axes ranges or the range of the given
+    rows otherwise. Columns not belonging to a regular axis are ignored."""
+
+    def __init__(self, graph, axisnames, columnnames, rows):
+        from pyx.graph.axis import logarithmic
+        self.columns = []
+        for i, columnname in enumerate(columnnames):
+            axisname = axisnames.get(columnname, columnname)
+            if axisname not in graph.axes:
+                continue
+            anaxis = graph.axes[axisname]
+            logaxis = isinstance(anaxis.axis, logarithmic)
+            values = [row[i] for row in rows] + [anaxis.data.min, anaxis.data.max]
+            values = [self.convert(value, logaxis) for value in values]
+            values = [value for value in values if value is not None]
+            if getattr(anaxis.axis, "min", None) is not None:
+                values.append(self.convert(anaxis.axis.min, logaxis))
+            if getattr(anaxis.axis, "max", None) is not None:
+                values.append(self.convert(anaxis.axis.max, logaxis))
+            if values and max(values) > min(values):
+                scale = graph.axislength_pt(axisname) / (max(values) - min(values))
+                self.columns.append((i, logaxis, scale))
+
+    def convert(self, value, logaxis):
+        try:
+            value = value + 0.0
+        except TypeError:
+            return None
+        if not isinstance(value, float):
+            return None
+        if logaxis:
+            if value <= 0:
+                return None
+            value = math.log(value)
+        if not math.isfinite(value):
+            return None
+        return value
+
+    def __call__(self, row):
+        result = []
+        for i, logaxis, scale in self.columns:
+            value = self.convert(row[i], logaxis)
+            if value is None:
+                return None
+            result.append(value*scale)
+        return result
+
+
+def _chorddistance(p, p1, p2):
+    """returns the distance of point p to the line segment from p1 to p2"""
+    d = [x2-x1 for x1, x2 in zip(p1, p2)]
+    w = [x-x1 for x, x1 in zip(p, p1)]
+    dd = sum([x*x for x in d])
+    if dd:
+        t = min(max(sum([x*y for x, y in zip(w, d)])/dd, 0), 1)
+        w = [x-t*y for x, y in zip(w, d)]
+    return math.sqrt(sum([x*x for x in w]))
+
+
+def _adaptivesamples(evaluate, min, max, points, graph, axisnames, columnnames, tolerance, maxdepth):
+    """sample evaluate adaptively in the range min to max
+
+    Starting from points equidistant parameters, intervals are bisected up
+    to maxdepth times as long as the midpoint deviates from the chord by
+    more than tolerance in device space. evaluate returns a tuple of values
+    for the columns columnnames at a parameter. Returns a list of those
+    tuples. Intervals containing invalid values are bisected to locate the
+    borders of the range of valid values."""
+    params = [min + (max-min)*i / (points-1.0) for i in range(points)]
+    rows = [evaluate(param) for param in params]
+    devicemap = _devicemap(graph, axisnames, columnnames, rows)
+    tolerance_pt = unit.topt(tolerance)
+    result = [rows[0]]
+
+    def bisect(param1, row1, p1, param2, row2, p2, depth):
+        if depth == maxdepth:
+            return
+        param = 0.5*(param1+param2)
+        row = evaluate(param)
+        p = devicemap(row)
+        if p1 is None and p is None and p2 is None:
+            return
+        if p1 is not None and p is not None and p2 is not None and _chorddistance(p, p1, p2) <= tolerance_pt:
+            return
+        bisect(param1, row1, p1, param, row, p, depth+1)
+        result.append(row)
+        bisect(param, row, p, param2, row2, p2, depth+1)
+
+    devices = [devicemap(row) for row in rows]
+    for i in range(1, points):
+        bisect(params[i-1], rows[i-1], devices[i-1], params[i], rows[i], devices[i], 0)
+        result.append(rows[i])
+    return result
+
 
 class _data:
     """graph data interface
@@ -226,7 +388,135 @@ class data(_data):
             return self.orgdata.columns[value][self.columncallbackcount]
 
 
-filecache = {}
+class filedatacache:
+
+    """cache of the columns read by graph.data.file
+
+    The entries are keyed by the absolute filename, the modification time
+    and size of the file and the parse options. They are kept in memory in
+    least recently used order up to maxentries and, when a directory is
+    given, on disk to be reused by later runs. Columns of floats and integers
+    are stored as compact binary arrays on disk. The disk entries are
+    evicted in least recently used order as soon as their total size exceeds
+    maxsize."""
+
+    def __init__(self, directory=None, maxentries=20, maxsize=500000000):
+        self.directory = directory
+        self.maxentries = maxentries
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        if directory is not None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except EnvironmentError as e:
+                logger.warning("Failed to create data file cache directory '%s' (%s)." % (directory, e))
+                self.directory = None
+
+    def key(self, filename, options):
+        stat = os.stat(filename)
+        return (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size, options)
+
+    def _filename(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".columns")
+
+    def _diskentries(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".columns"):
+                filename = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(filename)
+                except EnvironmentError:
+                    continue
+                yield filename, stat.st_mtime, stat.st_size
+
+    def _evictdisk(self):
+        disksize = 0
+        for filename, mtime, size in sorted(self._diskentries(), key=lambda entry: entry[1], reverse=True):
+            if disksize + size > self.maxsize:
+                try:
+                    os.unlink(filename)
+                except EnvironmentError:
+                    logger.warning("Failed to remove data file cache entry '%s'." % filename)
+            else:
+                disksize += size
+
+    def _pack(self, column):
+        for typecode, type in [("q", int), ("d", float)]:
+            if all(x.__class__ is type for x in column):
+                try:
+                    return typecode, array.array(typecode, column).tobytes()
+                except OverflowError:
+                    pass
+        return None, column
+
+    def _unpack(self, typecode, column):
+        if typecode is None:
+            return column
+        return array.array(typecode, column).tolist()
+
+    def _load(self, key):
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as cachefile:
+                filekey, columnnames, columndata = pickle.load(cachefile)
+            os.utime(filename)
+        except Exception:
+            return None
+        if filekey != key:
+            return None
+        return columnnames, [self._unpack(typecode, column) for typecode, column in columndata]
+
+    def _store(self, key, entry):
+        columnnames, columndata = entry
+        try:
+            fd, tmpfilename = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as cachefile:
+                pickle.dump((key, columnnames, [self._pack(column) for column in columndata]), cachefile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfilename, self._filename(key))
+        except EnvironmentError as e:
+            logger.warning("Failed to write data file cache entry (%s)." % e)
+            return
+        self._evictdisk()
+
+    def get(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None and self.directory is not None:
+            entry = self._load(key)
+        if entry is not None:
+            self.entries[key] = entry
+        return entry
+
+    def store(self, key, entry):
+        if self.directory is not None:
+            self._store(key, entry)
+        self.entries[key] = entry
+        while len(self.entries) > self.maxentries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def _filecachedirectory():
+    if config.getboolean("general", "datafilecache", False):
+        cachedir = config.getcachedir()
+        if cachedir is not None:
+            return os.path.join(cachedir, "datafiles")
+
+filecache = filedatacache(_filecachedirectory())
+
+
+class _columns(_data):
+    "Graph data from a list of columns"
+
+    defaultstyles = defaultsymbols
+
+    def __init__(self, columndata, title, **columns):
+        self.columndata = columndata
+        self.columns = dict([(key, self.columndata[i]) for key, i in list(columns.items())])
+        self.columnnames = list(self.columns.keys())
+        self.title = title
+
 
 class file(data):
 
@@ -279,6 +569,83 @@ class file(data):
     def getcachekey(self, *args):
         return ":".join([str(x) for x in args])
 
+    def readcolumns(self, lines, commentpattern, stringpattern, columnpattern, skiphead, skiptail, every, chunksize=10000):
+        """returns the column names and the list of columns read from lines
+
+        The first column contains the line numbers and the column names refer
+        to the following columns. Shorter lines are padded by None. lines is
+        iterated only once, e.g. over a file, and the data lines are parsed in
+        chunks of chunksize lines, by numpy when possible."""
+        columnnames = []
+        lines = (line.strip() for line in lines)
+        # comments up to the first selected data line define the column names
+        headlines = []
+        for line in lines:
+            match = commentpattern.match(line)
+            if match:
+                columnnames = self.splitline(line[match.end():], stringpattern, columnpattern, tofloat=0)
+            elif line:
+                headlines.append(line)
+                if len(headlines) > skiphead:
+                    break
+        if commentpattern is self.defaultcommentpattern:
+            # the default pattern matches lines starting with #, ! or %
+            lines = (line for line in lines if line and line[0] not in "#!%")
+        else:
+            lines = (line for line in lines if line and not commentpattern.match(line))
+        selected = ((i+1, line) for i, line in enumerate(itertools.chain(headlines, lines))
+                    if i >= skiphead and not (i-skiphead) % every)
+
+        # the last selected lines are held back in tail to be dropped by skiptail
+        tail = collections.deque()
+        def kept(skip=skiptail//every):
+            for linenumber, line in selected:
+                tail.append((linenumber, line))
+                if len(tail) > skip:
+                    yield tail.popleft()
+        kept = kept()
+
+        usenumpy = has_numpy and stringpattern is self.defaultstringpattern and columnpattern is self.defaultcolumnpattern
+        columns = [] # columns parsed by numpy
+        rows = [] # rows parsed by splitline once numpy failed
+        maxcolumns = 0
+        while True:
+            chunk = builtinlist(itertools.islice(kept, chunksize))
+            if not chunk:
+                break
+            if usenumpy and not any('"' in line for linenumber, line in chunk):
+                try:
+                    values = numpy.loadtxt([line for linenumber, line in chunk], dtype=float, comments=None, ndmin=2)
+                except ValueError:
+                    pass
+                else:
+                    if not columns:
+                        columns = [[] for i in range(values.shape[1]+1)]
+                    if len(columns) == values.shape[1]+1:
+                        columns[0].extend(linenumber for linenumber, line in chunk)
+                        for column, value in zip(columns[1:], values.T.tolist()):
+                            column.extend(value)
+                        continue
+            usenumpy = False
+            if columns:
+                rows = [builtinlist(row) for row in zip(*columns)]
+                maxcolumns = len(columns)
+                columns = []
+            for linenumber, line in chunk:
+                linedata = [linenumber] + self.splitline(line, stringpattern, columnpattern, tofloat=1)
+                if len(linedata) > maxcolumns:
+                    maxcolumns = len(linedata)
+                rows.append(linedata)
+        if columns:
+            return columnnames[:len(columns)-1], columns
+        # the lines dropped by skiptail count for the column names
+        for linenumber, line in tail:
+            maxcolumns = max(maxcolumns, len(self.splitline(line, stringpattern, columnpattern, tofloat=1)) + 1)
+        for row in rows:
+            if len(row) != maxcolumns:
+                row.extend([None]*(maxcolumns-len(row)))
+        return columnnames[:maxcolumns-1], [builtinlist(column) for column in zip(*rows)]
+
     def __init__(self, filename,
                        commentpattern=defaultcommentpattern,
                        stringpattern=defaultstringpattern,
@@ -286,48 +653,28 @@ class file(data):
                        skiphead=0, skiptail=0, every=1,
                        **kwargs):
 
-        def readfile(file, title, self=self, commentpattern=commentpattern, stringpattern=stringpattern, columnpattern=columnpattern, skiphead=skiphead, skiptail=skiptail, every=every):
-            columns = []
-            columndata = []
-            linenumber = 0
-            maxcolumns = 0
-            for line in file.readlines():
-                line = line.strip()
-                match = commentpattern.match(line)
-                if match:
-                    if not len(columndata):
-                        columns = self.splitline(line[match.end():], stringpattern, columnpattern, tofloat=0)
-                else:
-                    linedata = []
-                    for value in self.splitline(line, stringpattern, columnpattern, tofloat=1):
-                        linedata.append(value)
-                    if len(linedata):
-                        if linenumber >= skiphead and not ((linenumber - skiphead) % every):
-                            linedata = [linenumber + 1] + linedata
-                            if len(linedata) > maxcolumns:
-                                maxcolumns = len(linedata)
-                            columndata.append(linedata)
-                        linenumber += 1
-            if skiptail >= every:
-                skip, x = divmod(skiptail, every)
-                del columndata[-skip:]
-            for i in range(len(columndata)):
-                if len(columndata[i]) != maxcolumns:
-                    columndata[i].extend([None]*(maxcolumns-len(columndata[i])))
-            return points(columndata, title=title, addlinenumbers=0,
-                          **dict([(column, i+1) for i, column in enumerate(columns[:maxcolumns-1])]))
+        def readfile(lines):
+            return self.readcolumns(lines, commentpattern, stringpattern, columnpattern, skiphead, skiptail, every)
+
+        def makedata(columnnames, columndata, title):
+            columns = dict([(column, i+1) for i, column in enumerate(columnnames)])
+            if not columndata:
+                return points([], title=title, addlinenumbers=0, **columns)
+            return _columns(columndata, title, **columns)
 
         try:
             filename.readlines
         except:
             # not a file-like object -> open it
-            cachekey = self.getcachekey(filename, commentpattern, stringpattern, columnpattern, skiphead, skiptail, every)
-            if cachekey not in filecache:
+            cachekey = filecache.key(filename, self.getcachekey(commentpattern, stringpattern, columnpattern, skiphead, skiptail, every))
+            entry = filecache.get(cachekey)
+            if entry is None:
                 with open(filename) as f:
-                    filecache[cachekey] = readfile(f, filename)
-            data.__init__(self, filecache[cachekey], **kwargs)
+                    entry = readfile(f)
+                filecache.store(cachekey, entry)
+            data.__init__(self, makedata(*entry, title=filename), **kwargs)
         else:
-            data.__init__(self, readfile(filename, "user provided file-like object"), **kwargs)
+            data.__init__(self, makedata(*readfile(filename), title="user provided file-like object"), **kwargs)
 
 
 conffilecache = {}
@@ -501,8 +848,11 @@ class function(_data):
     assignmentpattern = re.compile(r"\s*([a-z_][a-z0-9_]*)\s*\(\s*([a-z_][a-z0-9_]*)\s*\)\s*=", re.IGNORECASE)
 
     def __init__(self, expression, title=_notitle, min=None, max=None,
-                 points=100, context={}):
+                 points=None, context={}, vectorized=False, tolerance=None, maxdepth=10):
 
+        if points is None:
+            # the adaptive sampling starts from a coarse grid
+            points = 100 if tolerance is None else 10
         if title is _notitle:
             self.title = expression
         else:
@@ -510,6 +860,9 @@ class function(_data):
         self.min = min
         self.max = max
         self.numberofpoints = points
+        self.vectorized = _checkvectorized(vectorized)
+        self.tolerance = tolerance
+        self.maxdepth = maxdepth
         self.context = context.copy() # be safe on late evaluations
         m = self.assignmentpattern.match(expression)
         if m:
@@ -523,6 +876,31 @@ class function(_data):
         self.columns = {}
         self.columnnames = [self.xname, self.yname]
 
+    def evaluate(self, x):
+        self.context[self.xname] = x
+        try:
+            return eval(self.expression, _mathglobals, self.context)
+        except (ArithmeticError, ValueError):
+            return None
+
+    def vectorizedcolumns(self, min, max, logaxis):
+        """evaluate the expression on a numpy array of all points
+
+        Returns the x and y column or None, when the expression cannot be
+        evaluated on arrays. Non-finite results are recalculated pointwise
+        to map exceptions to None like in the non-vectorized evaluation."""
+        x = min + (max-min)*numpy.arange(self.numberofpoints) / (self.numberofpoints-1.0)
+        if logaxis:
+            x = numpy.exp(x)
+        y = _vectorizedcolumn(_vectorizedeval(self.expression, self.context, self.xname, x), x.shape)
+        if y is None:
+            return None
+        xcolumn = x.tolist()
+        ycolumn = y.tolist()
+        for i in numpy.flatnonzero(~numpy.isfinite(y)):
+            ycolumn[i] = self.evaluate(xcolumn[i])
+        return xcolumn, ycolumn
+
     def dynamiccolumns(self, graph, axisnames):
         dynamiccolumns = {self.xname: [], self.yname: []}
 
@@ -540,17 +918,27 @@ class function(_data):
         if logaxis:
             min = math.log(min)
             max = math.log(max)
+        if self.tolerance is not None:
+            def evaluate(x):
+                if logaxis:
+                    x = math.exp(x)
+                return x, self.evaluate(x)
+            rows = _adaptivesamples(evaluate, min, max, self.numberofpoints, graph, axisnames,
+                                    self.columnnames, self.tolerance, self.maxdepth)
+            dynamiccolumns[self.xname] = [x for x, y in rows]
+            dynamiccolumns[self.yname] = [y for x, y in rows]
+            return dynamiccolumns
+        if self.vectorized:
+            columns = self.vectorizedcolumns(min, max, logaxis)
+            if columns is not None:
+                dynamiccolumns[self.xname], dynamiccolumns[self.yname] = columns
+                return dynamiccolumns
         for i in range(self.numberofpoints):
             x = min + (max-min)*i / (self.numberofpoints-1.0)
             if logaxis:
                 x = math.exp(x)
             dynamiccolumns[self.xname].append(x)
-            self.context[self.xname] = x
-            try:
-                y = eval(self.expression, _mathglobals, self.context)
-            except (ArithmeticError, ValueError):
-                y = None
-            dynamiccolumns[self.yname].append(y)
+            dynamiccolumns[self.yname].append(self.evaluate(x))
         return dynamiccolumns
 
 
@@ -564,7 +952,11 @@ class paramfunction(_data):
 
     defaultstyles = defaultlines
 
-    def __init__(self, varname, min, max, expression, title=_notitle, points=100, context={}):
+    def __init__(self, varname, min, max, expression, title=_notitle, points=None, context={},
+                 vectorized=False, tolerance=None, maxdepth=10):
+        if points is None:
+            # the adaptive sampling starts from a coarse grid
+            points = 100 if tolerance is None else 10
         if varname in context:
             raise ValueError("varname in context")
         if title is _notitle:
@@ -576,6 +968,22 @@ class paramfunction(_data):
         keys = [key.strip() for key in varlist.split(",")]
         self.columns = dict([(key, []) for key in keys])
         context = context.copy()
+        self.tolerance = tolerance
+        if tolerance is not None:
+            # the sampling depends on the graph and is thus performed by dynamiccolumns
+            self.varname = varname
+            self.min = min
+            self.max = max
+            self.expression = expression
+            self.numberofpoints = points
+            self.context = context
+            self.maxdepth = maxdepth
+            self.columnnames = keys
+            self.columns = {}
+            return
+        if _checkvectorized(vectorized) and self.vectorizedcolumns(varname, min, max, expression, keys, points, context):
+            self.columnnames = list(self.columns.keys())
+            return
         for i in range(points):
             param = min + (max-min)*i / (points-1.0)
             context[varname] = param
@@ -586,6 +994,45 @@ class paramfunction(_data):
             raise ValueError("unpack tuple of wrong size")
         self.columnnames = list(self.columns.keys())
 
+    def evaluate(self, param):
+        self.context[self.varname] = param
+        values = tuple(eval(self.expression, _mathglobals, self.context))
+        if len(values) != len(self.columnnames):
+            raise ValueError("unpack tuple of wrong size")
+        return values
+
+    def dynamiccolumns(self, graph, axisnames):
+        if self.tolerance is None:
+            return {}
+        rows = _adaptivesamples(self.evaluate, self.min, self.max, self.numberofpoints, graph, axisnames,
+                                self.columnnames, self.tolerance, self.maxdepth)
+        return dict([(key, [row[i] for row in rows]) for i, key in enumerate(self.columnnames)])
+
+    def vectorizedcolumns(self, varname, min, max, expression, keys, points, context):
+        """evaluate the expression on a numpy array of all parameters
+
+        Fills the columns and returns True on success. Points with
+        non-finite values are recalculated pointwise."""
+        params = min + (max-min)*numpy.arange(points) / (points-1.0)
+        values = _vectorizedeval(expression, context, varname, params)
+        if not isinstance(values, tuple) or len(values) != len(keys):
+            return False
+        values = [_vectorizedcolumn(value, params.shape) for value in values]
+        if any(value is None for value in values):
+            return False
+        columns = [value.tolist() for value in values]
+        finite = numpy.ones(params.shape, dtype=bool)
+        for value in values:
+            finite &= numpy.isfinite(value)
+        params = params.tolist()
+        for i in numpy.flatnonzero(~finite):
+            context[varname] = params[i]
+            for column, value in zip(columns, eval(expression, _mathglobals, context)):
+                column[i] = value
+        for key, column in zip(keys, columns):
+            self.columns[key] = column
+        return True
+
 
 class paramfunctionxy(paramfunction):
 
@@ -0,0 +1,171 @@
+# -*- encoding: utf-8 -*-
+#
+#
+# Copyright (C) 2002-2012 André Wobst <wobsta@users.sourceforge.net>
+#
+# This file is part of PyX (http://pyx.sourceforge.net/).
+#
+# PyX is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# PyX is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyX; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
+
+
+import math
+from pyx import unit
+
+try:
+    import numpy
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+# ranges of points are handled by numpy array operations when available;
+# below _numpythreshold points the python implementation is faster
+_numpythreshold = 32
+
+
+class _decimate:
+    """Interface class for point decimations
+
+    A decimation reduces the number of data points passed to the graph
+    styles. It is applied by the plotitem after the axes ranges have been
+    fixed and operates on the output positions of the data points."""
+
+    def select(self, points_pt):
+        """Select data points
+
+        points_pt is a list of the output positions of the data points in
+        pts. Points without a valid position are None. The method returns
+        the sorted list of the indices of the points to be kept. Points
+        without a valid position should always be kept, since they
+        interrupt lines."""
+        return list(range(len(points_pt)))
+
+    def runs(self, points_pt):
+        """returns the index ranges of consecutive valid points"""
+        start = None
+        for i, point_pt in enumerate(points_pt):
+            if point_pt is None:
+                if start is not None:
+                    yield start, i
+                    start = None
+            elif start is None:
+                start = i
+        if start is not None:
+            yield start, len(points_pt)
+
+
+def _segmentdistance_pt(point_pt, start_pt, end_pt):
+    """returns the distance of point_pt to the line segment from start_pt to end_pt"""
+    x_pt, y_pt = point_pt
+    x1_pt, y1_pt = start_pt
+    dx_pt = end_pt[0] - x1_pt
+    dy_pt = end_pt[1] - y1_pt
+    dd = dx_pt*dx_pt + dy_pt*dy_pt
+    if dd:
+        t = min(max(((x_pt-x1_pt)*dx_pt + (y_pt-y1_pt)*dy_pt)/dd, 0), 1)
+        x1_pt += t*dx_pt
+        y1_pt += t*dy_pt
+    return math.hypot(x_pt-x1_pt, y_pt-y1_pt)
+
+
+class douglaspeucker(_decimate):
+    """Douglas-Peucker line simplification
+
+    Keeps the points needed to follow the original line within the given
+    tolerance in output units. The shape of lines is thus not altered
+    visibly. The decimation is not suited for symbols and other styles
+    marking each data point."""
+
+    def __init__(self, tolerance=0.1*unit.t_pt):
+        self.tolerance = tolerance
+
+    def farthest(self, points_pt, first, last, tolerance_pt):
+        """returns the index of the point farthest from the line segment
+        between first and last or None, when all points are within tolerance_pt"""
+        maxdistance_pt = tolerance_pt
+        farthest = None
+        for i in range(first+1, last):
+            distance_pt = _segmentdistance_pt(points_pt[i], points_pt[first], points_pt[last])
+            if distance_pt > maxdistance_pt:
+                maxdistance_pt = distance_pt
+                farthest = i
+        return farthest
+
+    def farthest_numpy(self, points_pt, first, last, tolerance_pt):
+        """numpy version of farthest, points_pt being an array of shape (n, 2)"""
+        start_pt = points_pt[first]
+        d_pt = points_pt[last] - start_pt
+        w_pt = points_pt[first+1:last] - start_pt
+        dd = numpy.dot(d_pt, d_pt)
+        if dd:
+            t = numpy.clip(numpy.dot(w_pt, d_pt)/dd, 0, 1)
+            w_pt = w_pt - t[:, numpy.newaxis]*d_pt
+        distances_pt = numpy.hypot(w_pt[:, 0], w_pt[:, 1])
+        i = int(numpy.argmax(distances_pt))
+        if distances_pt[i] > tolerance_pt:
+            return first+1+i
+        return None
+
+    def select(self, points_pt):
+        tolerance_pt = unit.topt(self.tolerance)
+        keep = [point_pt is None for point_pt in points_pt]
+        for start, end in self.runs(points_pt):
+            keep[start] = keep[end-1] = True
+            runpoints_pt = points_pt[start:end]
+            if has_numpy and end - start > _numpythreshold:
+                arraypoints_pt = numpy.array(runpoints_pt, dtype=float)
+            ranges = [(0, end-start-1)]
+            while ranges:
+                first, last = ranges.pop()
+                if has_numpy and last - first > _numpythreshold:
+                    farthest = self.farthest_numpy(arraypoints_pt, first, last, tolerance_pt)
+                else:
+                    farthest = self.farthest(runpoints_pt, first, last, tolerance_pt)
+                if farthest is not None:
+                    keep[start+farthest] = True
+                    ranges.append((first, farthest))
+                    ranges.append((farthest, last))
+        return [i for i, k in enumerate(keep) if k]
+
+
+class minmax(_decimate):
+    """minimum and maximum per column of the output
+
+    Groups consecutive points falling into the same column of the given
+    width in output units (the horizontal direction) and keeps the first,
+    the last, the lowest and the highest point of each group. This keeps
+    the envelope of dense series like time series in a single pass."""
+
+    def __init__(self, tolerance=0.5*unit.t_pt):
+        self.tolerance = tolerance
+
+    def select(self, points_pt):
+        tolerance_pt = unit.topt(self.tolerance)
+        keep = [point_pt is None for point_pt in points_pt]
+        for start, end in self.runs(points_pt):
+            groupstart = start
+            column = math.floor(points_pt[start][0]/tolerance_pt)
+            for i in range(start, end+1):
+                if i < end:
+                    nextcolumn = math.floor(points_pt[i][0]/tolerance_pt)
+                    if nextcolumn == column:
+                        continue
+                group = range(groupstart, i)
+                keep[groupstart] = keep[i-1] = True
+                keep[min(group, key=lambda j: points_pt[j][1])] = True
+                keep[max(group, key=lambda j: points_pt[j][1])] = True
+                if i < end:
+                    groupstart = i
+                    column = nextcolumn
+        return [i for i, k in enumerate(keep) if k]
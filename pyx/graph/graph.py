@@ -64,9 +64,10 @@ class styledata:
 
 class plotitem:
 
-    def __init__(self, graph, data, styles):
+    def __init__(self, graph, data, styles, decimate=None):
         self.data = data
         self.title = data.title
+        self.decimate = decimate
 
         addstyles = [None]
         while addstyles:
@@ -109,31 +110,63 @@ class plotitem:
             for privatedata, style in zip(self.privatedatalist, self.styles):
                 style.adjustaxis(privatedata, self.sharedata, graph, self, columnname, data)
 
+    def decimatedcolumns(self, graph, columns):
+        """returns the columns dictionary reduced to the rows to be drawn
+
+        When a decimation is set, it selects the rows by their output
+        positions as calculated from the position columns of the pos style."""
+        if self.decimate is None or getattr(self.sharedata, "vposmissing", True):
+            return columns
+        poscolumnnames = self.sharedata.poscolumnnames
+        if not all([columnname in columns for columnname in poscolumnnames]):
+            return columns
+        vposcolumns = [graph.axes[self.dataaxisnames.get(columnname, columnname)].convertlist(columns[columnname])
+                       for columnname in poscolumnnames]
+        points_pt = [None if None in vpos else graph.vpos_pt(*vpos) for vpos in zip(*vposcolumns)]
+        indices = self.decimate.select(points_pt)
+        return dict([(columnname, [column[i] for i in indices]) for columnname, column in list(columns.items())])
+
+    def drawcolumns(self, graph, columns, batched):
+        """pass the data of the columns dictionary to the styles
+
+        The columns are passed at once to the drawpoints methods of the
+        styles when batched is set. Otherwise drawpoint is called for each
+        data point."""
+        if batched:
+            count = len(next(iter(columns.values())))
+            pointcolumns = dict([(columnname, columns[columnname] if columnname in columns else [None]*count)
+                                 for columnname in self.usedcolumnnames])
+            for privatedata, style in zip(self.privatedatalist, self.styles):
+                style.drawpoints(privatedata, self.sharedata, graph, pointcolumns)
+        else:
+            point = dict([(columnname, None) for columnname in self.usedcolumnnames])
+            columnnames = list(columns.keys())
+            for values in zip(*list(columns.values())):
+                for columnname, value in zip(columnnames, values):
+                    point[columnname] = value
+                for privatedata, style in zip(self.privatedatalist, self.styles):
+                    style.drawpoint(privatedata, self.sharedata, graph, point)
+
     def draw(self, graph):
         for privatedata, style in zip(self.privatedatalist, self.styles):
             style.initdrawpoints(privatedata, self.sharedata, graph)
 
-        point = dict([(columnname, None) for columnname in self.usedcolumnnames])
-        # fill point with (static) column data first
-        columns = list(self.data.columns.keys())
-        for values in zip(*list(self.data.columns.values())):
-            for column, value in zip(columns, values):
-                point[column] = value
-            for privatedata, style in zip(self.privatedatalist, self.styles):
-                style.drawpoint(privatedata, self.sharedata, graph, point)
-
-        point = dict([(columnname, None) for columnname in self.usedcolumnnames])
+        # the batched drawpoints methods are used when all styles support them
+        batched = bool(self.usedcolumnnames) and all([style.batched for style in self.styles])
+        # draw (static) column data first
+        if self.data.columns:
+            self.drawcolumns(graph, self.decimatedcolumns(graph, self.data.columns), batched)
         # insert an empty point
         if self.data.columns and self.dynamiccolumns:
-            for privatedata, style in zip(self.privatedatalist, self.styles):
-                style.drawpoint(privatedata, self.sharedata, graph, point)
-        # fill point with dynamic column data
-        columns = list(self.dynamiccolumns.keys())
-        for values in zip(*list(self.dynamiccolumns.values())):
-            for key, value in zip(columns, values):
-                point[key] = value
-            for privatedata, style in zip(self.privatedatalist, self.styles):
-                style.drawpoint(privatedata, self.sharedata, graph, point)
+            if batched:
+                self.drawcolumns(graph, dict([(columnname, [None]) for columnname in self.usedcolumnnames]), batched)
+            else:
+                point = dict([(columnname, None) for columnname in self.usedcolumnnames])
+                for privatedata, style in zip(self.privatedatalist, self.styles):
+                    style.drawpoint(privatedata, self.sharedata, graph, point)
+        # draw dynamic column data
+        if self.dynamiccolumns:
+            self.drawcolumns(graph, self.decimatedcolumns(graph, self.dynamiccolumns), batched)
         for privatedata, style in zip(self.privatedatalist, self.styles):
             style.donedrawpoints(privatedata, self.sharedata, graph)
 
@@ -190,7 +223,7 @@ class graph(canvas.canvas):
         self.finish()
         canvas.canvas.processPDF(self, file, writer, context, registry, bbox)
 
-    def plot(self, data, styles=None, rangewarning=1):
+    def plot(self, data, styles=None, rangewarning=1, decimate=None):
         if self.didranges and rangewarning:
             logger.warning("axes ranges have already been analysed; no further adjustments will be performed")
         if self.didstyles:
@@ -212,7 +245,7 @@ class graph(canvas.canvas):
                     raise RuntimeError("defaultstyles differ")
         plotitems = []
         for d in usedata:
-            plotitems.append(plotitem(self, d, styles))
+            plotitems.append(plotitem(self, d, styles, decimate))
         self.plotitems.extend(plotitems)
         if self.didranges:
             for aplotitem in plotitems:
@@ -248,6 +281,10 @@ class graph(canvas.canvas):
     def doaxes(self):
         raise NotImplementedError
 
+    def axislength_pt(self, axisname):
+        """returns the approximate length of the axis axisname in pts"""
+        raise NotImplementedError
+
     def dostyles(self):
         if self.did(self.dostyles):
             return
@@ -440,6 +477,11 @@ class graphxy(graph):
         return (self.xpos + vx*self.width,
                 self.ypos + vy*self.height)
 
+    def axislength_pt(self, axisname):
+        if (axisname[0] == "x") != bool(self.flipped):
+            return self.width_pt
+        return self.height_pt
+
     def vzindex(self, vx, vy):
         return 0
 
@@ -876,6 +918,10 @@ class graphxyz(graph):
                                     2*self.zscale*(vz - 0.5))
         return self.xpos+x*self.size, self.ypos+y*self.size
 
+    def axislength_pt(self, axisname):
+        scale = {"x": self.xscale, "y": self.yscale, "z": self.zscale}[axisname[0]]
+        return 2*scale*self.size_pt
+
     def vzindex(self, vx, vy, vz):
         return self.projector.zindex(2*self.xscale*(vx - 0.5),
                                      2*self.yscale*(vy - 0.5),
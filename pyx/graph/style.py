@@ -56,10 +56,14 @@ class _style:
        getdefaultprovider should return a proper style to be used.
      - needsdata is a list of variable names the style needs to access in the
        sharedata instance.
+
+    A style might set the class variable batched to a true value and
+    implement the method drawpoints to process the data columnwise.
     """
 
     providesdata = [] # by default, we provide nothing
     needsdata = [] # and do not depend on anything
+    batched = 0 # the style does not implement drawpoints
 
     def columnnames(self, privatedata, sharedata, graph, columnnames, dataaxisnames):
         """Set column information
@@ -103,6 +107,16 @@ class _style:
         keys are the column names."""
         pass
 
+    def drawpoints(self, privatedata, sharedata, graph, columns):
+        """Draw data columnwise
+
+        This method is called instead of drawpoint for a batch of data
+        points, when all styles of a plotitem are batched. The data is
+        available in the dictionary columns, which maps the column names
+        to lists of equal length. The sharedata needs to be provided for
+        all points at once, i.e. as lists."""
+        raise NotImplementedError
+
     def donedrawpoints(self, privatedata, sharedata, graph):
         """Finalize drawing of data
 
@@ -171,7 +185,9 @@ class _keygraphstyle(_style):
 
 class pos(_style):
 
-    providesdata = ["vpos", "vposmissing", "vposavailable", "vposvalid", "poscolumnnames"]
+    providesdata = ["vpos", "vposmissing", "vposavailable", "vposvalid", "poscolumnnames",
+                    "vposlist", "vposavailablelist", "vposvalidlist"]
+    batched = 1
 
     def __init__(self, usenames={}, epsilon=1e-10):
         self.usenames = usenames
@@ -233,6 +249,23 @@ class pos(_style):
                     sharedata.vposvalid = 0
                 sharedata.vpos[index] = v
 
+    def drawpoints(self, privatedata, sharedata, graph, columns):
+        count = len(next(iter(columns.values())))
+        vposcolumns = [[None]*count for i in builtinrange(len(graph.axesnames))]
+        for columnname, index, axis in privatedata.pointpostmplist:
+            vposcolumns[index] = axis.convertlist(columns[columnname])
+        sharedata.vposlist = [list(vpos) for vpos in zip(*vposcolumns)]
+        sharedata.vposavailablelist = vposavailablelist = [1]*count
+        sharedata.vposvalidlist = vposvalidlist = [1]*count
+        vmin = -self.epsilon
+        vmax = 1+self.epsilon
+        for columnname, index, axis in privatedata.pointpostmplist:
+            for i, v in enumerate(vposcolumns[index]):
+                if v is None:
+                    vposavailablelist[i] = vposvalidlist[i] = 0
+                elif v < vmin or v > vmax:
+                    vposvalidlist[i] = 0
+
 
 registerdefaultprovider(pos(), pos.providesdata)
 
@@ -444,6 +477,7 @@ class _styleneedingpointpos(_style):
 class symbol(_styleneedingpointpos):
 
     needsdata = ["vpos", "vposmissing", "vposvalid"]
+    batched = 1
 
     # "inject" the predefinied symbols into the class:
     #
@@ -498,6 +532,13 @@ class symbol(_styleneedingpointpos):
             x_pt, y_pt = graph.vpos_pt(*sharedata.vpos)
             privatedata.symbol(privatedata.symbolcanvas, x_pt, y_pt, privatedata.size_pt, privatedata.symbolattrs)
 
+    def drawpoints(self, privatedata, sharedata, graph, columns):
+        if privatedata.symbolattrs is not None:
+            for vpos, vposvalid in zip(sharedata.vposlist, sharedata.vposvalidlist):
+                if vposvalid:
+                    x_pt, y_pt = graph.vpos_pt(*vpos)
+                    privatedata.symbol(privatedata.symbolcanvas, x_pt, y_pt, privatedata.size_pt, privatedata.symbolattrs)
+
     def donedrawpoints(self, privatedata, sharedata, graph):
         graph.layer("data").insert(privatedata.symbolcanvas)
 
@@ -524,7 +565,7 @@ class _line(_styleneedingpointpos):
         if len(privatedata.linebasepoints) > 1:
             privatedata.path.append(path.moveto_pt(*privatedata.linebasepoints[0]))
             if len(privatedata.linebasepoints) > 2:
-                privatedata.path.append(path.multilineto_pt(privatedata.linebasepoints[1:]))
+                privatedata.path.append(path.multilinetoarray_pt(privatedata.linebasepoints[1:]))
             else:
                 privatedata.path.append(path.lineto_pt(*privatedata.linebasepoints[1]))
         privatedata.linebasepoints = []
@@ -632,6 +673,7 @@ class _line(_styleneedingpointpos):
 class line(_line):
 
     needsdata = ["vpos", "vposmissing", "vposavailable", "vposvalid"]
+    batched = 1
 
     changelinestyle = attr.changelist([style.linestyle.solid,
                                        style.linestyle.dashed,
@@ -656,6 +698,10 @@ class line(_line):
     def drawpoint(self, privatedata, sharedata, graph, point):
         self.addpoint(privatedata, graph.vpos_pt, sharedata.vposavailable, sharedata.vposvalid, sharedata.vpos)
 
+    def drawpoints(self, privatedata, sharedata, graph, columns):
+        for vpos, vposavailable, vposvalid in zip(sharedata.vposlist, sharedata.vposavailablelist, sharedata.vposvalidlist):
+            self.addpoint(privatedata, graph.vpos_pt, vposavailable, vposvalid, vpos)
+
     def donedrawpoints(self, privatedata, sharedata, graph):
         path = self.donepointstopath(privatedata)
         if privatedata.lineattrs is not None and len(path):
@@ -669,6 +715,7 @@ class line(_line):
 class impulses(_styleneedingpointpos):
 
     needsdata = ["vpos", "vposmissing", "vposavailable", "vposvalid", "poscolumnnames"]
+    batched = 1
 
     defaultlineattrs = [line.changelinestyle]
     defaultfrompathattrs = []
@@ -718,6 +765,14 @@ class impulses(_styleneedingpointpos):
             vpos[self.valueaxisindex] = privatedata.vfromvalue
             privatedata.impulsescanvas.stroke(graph.vgeodesic(*(vpos + sharedata.vpos)), privatedata.lineattrs)
 
+    def drawpoints(self, privatedata, sharedata, graph, columns):
+        if privatedata.lineattrs is not None:
+            for vpos, vposvalid in zip(sharedata.vposlist, sharedata.vposvalidlist):
+                if vposvalid:
+                    vfrompos = vpos[:]
+                    vfrompos[self.valueaxisindex] = privatedata.vfromvalue
+                    privatedata.impulsescanvas.stroke(graph.vgeodesic(*(vfrompos + vpos)), privatedata.lineattrs)
+
     def donedrawpoints(self, privatedata, sharedata, graph):
         graph.layer("data").insert(privatedata.impulsescanvas)
 
@@ -36,8 +36,9 @@
 #      node2 *
 
 
-import struct, binascii, zlib, os, tempfile
+import struct, zlib, os, tempfile
 from . import bbox, baseclasses, color, pdfwriter, unit
+from .writer import asciihexstream, deflate
 
 
 class node_pt:
@@ -134,7 +135,7 @@ class mesh(baseclasses.canvasitem):
 >> shfill\n""" % (self.elements[0].nodes[0].value.colorspacestring(),
                   thisbbox.llx_pt, thisbbox.urx_pt, thisbbox.lly_pt, thisbbox.ury_pt,
                   " ".join(["0 1" for value in self.elements[0].nodes[0].value.to8bitbytes()])))
-            file.write_bytes(binascii.b2a_hex(zlib.compress(self.data(thisbbox))))
+            asciihexstream(file, deflate(self.data(thisbbox)))
             file.write(">\n")
 
     def processPDF(self, file, writer, context, registry, bbox):
@@ -21,10 +21,16 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import math, functools
+import bisect, math, functools
 from . import mathutils, trafo, unit
 from . import bbox as bboxmodule
 
+try:
+    import numpy
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
 
 class _marker: pass
 
@@ -34,10 +40,20 @@ class NormpathException(Exception): pass
 # global epsilon (default precision of normsubpaths)
 _epsilon = 1e-5
 
-def set(epsilon=None):
-    global _epsilon
+# evaluate normsubpaths by numpy array operations when available; the
+# array setup does not pay off for a few parameters only, thus the pure
+# python implementation is used below _numpythreshold parameters
+_usenumpy = has_numpy
+_numpythreshold = 16
+
+def set(epsilon=None, usenumpy=None):
+    global _epsilon, _usenumpy
     if epsilon is not None:
         _epsilon = epsilon
+    if usenumpy is not None:
+        if usenumpy and not has_numpy:
+            raise ValueError("numpy is not available")
+        _usenumpy = usenumpy
 
 
 ################################################################################
@@ -714,6 +730,39 @@ class normcurve_pt(normsubpathitem):
         return 6*self.y3_pt-18*self.y2_pt+18*self.y1_pt-6*self.y0_pt
 
 
+def _polygonparam(l1_pt, l2_pt, l3_pt, param):
+    """return the curve parameter of a nearly straight Bezier curve
+
+    The curve is given by the lengths l1_pt, l2_pt, and l3_pt of its control
+    polygon. param is the fraction of the arc length, which is taken to
+    grow along the control polygon.
+    """
+    if 0 <= param <= 1:
+        params = mathutils.realpolyroots(l1_pt-2*l2_pt+l3_pt,
+                                         -3*l1_pt+3*l2_pt,
+                                         3*l1_pt,
+                                         -param*(l1_pt+l2_pt+l3_pt))
+        # we might get several solutions and choose the one closest to 0.5
+        # (we want the solution to be in the range 0 <= param <= 1; in case
+        # we get several solutions in this range, they all will be close to
+        # each other since l1_pt+l2_pt+l3_pt-l0_pt < epsilon)
+        params.sort(key=lambda t: abs(t-0.5))
+        return params[0]
+    else:
+        # when we are outside the proper parameter range, we skip the non-linear
+        # transformation, since it becomes slow and it might even start to be
+        # numerically instable
+        return param
+
+
+def _polygonarclen(l1_pt, l2_pt, l3_pt, t):
+    """return the fraction of the arc length at the curve parameter t
+
+    This is the inverse of _polygonparam within the range 0 <= t <= 1.
+    """
+    return (l1_pt*(3-(3-t)*t)*t + l2_pt*(3-2*t)*t*t + l3_pt*t*t*t) / (l1_pt+l2_pt+l3_pt)
+
+
 # curve replacements used by midpointsplit:
 # The replacements are normline_pt and normcurve_pt instances with an
 # additional subparamtoparam function for proper conversion of the
@@ -738,22 +787,7 @@ class _leftnormline_pt(normline_pt):
             return math.hypot(self.x0_pt-self.x1_pt, self.y0_pt-self.y1_pt)
 
     def subparamtoparam(self, param):
-        if 0 <= param <= 1:
-            params = mathutils.realpolyroots(self.l1_pt-2*self.l2_pt+self.l3_pt,
-                                             -3*self.l1_pt+3*self.l2_pt,
-                                             3*self.l1_pt,
-                                             -param*(self.l1_pt+self.l2_pt+self.l3_pt))
-            # we might get several solutions and choose the one closest to 0.5
-            # (we want the solution to be in the range 0 <= param <= 1; in case
-            # we get several solutions in this range, they all will be close to
-            # each other since l1_pt+l2_pt+l3_pt-l0_pt < epsilon)
-            params.sort(key=lambda t: abs(t-0.5))
-            return 0.5*params[0]
-        else:
-            # when we are outside the proper parameter range, we skip the non-linear
-            # transformation, since it becomes slow and it might even start to be
-            # numerically instable
-            return 0.5*param
+        return 0.5*_polygonparam(self.l1_pt, self.l2_pt, self.l3_pt, param)
 
 
 class _rightnormline_pt(_leftnormline_pt):
@@ -780,6 +814,39 @@ class _rightnormcurve_pt(normcurve_pt):
         return 0.5+0.5*param
 
 
+def _intersectioncandidates(normsubpathitems_a, normsubpathitems_b, epsilon):
+    """return the pairs of indices of possibly intersecting normsubpathitems
+
+    Only normsubpathitems of the two lists whose control boxes overlap within
+    epsilon can intersect. Instead of comparing all pairs, the control boxes
+    are swept in the order of their left borders, keeping the boxes still
+    reaching the current position active. The pairs (index_a, index_b) are
+    returned sorted.
+    """
+    boxes = [[normsubpathitem.cbox() for normsubpathitem in normsubpathitems_a],
+             [normsubpathitem.cbox() for normsubpathitem in normsubpathitems_b]]
+    sweep = sorted([(box.llx_pt, 0, index) for index, box in enumerate(boxes[0])] +
+                   [(box.llx_pt, 1, index) for index, box in enumerate(boxes[1])])
+    active = [], []
+    result = []
+    for llx_pt, ab, index in sweep:
+        box = boxes[ab][index]
+        otherboxes = boxes[1-ab]
+        otheractive = active[1-ab]
+        otheractive[:] = [otherindex for otherindex in otheractive
+                          if otherboxes[otherindex].urx_pt + epsilon >= llx_pt]
+        for otherindex in otheractive:
+            otherbox = otherboxes[otherindex]
+            if otherbox.lly_pt - epsilon <= box.ury_pt and box.lly_pt - epsilon <= otherbox.ury_pt:
+                if ab:
+                    result.append((otherindex, index))
+                else:
+                    result.append((index, otherindex))
+        active[ab].append(index)
+    result.sort()
+    return result
+
+
 ################################################################################
 # normsubpath
 ################################################################################
@@ -805,7 +872,7 @@ class normsubpath:
       to be transformed to normpaths.
     """
 
-    __slots__ = "normsubpathitems", "closed", "epsilon", "skippedline"
+    __slots__ = "normsubpathitems", "closed", "epsilon", "skippedline", "_bezierarray", "_arclentable"
 
     def __init__(self, normsubpathitems=[], closed=0, epsilon=_marker):
         """construct a normsubpath"""
@@ -820,6 +887,10 @@ class normsubpath:
 
         self.normsubpathitems = []
         self.closed = 0
+        # numpy array of control points, see _getbezierarray, and arc
+        # length table, see _getarclentable; reset by _invalidate
+        self._bezierarray = None
+        self._arclentable = None
 
         # a test (might be temporary)
         for anormsubpathitem in normsubpathitems:
@@ -868,11 +939,184 @@ class normsubpath:
             result[index][1].append(param - index)
         return result
 
+    def _getbezierarray(self):
+        """return the control points of all normsubpathitems as a numpy array
+
+        The array has the shape (n, 8) for n normsubpathitems and contains
+        the coordinates x0_pt, y0_pt, ..., x3_pt, y3_pt of each item. Lines
+        are stored as Bezier curves having their inner control points at
+        one and two thirds of the line, which keeps the linear
+        parametrization of the line.
+        """
+        if self._bezierarray is None:
+            controlpoints = []
+            for anormsubpathitem in self.normsubpathitems:
+                if isinstance(anormsubpathitem, normline_pt):
+                    x0_pt, y0_pt = anormsubpathitem.x0_pt, anormsubpathitem.y0_pt
+                    x3_pt, y3_pt = anormsubpathitem.x1_pt, anormsubpathitem.y1_pt
+                    controlpoints.append((x0_pt, y0_pt,
+                                          (2*x0_pt+x3_pt)/3, (2*y0_pt+y3_pt)/3,
+                                          (x0_pt+2*x3_pt)/3, (y0_pt+2*y3_pt)/3,
+                                          x3_pt, y3_pt))
+                else:
+                    controlpoints.append((anormsubpathitem.x0_pt, anormsubpathitem.y0_pt,
+                                          anormsubpathitem.x1_pt, anormsubpathitem.y1_pt,
+                                          anormsubpathitem.x2_pt, anormsubpathitem.y2_pt,
+                                          anormsubpathitem.x3_pt, anormsubpathitem.y3_pt))
+            self._bezierarray = numpy.array(controlpoints, dtype=float).reshape(-1, 8)
+        return self._bezierarray
+
+    def _numpyapplies(self, params):
+        """return whether params should be evaluated by numpy array operations"""
+        return _usenumpy and self.normsubpathitems and len(params) >= _numpythreshold
+
+    def _numpyderivatives(self, params):
+        """return positions and first and second derivatives at params
+
+        The result is a tuple of numpy arrays x_pt, y_pt, xdot_pt, ydot_pt,
+        xddot_pt, yddot_pt. As in _distributeparams, params outside the
+        range of the normsubpath are evaluated on the first and last
+        normsubpathitem, respectively.
+        """
+        bezierarray = self._getbezierarray()
+        params = numpy.asarray(params, dtype=float)
+        indices = numpy.clip(numpy.floor(params), 0, len(bezierarray)-1).astype(int)
+        t = params - indices
+        x0_pt, y0_pt, x1_pt, y1_pt, x2_pt, y2_pt, x3_pt, y3_pt = bezierarray[indices].T
+        ax_pt = -x0_pt+3*x1_pt-3*x2_pt+x3_pt
+        ay_pt = -y0_pt+3*y1_pt-3*y2_pt+y3_pt
+        bx_pt = 3*x0_pt-6*x1_pt+3*x2_pt
+        by_pt = 3*y0_pt-6*y1_pt+3*y2_pt
+        cx_pt = -3*x0_pt+3*x1_pt
+        cy_pt = -3*y0_pt+3*y1_pt
+        return (((ax_pt*t + bx_pt)*t + cx_pt)*t + x0_pt,
+                ((ay_pt*t + by_pt)*t + cy_pt)*t + y0_pt,
+                (3*ax_pt*t + 2*bx_pt)*t + cx_pt,
+                (3*ay_pt*t + 2*by_pt)*t + cy_pt,
+                6*ax_pt*t + 2*bx_pt,
+                6*ay_pt*t + 2*by_pt)
+
+    def _invalidate(self):
+        """reset the data cached for the normsubpathitems"""
+        self._bezierarray = None
+        self._arclentable = None
+
+    def _getarclentable(self):
+        """return the arc length table of the normsubpath
+
+        For the arc length calculation the normsubpathitems are split into
+        straight pieces as in normcurve_pt.arclen_pt. The table is a tuple
+        of sequences starts, dts, l0s_pt, l1s_pt, l2s_pt, l3s_pt, and
+        cumarclens_pt, each containing a value for every piece along the
+        normsubpath. A piece covers the params from starts to starts+dts.
+        l0s_pt is the length of the chord and l1s_pt, l2s_pt, and l3s_pt are
+        the lengths of the legs of the control polygon of the piece.
+        cumarclens_pt is the arc length from the beginning of the
+        normsubpath to the end of the piece. The sequences are numpy arrays
+        when numpy is used and lists otherwise.
+
+        The table is built on first use for the current epsilon and kept
+        until the normsubpath is modified.
+        """
+        key = self.epsilon, _usenumpy
+        if self._arclentable is None or self._arclentable[0] != key:
+            if _usenumpy:
+                table = self._numpyarclentable()
+            else:
+                table = self._pythonarclentable()
+            self._arclentable = key, table
+        return self._arclentable[1]
+
+    def _pythonarclentable(self):
+        """return the arc length table, see _getarclentable"""
+        starts, dts, l0s_pt, l1s_pt, l2s_pt, l3s_pt, cumarclens_pt = table = [], [], [], [], [], [], []
+
+        def addpieces(anormsubpathitem, start, dt, epsilon):
+            if isinstance(anormsubpathitem, normline_pt):
+                if isinstance(anormsubpathitem, _leftnormline_pt):
+                    l1_pt, l2_pt, l3_pt = anormsubpathitem.l1_pt, anormsubpathitem.l2_pt, anormsubpathitem.l3_pt
+                else:
+                    l1_pt = l2_pt = l3_pt = anormsubpathitem.arclen_pt(epsilon) / 3
+                starts.append(start)
+                dts.append(dt)
+                l0s_pt.append(math.hypot(anormsubpathitem.x1_pt-anormsubpathitem.x0_pt,
+                                         anormsubpathitem.y1_pt-anormsubpathitem.y0_pt))
+                l1s_pt.append(l1_pt)
+                l2s_pt.append(l2_pt)
+                l3s_pt.append(l3_pt)
+                cumarclens_pt.append((cumarclens_pt[-1] if cumarclens_pt else 0) + l0s_pt[-1])
+            else:
+                a, b = anormsubpathitem._split(epsilon=epsilon)
+                if isinstance(a, normline_pt):
+                    addpieces(a, start, 0.5*dt, epsilon)
+                else:
+                    addpieces(a, start, 0.5*dt, 0.5*epsilon)
+                if isinstance(b, normline_pt):
+                    addpieces(b, start+0.5*dt, 0.5*dt, epsilon)
+                else:
+                    addpieces(b, start+0.5*dt, 0.5*dt, 0.5*epsilon)
+
+        for index, anormsubpathitem in enumerate(self.normsubpathitems):
+            addpieces(anormsubpathitem, index, 1, self.epsilon)
+        return table
+
+    def _numpyarclentable(self):
+        """return the arc length table for all normsubpathitems at once by numpy"""
+        curves = self._getbezierarray()
+        indices = numpy.arange(len(curves))
+        t0 = numpy.zeros(len(curves))
+        dt = numpy.ones(len(curves))
+        # normcurve_pt.arclen_pt splits before comparing to epsilon
+        epsilons = numpy.full(len(curves), 2.0*self.epsilon)
+        pieces = []
+        level = 0
+        while len(curves):
+            x0_pt, y0_pt, x1_pt, y1_pt, x2_pt, y2_pt, x3_pt, y3_pt = curves.T
+            x01_pt = 0.5*x0_pt + 0.5*x1_pt
+            y01_pt = 0.5*y0_pt + 0.5*y1_pt
+            x12_pt = 0.5*x1_pt + 0.5*x2_pt
+            y12_pt = 0.5*y1_pt + 0.5*y2_pt
+            x23_pt = 0.5*x2_pt + 0.5*x3_pt
+            y23_pt = 0.5*y2_pt + 0.5*y3_pt
+            x01_12_pt = 0.5*x01_pt + 0.5*x12_pt
+            y01_12_pt = 0.5*y01_pt + 0.5*y12_pt
+            x12_23_pt = 0.5*x12_pt + 0.5*x23_pt
+            y12_23_pt = 0.5*y12_pt + 0.5*y23_pt
+            xmidpoint_pt = 0.5*x01_12_pt + 0.5*x12_23_pt
+            ymidpoint_pt = 0.5*y01_12_pt + 0.5*y12_23_pt
+            curves = numpy.concatenate([
+                numpy.column_stack([x0_pt, y0_pt, x01_pt, y01_pt, x01_12_pt, y01_12_pt, xmidpoint_pt, ymidpoint_pt]),
+                numpy.column_stack([xmidpoint_pt, ymidpoint_pt, x12_23_pt, y12_23_pt, x23_pt, y23_pt, x3_pt, y3_pt])])
+            indices = numpy.concatenate([indices, indices])
+            dt = 0.5*dt
+            t0 = numpy.concatenate([t0, t0+dt])
+            dt = numpy.concatenate([dt, dt])
+            epsilons = numpy.concatenate([epsilons, epsilons])*0.5
+
+            x0_pt, y0_pt, x1_pt, y1_pt, x2_pt, y2_pt, x3_pt, y3_pt = curves.T
+            l0_pt = numpy.hypot(x3_pt-x0_pt, y3_pt-y0_pt)
+            l1_pt = numpy.hypot(x1_pt-x0_pt, y1_pt-y0_pt)
+            l2_pt = numpy.hypot(x2_pt-x1_pt, y2_pt-y1_pt)
+            l3_pt = numpy.hypot(x3_pt-x2_pt, y3_pt-y2_pt)
+            level += 1
+            # the level limit just protects against non-finite input
+            done = (l1_pt+l2_pt+l3_pt-l0_pt < epsilons) | (level >= 64)
+            pieces.append((indices[done], t0[done], dt[done], l0_pt[done], l1_pt[done], l2_pt[done], l3_pt[done]))
+            notdone = ~done
+            curves, indices, t0, dt, epsilons = curves[notdone], indices[notdone], t0[notdone], dt[notdone], epsilons[notdone]
+
+        indices, t0, dt, l0_pt, l1_pt, l2_pt, l3_pt = [numpy.concatenate(column) for column in zip(*pieces)]
+        order = numpy.lexsort((t0, indices))
+        l0_pt = l0_pt[order]
+        return ((indices+t0)[order], dt[order], l0_pt, l1_pt[order], l2_pt[order], l3_pt[order],
+                numpy.cumsum(l0_pt))
+
     def append(self, anormsubpathitem):
         """append normsubpathitem
 
         Fails on closed normsubpath.
         """
+        self._invalidate()
         if self.epsilon is None:
             self.normsubpathitems.append(anormsubpathitem)
         else:
@@ -981,26 +1225,47 @@ class normsubpath:
 
         When upper is set, the upper bound is calculated, otherwise the lower
         bound is returned."""
-        return sum([npitem.arclen_pt(self.epsilon, upper=upper) for npitem in self.normsubpathitems])
+        if not self.normsubpathitems:
+            return 0
+        starts, dts, l0s_pt, l1s_pt, l2s_pt, l3s_pt, cumarclens_pt = self._getarclentable()
+        if upper:
+            return float(sum(l1s_pt) + sum(l2s_pt) + sum(l3s_pt))
+        return float(cumarclens_pt[-1])
 
     def _arclentoparam_pt(self, lengths_pt):
         """return a tuple of params and the total length arc length in pts"""
-        # work on a copy which is counted down to negative values
-        lengths_pt = lengths_pt[:]
-        results = [None] * len(lengths_pt)
-
-        totalarclen = 0
-        for normsubpathindex, normsubpathitem in enumerate(self.normsubpathitems):
-            params, arclen = normsubpathitem._arclentoparam_pt(lengths_pt, self.epsilon)
-            for i in range(len(results)):
-                if results[i] is None:
-                    lengths_pt[i] -= arclen
-                    if lengths_pt[i] < 0 or normsubpathindex == len(self.normsubpathitems) - 1:
-                        # overwrite the results until the length has become negative
-                        results[i] = normsubpathindex + params[i]
-            totalarclen += arclen
-
-        return results, totalarclen
+        if not self.normsubpathitems:
+            return [None] * len(lengths_pt), 0
+        starts, dts, l0s_pt, l1s_pt, l2s_pt, l3s_pt, cumarclens_pt = self._getarclentable()
+        if _usenumpy:
+            lengths_pt = numpy.asarray(lengths_pt, dtype=float)
+            pieces = numpy.minimum(numpy.searchsorted(cumarclens_pt, lengths_pt, side="right"), len(cumarclens_pt)-1)
+            l0_pt = l0s_pt[pieces]
+            l1_pt = l1s_pt[pieces]
+            l2_pt = l2s_pt[pieces]
+            l3_pt = l3s_pt[pieces]
+            p = (lengths_pt - cumarclens_pt[pieces] + l0_pt) / l0_pt
+            # This is _polygonparam for arrays: the cubic is monotonic in
+            # the range 0 to 1, where we solve it by Newton iterations.
+            inside = (0 <= p) & (p <= 1)
+            a = l1_pt-2*l2_pt+l3_pt
+            b = -3*l1_pt+3*l2_pt
+            c = 3*l1_pt
+            d = p*(l1_pt+l2_pt+l3_pt)
+            u = p.copy()
+            for i in range(8):
+                f = ((a*u + b)*u + c)*u - d
+                fdot = (3*a*u + 2*b)*u + c
+                u = numpy.where(inside & (fdot > 0), u - f/numpy.where(fdot > 0, fdot, 1), u)
+            u = numpy.where(inside, numpy.clip(u, 0, 1), p)
+            return (starts[pieces] + dts[pieces]*u).tolist(), float(cumarclens_pt[-1])
+        params = []
+        for length_pt in lengths_pt:
+            # binary search of the piece and local refinement within the piece
+            i = min(bisect.bisect_right(cumarclens_pt, length_pt), len(cumarclens_pt)-1)
+            p = (length_pt - cumarclens_pt[i] + l0s_pt[i]) / l0s_pt[i]
+            params.append(starts[i] + dts[i]*_polygonparam(l1s_pt[i], l2s_pt[i], l3s_pt[i], p))
+        return params, cumarclens_pt[-1]
 
     def arclentoparam_pt(self, lengths_pt):
         """return a tuple of params"""
@@ -1010,6 +1275,9 @@ class normsubpath:
         """return coordinates at params in pts"""
         if not self.normsubpathitems and self.skippedline:
             return [self.skippedline.atbegin_pt()]*len(params)
+        if self._numpyapplies(params):
+            x_pt, y_pt = self._numpyderivatives(params)[:2]
+            return list(zip(x_pt.tolist(), y_pt.tolist()))
         result = [None] * len(params)
         for normsubpathitemindex, (indices, params) in list(self._distributeparams(params).items()):
             for index, point_pt in zip(indices, self.normsubpathitems[normsubpathitemindex].at_pt(params)):
@@ -1066,6 +1334,8 @@ class normsubpath:
         result = normsubpath(epsilon=self.epsilon)
         result.normsubpathitems = self.normsubpathitems[:]
         result.closed = self.closed
+        result._bezierarray = self._bezierarray
+        result._arclentable = self._arclentable
 
         # We can share the reference to skippedline, since it is a
         # normsubpathitem as well and thus not modified in place either.
@@ -1075,6 +1345,9 @@ class normsubpath:
 
     def curvature_pt(self, params):
         """return the curvature at params in 1/pts"""
+        if self._numpyapplies(params):
+            x_pt, y_pt, xdot_pt, ydot_pt, xddot_pt, yddot_pt = self._numpyderivatives(params)
+            return ((xdot_pt*yddot_pt - ydot_pt*xddot_pt) / numpy.hypot(xdot_pt, ydot_pt)**3).tolist()
         result = [None] * len(params)
         for normsubpathitemindex, (indices, params) in list(self._distributeparams(params).items()):
             for index, curvature_pt in zip(indices, self.normsubpathitems[normsubpathitemindex].curvature_pt(params)):
@@ -1095,6 +1368,7 @@ class normsubpath:
         remove the skippedline by modifying the end point of the existing normsubpath
         """
         while self.skippedline:
+            self._invalidate()
             try:
                 lastnormsubpathitem = self.normsubpathitems.pop()
             except IndexError:
@@ -1113,12 +1387,12 @@ class normsubpath:
         intersections_b = []
         epsilon = min(self.epsilon, other.epsilon)
         # Intersect all subpaths of self with the subpaths of other, possibly including
-        # one intersection point several times
-        for t_a, pitem_a  in enumerate(self.normsubpathitems):
-            for t_b, pitem_b in enumerate(other.normsubpathitems):
-                for intersection_a, intersection_b in pitem_a.intersect(pitem_b, epsilon):
-                    intersections_a.append(intersection_a + t_a)
-                    intersections_b.append(intersection_b + t_b)
+        # one intersection point several times. Pairs of normsubpathitems with
+        # separated control boxes are skipped.
+        for t_a, t_b in _intersectioncandidates(self.normsubpathitems, other.normsubpathitems, epsilon):
+            for intersection_a, intersection_b in self.normsubpathitems[t_a].intersect(other.normsubpathitems[t_b], epsilon):
+                intersections_a.append(intersection_a + t_a)
+                intersections_b.append(intersection_b + t_b)
 
         # although intersectipns_a are sorted for the different normsubpathitems,
         # within a normsubpathitem, the ordering has to be ensured separately:
@@ -1185,12 +1459,12 @@ class normsubpath:
         # point
         equivalentpoints = list(range(len(intersections_a)))
 
+        closepoints_b = frozenset(closepoints_b)
         for closepoint_a in closepoints_a:
-            for closepoint_b in closepoints_b:
-                if closepoint_a == closepoint_b:
-                    for i in range(closepoint_a[1], len(equivalentpoints)):
-                        if equivalentpoints[i] == closepoint_a[1]:
-                            equivalentpoints[i] = closepoint_a[0]
+            if closepoint_a in closepoints_b:
+                for i in range(closepoint_a[1], len(equivalentpoints)):
+                    if equivalentpoints[i] == closepoint_a[1]:
+                        equivalentpoints[i] = closepoint_a[0]
 
         # determine the remaining intersection points
         intersectionpoints = {}
@@ -1201,14 +1475,10 @@ class normsubpath:
         result = []
         intersectionpointskeys = list(intersectionpoints.keys())
         intersectionpointskeys.sort()
+        intersections_a = dict((index_a, intersection_a) for intersection_a, index_a in intersections_a)
+        intersections_b = dict((index_b, intersection_b) for intersection_b, index_b in intersections_b)
         for point in intersectionpointskeys:
-            for intersection_a, index_a in intersections_a:
-                if index_a == point:
-                    result_a = intersection_a
-            for intersection_b, index_b in intersections_b:
-                if index_b == point:
-                    result_b = intersection_b
-            result.append((result_a, result_b))
+            result.append((intersections_a[point], intersections_b[point]))
         # note that the result is sorted in a, since we sorted
         # intersections_a in the very beginning
 
@@ -1246,19 +1516,28 @@ class normsubpath:
         """return a tuple of arc lengths and the total arc length in pts"""
         if not self.normsubpathitems:
             return [0] * len(params), 0
-        result = [None] * len(params)
-        totalarclen_pt = 0
-        distributeparams = self._distributeparams(params)
-        for normsubpathitemindex in range(len(self.normsubpathitems)):
-            if normsubpathitemindex in distributeparams:
-                indices, params = distributeparams[normsubpathitemindex]
-                arclens_pt, normsubpathitemarclen_pt = self.normsubpathitems[normsubpathitemindex]._paramtoarclen_pt(params, self.epsilon)
-                for index, arclen_pt in zip(indices, arclens_pt):
-                    result[index] = totalarclen_pt + arclen_pt
-                totalarclen_pt += normsubpathitemarclen_pt
+        starts, dts, l0s_pt, l1s_pt, l2s_pt, l3s_pt, cumarclens_pt = self._getarclentable()
+        result = []
+        for param in params:
+            if param < 0:
+                arclens_pt, arclen_pt = self.normsubpathitems[0]._paramtoarclen_pt([param], self.epsilon)
+                result.append(arclens_pt[0])
+            elif param > len(self.normsubpathitems):
+                index = len(self.normsubpathitems) - 1
+                i = bisect.bisect_left(starts, index)
+                arclens_pt, arclen_pt = self.normsubpathitems[index]._paramtoarclen_pt([param-index], self.epsilon)
+                result.append(float(cumarclens_pt[i] - l0s_pt[i]) + arclens_pt[0])
             else:
-                totalarclen_pt += self.normsubpathitems[normsubpathitemindex].arclen_pt(self.epsilon)
-        return result, totalarclen_pt
+                # binary search of the piece and local refinement within the piece
+                i = bisect.bisect_right(starts, param) - 1
+                t = (param - starts[i]) / dts[i]
+                result.append(float(cumarclens_pt[i] - l0s_pt[i] +
+                                    l0s_pt[i]*_polygonarclen(l1s_pt[i], l2s_pt[i], l3s_pt[i], t)))
+        return result, float(cumarclens_pt[-1])
+
+    def paramtoarclen_pt(self, params):
+        """return a tuple of arc lengths in pts"""
+        return self._paramtoarclen_pt(params)[0]
 
     def pathitems(self):
         """return list of pathitems"""
@@ -1290,6 +1569,9 @@ class normsubpath:
 
     def rotation(self, params):
         """return rotations at params"""
+        if self._numpyapplies(params):
+            x_pt, y_pt, xdot_pt, ydot_pt = self._numpyderivatives(params)[:4]
+            return [trafo.rotate(angle) for angle in numpy.degrees(numpy.arctan2(ydot_pt, xdot_pt)).tolist()]
         result = [None] * len(params)
         for normsubpathitemindex, (indices, params) in list(self._distributeparams(params).items()):
             for index, rotation in zip(indices, self.normsubpathitems[normsubpathitemindex].rotation(params)):
@@ -1371,16 +1653,22 @@ class normsubpath:
             if ( ( params[0] == 0 and params[-1] == len(self.normsubpathitems) ) or
                  ( params[-1] == 0 and params[0] == len(self.normsubpathitems) ) ):
                 result[-1].normsubpathitems.extend(result[0].normsubpathitems)
+                result[-1]._invalidate()
                 result = result[-1:] + result[1:-1]
 
         return result
 
     def trafo(self, params):
         """return transformations at params"""
+        if self._numpyapplies(params):
+            x_pt, y_pt, xdot_pt, ydot_pt = self._numpyderivatives(params)[:4]
+            angles = numpy.degrees(numpy.arctan2(ydot_pt, xdot_pt))
+            return [trafo.translate_pt(x, y) * trafo.rotate(angle)
+                    for x, y, angle in zip(x_pt.tolist(), y_pt.tolist(), angles.tolist())]
         result = [None] * len(params)
         for normsubpathitemindex, (indices, params) in list(self._distributeparams(params).items()):
-            for index, trafo in zip(indices, self.normsubpathitems[normsubpathitemindex].trafo(params)):
-                result[index] = trafo
+            for index, atrafo in zip(indices, self.normsubpathitems[normsubpathitemindex].trafo(params)):
+                result[index] = atrafo
         return result
 
     def transformed(self, trafo):
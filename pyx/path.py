@@ -21,7 +21,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import math
+import array, io, itertools, math
 from math import cos, sin, tan, acos, pi, radians, degrees
 from . import trafo, unit
 from .normpath import NormpathException, normpath, normsubpath, normline_pt, normcurve_pt
@@ -1068,6 +1068,130 @@ class multicurveto_pt(pathitem):
         return "".join("C%g %g %g %g %g %g" % point_pt for point_pt in self.points_pt)
 
 
+# number of points written at once by multilinetoarray_pt
+_outputchunk = 1000
+
+def _outputpoints(file, template, coords_pt, inverse_y=False):
+    """write the flat coordinate array coords_pt to file using template for each point"""
+    for i in range(0, len(coords_pt), 2*_outputchunk):
+        chunk = coords_pt[i:i+2*_outputchunk]
+        if inverse_y:
+            chunk = array.array("d", chunk)
+            # subtracting from 0.0 prevents a "-0" output
+            chunk[1::2] = array.array("d", [0.0-y_pt for y_pt in chunk[1::2]])
+        file.write((template * (len(chunk) // 2)) % tuple(chunk))
+
+
+class pdfmultilineto_pt(normline_pt):
+
+    """multiple straight lines in a normpath for PDF output
+
+    This is the counterpart of multilinetoarray_pt in a normpath with
+    epsilon set to None, i.e. a normpath used for output only. It keeps the
+    points in the flat coordinate array coords_pt instead of creating a
+    normline_pt for each line. As a normline_pt it spans from the first to
+    the last point, which is sufficient for normpaths without numerics.
+    """
+
+    __slots__ = "x0_pt", "y0_pt", "x1_pt", "y1_pt", "coords_pt"
+
+    def __init__(self, x0_pt, y0_pt, coords_pt):
+        normline_pt.__init__(self, x0_pt, y0_pt, coords_pt[-2], coords_pt[-1])
+        self.coords_pt = coords_pt
+
+    def __str__(self):
+        return "pdfmultilineto_pt(%g, %g, %s)" % (self.x0_pt, self.y0_pt, multilinetoarray_pt(self.coords_pt))
+
+    def bbox(self):
+        return bboxmodule.bbox_pt(min(self.x0_pt, min(self.coords_pt[0::2])), min(self.y0_pt, min(self.coords_pt[1::2])),
+                                  max(self.x0_pt, max(self.coords_pt[0::2])), max(self.y0_pt, max(self.coords_pt[1::2])))
+
+    cbox = bbox
+
+    def pathitem(self):
+        return multilinetoarray_pt(self.coords_pt)
+
+    def reversed(self):
+        coords_pt = array.array("d", self.coords_pt[-3::-1])
+        coords_pt[0::2], coords_pt[1::2] = coords_pt[1::2], coords_pt[0::2]
+        coords_pt.extend([self.x0_pt, self.y0_pt])
+        return pdfmultilineto_pt(self.x1_pt, self.y1_pt, coords_pt)
+
+    def transformed(self, trafo):
+        coords_pt = array.array("d")
+        for i in range(0, len(self.coords_pt), 2):
+            coords_pt.extend(trafo.apply_pt(self.coords_pt[i], self.coords_pt[i+1]))
+        return pdfmultilineto_pt(*(trafo.apply_pt(self.x0_pt, self.y0_pt) + (coords_pt,)))
+
+    def outputPS(self, file, writer):
+        _outputpoints(file, "%g %g lineto\n", self.coords_pt)
+
+    def outputPDF(self, file, writer):
+        _outputpoints(file, "%f %f l\n", self.coords_pt)
+
+    def returnSVGdata(self, inverse_y):
+        data = io.StringIO()
+        _outputpoints(data, "L%g %g", self.coords_pt, inverse_y)
+        return data.getvalue()
+
+
+class multilinetoarray_pt(pathitem):
+
+    """Perform multiple linetos stored in an array (coordinates in pts)
+
+    The points are kept in the flat array coords_pt of doubles containing
+    x and y coordinates alternately. points_pt can be such an array, a
+    numpy array of shape (n, 2), or a sequence of point tuples as for
+    multilineto_pt. The bbox and the output are created from the array
+    directly; normline_pt instances are only created when a normpath with
+    numerical precision is needed.
+    """
+
+    __slots__ = "coords_pt"
+
+    def __init__(self, points_pt):
+        if isinstance(points_pt, array.array) and points_pt.typecode == "d":
+            self.coords_pt = points_pt
+        elif hasattr(points_pt, "dtype"):
+            self.coords_pt = array.array("d")
+            self.coords_pt.frombytes(points_pt.astype("d", order="C").tobytes())
+        else:
+            self.coords_pt = array.array("d", itertools.chain.from_iterable(points_pt))
+
+    def __str__(self):
+        return "multilinetoarray_pt([%s])" % ", ".join("(%g, %g)" % (self.coords_pt[i], self.coords_pt[i+1])
+                                                       for i in range(0, len(self.coords_pt), 2))
+
+    def updatebbox(self, bbox, context):
+        if self.coords_pt:
+            bbox.includepoint_pt(min(self.coords_pt[0::2]), min(self.coords_pt[1::2]))
+            bbox.includepoint_pt(max(self.coords_pt[0::2]), max(self.coords_pt[1::2]))
+            context.x_pt, context.y_pt = self.coords_pt[-2:]
+
+    def updatenormpath(self, normpath, context):
+        if not self.coords_pt:
+            return
+        if normpath.normsubpaths[-1].epsilon is None:
+            normpath.normsubpaths[-1].append(pdfmultilineto_pt(context.x_pt, context.y_pt, self.coords_pt))
+        else:
+            x0_pt, y0_pt = context.x_pt, context.y_pt
+            for i in range(0, len(self.coords_pt), 2):
+                x1_pt, y1_pt = self.coords_pt[i], self.coords_pt[i+1]
+                normpath.normsubpaths[-1].append(normline_pt(x0_pt, y0_pt, x1_pt, y1_pt))
+                x0_pt, y0_pt = x1_pt, y1_pt
+        context.x_pt, context.y_pt = self.coords_pt[-2:]
+
+    def outputPS(self, file, writer):
+        _outputpoints(file, "%g %g lineto\n", self.coords_pt)
+
+    def returnSVGdata(self, inverse_y, first, context):
+        if self.coords_pt:
+            context.x_pt, context.y_pt = self.coords_pt[-2:]
+        data = io.StringIO()
+        _outputpoints(data, "L%g %g", self.coords_pt, inverse_y)
+        return data.getvalue()
+
+
 ################################################################################
 # path: PS style path
 ################################################################################
@@ -326,6 +326,12 @@ class PDFpattern(pdfwriter.PDFobject):
         self.ystep = ystep
         self.trafo = trafo
         self.patternproc = patternproc
+        self.compressed = None
+
+    def prepare(self, writer):
+        if writer.compress and self.compressed is None:
+            import zlib
+            self.compressed = zlib.compress(self.patternproc, writer.compresslevel)
 
     def write(self, file, writer, registry):
         file.write("<<\n"
@@ -340,8 +346,8 @@ class PDFpattern(pdfwriter.PDFobject):
         file.write("/Resources ")
         self.patternregistry.writeresources(file)
         if writer.compress:
-            import zlib
-            content = zlib.compress(self.patternproc)
+            self.prepare(writer)
+            content = self.compressed
         else:
             content = self.patternproc
 
@@ -21,7 +21,7 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import io, copy, logging, time
+import concurrent.futures, io, copy, logging, time
 logger = logging.getLogger("pyx")
 try:
     import zlib
@@ -63,6 +63,16 @@ class PDFregistry:
             self.add(object)
         registry.merged = self
 
+    def prepare(self, objects, writer):
+        """ prepare objects for writing by writer.compress_workers threads (if not None)
+
+        The expensive parts of writing objects like the compression of streams
+        are done in parallel, while the objects are written in order afterwards."""
+        if writer.compress_workers is not None:
+            with concurrent.futures.ThreadPoolExecutor(writer.compress_workers) as executor:
+                for result in executor.map(lambda object: object.prepare(writer), objects):
+                    pass
+
     def write(self, file, writer, catalog):
         # first we set all refnos
         refno = 1
@@ -70,6 +80,8 @@ class PDFregistry:
             object.refno = refno
             refno += 1
 
+        self.prepare(self.objects, writer)
+
         # second, all objects are written, keeping the positions in the output file
         fileposes = []
         for object in self.objects:
@@ -113,6 +125,91 @@ class PDFregistry:
         file.write(">>\n")
 
 
+class PDFstreamregistry(PDFregistry):
+
+    """registry writing objects to the output file as early as possible
+
+    Objects are written by flush, except for the objects of the types listed
+    in deferredtypes. Those are shared among the pages and might still be
+    altered by later pages (like fonts collecting the glyphs in use) and are
+    thus written at the very end by write. Reference numbers are assigned
+    when first requested, and the written objects are released."""
+
+    deferredtypes = ["catalog", "pages", "info", "form", "pattern",
+                     "font", "fontdescriptor", "fontfile", "encoding"]
+
+    def __init__(self):
+        PDFregistry.__init__(self)
+        self.refno = 0
+        self.fileposes = {}
+
+    def add(self, object):
+        sameobjects = self.types.setdefault(object.type, {})
+        if object.id in sameobjects:
+            sameobjects[object.id].merge(object)
+        else:
+            # reset refnos left over from a previous output of the object
+            object.refno = None
+            self.objects.append(object)
+            sameobjects[object.id] = object
+
+    def getrefno(self, object):
+        # objects written by flush and released from the registry still
+        # carry their refno
+        registered = self.types.get(object.type, {}).get(object.id, object)
+        if registered.refno is None:
+            self.refno += 1
+            registered.refno = self.refno
+        return registered.refno
+
+    def writeobject(self, file, writer, object):
+        refno = self.getrefno(object)
+        self.fileposes[refno] = file.tell()
+        file.write("%i 0 obj\n" % refno)
+        object.write(file, writer, self)
+        file.write("endobj\n")
+
+    def flush(self, file, writer):
+        self.prepare([object for object in self.objects if object.type not in self.deferredtypes], writer)
+        objects = []
+        for object in self.objects:
+            if object.type in self.deferredtypes:
+                objects.append(object)
+            else:
+                self.writeobject(file, writer, object)
+                if object.id == id(object):
+                    # the id might be reused by another object later on
+                    del self.types[object.type][object.id]
+                else:
+                    self.types[object.type][object.id] = PDFreference(object, self.getrefno(object))
+        self.objects = objects
+
+    def write(self, file, writer, catalog):
+        self.prepare(self.objects, writer)
+        for object in self.objects:
+            self.writeobject(file, writer, object)
+        self.objects = []
+
+        # xref
+        xrefpos = file.tell()
+        file.write("xref\n"
+                   "0 %d\n"
+                   "0000000000 65535 f \n" % (self.refno+1))
+        for refno in range(1, self.refno+1):
+            file.write("%010i 00000 n \n" % self.fileposes[refno])
+
+        # trailer
+        file.write("trailer\n"
+                   "<<\n"
+                   "/Size %i\n" % (self.refno+1))
+        file.write("/Root %i 0 R\n" % self.getrefno(catalog))
+        file.write("/Info %i 0 R\n" % self.getrefno(catalog.PDFinfo))
+        file.write(">>\n"
+                   "startxref\n"
+                   "%i\n" % xrefpos)
+        file.write("%%EOF\n")
+
+
 class PDFobject:
 
     def __init__(self, type, _id=None):
@@ -130,10 +227,27 @@ class PDFobject:
     def merge(self, other):
         pass
 
+    def prepare(self, writer):
+        """prepare expensive parts of write in advance
+
+        The method is called before write when the writer has compress_workers
+        set, but in a separate thread. It must not access the registry, as the
+        object numbering would depend on the order of the threads."""
+        pass
+
     def write(self, file, writer, registry):
         raise NotImplementedError("write method has to be provided by PDFobject subclass")
 
 
+class PDFreference(PDFobject):
+
+    """placeholder for an object already written by a PDFstreamregistry"""
+
+    def __init__(self, object, refno):
+        PDFobject.__init__(self, object.type, object.id)
+        self.refno = refno
+
+
 class PDFcatalog(PDFobject):
 
     def __init__(self, document, writer, registry):
@@ -198,8 +312,10 @@ class PDFpages(PDFobject):
     def __init__(self, document, writer, registry):
         PDFobject.__init__(self, "pages")
         self.PDFpagelist = []
-        for pageno, page in enumerate(document.pages):
-            page = PDFpage(page, pageno, self, writer, registry)
+        if writer.streaming:
+            # the pages are processed and written one by one by the PDFwriter
+            return
+        for page in writer.processpages(document, self, registry):
             registry.add(page)
             self.PDFpagelist.append(page)
 
@@ -237,6 +353,23 @@ class PDFpage(PDFobject):
         self.pageregistry.add(self.PDFcontent)
         registry.mergeregistry(self.pageregistry)
 
+    def detach(self):
+        """prepare a page processed in a worker process to be pickled"""
+        self.page = self.PDFpages = self.pageregistry.merged = None
+        # the ids of the objects are not unique in the processes receiving them
+        for object in self.pageregistry.objects:
+            if object.id == id(object):
+                object.id = None
+
+    def attach(self, page, PDFpages, registry):
+        """inverse of detach, merging the page resources into registry"""
+        self.page = page
+        self.PDFpages = PDFpages
+        for object in self.pageregistry.objects:
+            if object.id is None:
+                object.id = id(object)
+        registry.mergeregistry(self.pageregistry)
+
     def write(self, file, writer, registry):
         file.write("<<\n"
                    "/Type /Page\n"
@@ -261,25 +394,33 @@ class PDFpage(PDFobject):
 class PDFcontent(PDFobject):
 
     def __init__(self, page, awriter, registry):
-        PDFobject.__init__(self, registry, "content")
+        PDFobject.__init__(self, "content")
         contentfile = writer.writer(io.BytesIO())
         self.bbox = bbox.empty()
         acontext = context()
         page.processPDF(contentfile, awriter, acontext, registry, self.bbox)
         self.content = contentfile.file.getvalue()
+        self.compressed = None
+
+    def prepare(self, awriter):
+        if awriter.compress and self.compressed is None:
+            # keep the compressed chunks instead of joining them into another copy
+            self.compressed = list(writer.deflate(self.content, awriter.compresslevel))
 
     def write(self, file, awriter, registry):
         if awriter.compress:
-            content = zlib.compress(self.content)
+            self.prepare(awriter)
+            content = self.compressed
         else:
-            content = self.content
+            content = [self.content]
         file.write("<<\n"
-                   "/Length %i\n" % len(content))
+                   "/Length %i\n" % sum(map(len, content)))
         if awriter.compress:
             file.write("/Filter /FlateDecode\n")
         file.write(">>\n"
                    "stream\n")
-        file.write_bytes(content)
+        for chunk in content:
+            file.write_bytes(chunk)
         file.write("endstream\n")
 
 
@@ -288,7 +429,8 @@ class PDFwriter:
     def __init__(self, document, file,
                        title=None, author=None, subject=None, keywords=None,
                        fullscreen=False, writebbox=False, compress=True, compresslevel=6,
-                       strip_fonts=True, text_as_path=False, mesh_as_bitmap=False, mesh_as_bitmap_resolution=300):
+                       strip_fonts=True, text_as_path=False, mesh_as_bitmap=False, mesh_as_bitmap_resolution=300,
+                       streaming=False, workers=None, compress_workers=None):
         self._fontmap = None
 
         self.title = title
@@ -306,20 +448,58 @@ class PDFwriter:
         self.text_as_path = text_as_path
         self.mesh_as_bitmap = mesh_as_bitmap
         self.mesh_as_bitmap_resolution = mesh_as_bitmap_resolution
+        self.streaming = streaming
+        self.workers = workers
+        self.compress_workers = compress_workers
 
         # dictionary mapping font names to dictionaries mapping encoding names to encodings
         # encodings themselves are mappings from glyphnames to codepoints
         self.encodings = {}
 
-        # the PDFcatalog class automatically builds up the pdfobjects from a document
-        registry = PDFregistry()
-        catalog = PDFcatalog(document, self, registry)
-        registry.add(catalog)
-
         file = writer.writer(file)
         file.write_bytes(b"%PDF-1.4\n%\xc3\xb6\xc3\xa9\n")
+
+        if streaming:
+            # write every page as soon as it has been processed, such that
+            # neither the pages nor their content are kept in memory
+            registry = PDFstreamregistry()
+            catalog = PDFcatalog(document, self, registry)
+            registry.add(catalog)
+            for pdfpage in self.processpages(document, catalog.PDFpages, registry):
+                registry.flush(file, self)
+                catalog.PDFpages.PDFpagelist.append(PDFreference(pdfpage, registry.getrefno(pdfpage)))
+        else:
+            # the PDFcatalog class automatically builds up the pdfobjects from a document
+            registry = PDFregistry()
+            catalog = PDFcatalog(document, self, registry)
+            registry.add(catalog)
         registry.write(file, self, catalog)
 
+    def processpages(self, document, PDFpages, registry):
+        """yield a PDFpage for each page of document
+
+        The page content is calculated by self.workers worker processes
+        if not None."""
+        for pageno, page, pdfpage in writer.parallelpages(document.pages, self.processpage, self.workers):
+            if pdfpage is None:
+                pdfpage = PDFpage(page, pageno, PDFpages, self, registry)
+            else:
+                pdfpage.attach(page, PDFpages, registry)
+            yield pdfpage
+
+    def processpage(self, pageno, page):
+        # called in a worker process
+        self.encodings = {}
+        registry = PDFregistry()
+        registry.add(PDFform(self, registry))
+        pdfpage = PDFpage(page, pageno, None, self, registry)
+        if self.encodings:
+            # the content depends on the encodings of the preceding pages,
+            # which are not available here
+            return None
+        pdfpage.detach()
+        return pdfpage
+
     def getfontmap(self):
         if self._fontmap is None:
             # late import due to cyclic dependency
@@ -350,7 +530,8 @@ class PDFannotations(PDFobject):
 class PDFform(PDFobject):
 
     def __init__(self, writer, registry):
-        PDFobject.__init__(self, "form")
+        # there is a single form per document
+        PDFobject.__init__(self, "form", "form")
         self.fields = []
 
     def merge(self, other):
@@ -43,7 +43,7 @@ class PSregistry:
            self.resourceslist.append(resource)
 
     def mergeregistry(self, registry):
-        for resource in registry.resources:
+        for resource in registry.resourceslist:
             self.add(resource)
 
     def output(self, file, writer):
@@ -161,9 +161,13 @@ class EPSwriter(_PSwriter):
 
 class PSwriter(_PSwriter):
 
-    def __init__(self, document, file, writebbox=False, **kwargs):
+    def __init__(self, document, file, writebbox=False, workers=None, **kwargs):
         _PSwriter.__init__(self, **kwargs)
         file = writer.writer(file)
+        if workers is not None:
+            pages = list(document.pages)
+        else:
+            pages = document.pages
 
         # We first have to process the content of the pages, writing them into the stream pagesfile
         # Doing so, we fill the registry and also calculate the page bounding boxes, which are
@@ -174,12 +178,16 @@ class PSwriter(_PSwriter):
         # calculated bounding boxes of the whole document
         documentbbox = bbox.empty()
 
-        for nr, page in enumerate(document.pages):
+        for nr, page, result in writer.parallelpages(pages, self.processpage, workers):
             # process contents of page
-            pagefile = writer.writer(io.BytesIO())
-            acontext = context()
-            pagebbox = bbox.empty()
-            page.processPS(pagefile, self, acontext, registry, pagebbox)
+            if result is None:
+                pagefile = writer.writer(io.BytesIO())
+                acontext = context()
+                pagebbox = bbox.empty()
+                page.processPS(pagefile, self, acontext, registry, pagebbox)
+            else:
+                pagefile, pageregistry, pagebbox = result
+                registry.mergeregistry(pageregistry)
 
             documentbbox += pagebbox
 
@@ -208,7 +216,7 @@ class PSwriter(_PSwriter):
 
         # required paper formats
         paperformats = {}
-        for page in document.pages:
+        for page in pages:
             if page.paperformat:
                 paperformats[page.paperformat] = page.paperformat
 
@@ -225,7 +233,7 @@ class PSwriter(_PSwriter):
 
         # file.write(%%DocumentNeededResources: ") # register not downloaded fonts here
 
-        file.write("%%%%Pages: %d\n" % len(document.pages))
+        file.write("%%%%Pages: %d\n" % len(pages))
         file.write("%%PageOrder: Ascend\n")
         file.write("%%EndComments\n")
 
@@ -247,6 +255,19 @@ class PSwriter(_PSwriter):
         file.write("%%Trailer\n")
         file.write("%%EOF\n")
 
+    def processpage(self, pageno, page):
+        # called in a worker process
+        self.encodings = {}
+        pagefile = writer.writer(io.BytesIO())
+        registry = PSregistry()
+        pagebbox = bbox.empty()
+        page.processPS(pagefile, self, context(), registry, pagebbox)
+        if self.encodings:
+            # the content depends on the encodings of the preceding pages,
+            # which are not available here
+            return None
+        return pagefile, registry, pagebbox
+
 
 class context:
 
@@ -21,7 +21,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
 
-import io, struct
+import io, mmap, os, struct
 
 
 class reader:
@@ -95,6 +95,160 @@ class bytesreader(reader):
         self.file = io.BytesIO(b)
 
 
+_int_structs = {(1, 0): struct.Struct("B"), (1, 1): struct.Struct("b"),
+                (2, 0): struct.Struct(">H"), (2, 1): struct.Struct(">h"),
+                (4, 0): struct.Struct(">L"), (4, 1): struct.Struct(">l")}
+_uint32 = _int_structs[4, 0]
+_int32 = _int_structs[4, 1]
+_uint16 = _int_structs[2, 0]
+_int16 = _int_structs[2, 1]
+_char = _int_structs[1, 1]
+
+
+class bufferreader(reader):
+
+    """reader operating directly on a buffer
+
+    The data is accessed in place by struct.unpack_from without copying
+    it into intermediate strings. Like for the file based reader, reading
+    beyond the end of the data raises a struct.error."""
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self.pos = 0
+
+    def _need(self, bytes):
+        """make sure bytes are available at the current position"""
+        if self.pos + bytes > self.size:
+            raise struct.error("unexpected end of data")
+
+    def _unpack(self, s):
+        try:
+            result, = s.unpack_from(self.data, self.pos)
+        except struct.error:
+            self._need(s.size)
+            result, = s.unpack_from(self.data, self.pos)
+        self.pos += s.size
+        return result
+
+    def update(self):
+        """update the data when it might have grown"""
+        pass
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def eof(self):
+        return self.pos >= self.size
+
+    def read(self, bytes):
+        self._need(bytes)
+        result = self.data[self.pos:self.pos+bytes]
+        self.pos += bytes
+        return result
+
+    def readint(self, bytes=4, signed=0):
+        if bytes == 3:
+            self._need(3)
+            result = int.from_bytes(self.data[self.pos:self.pos+3], "big", signed=signed)
+            self.pos += 3
+            return result
+        return self._unpack(_int_structs[bytes, signed and 1 or 0])
+
+    def readint32(self):
+        return self._unpack(_int32)
+
+    def readuint32(self):
+        return self._unpack(_uint32)
+
+    def readint24(self):
+        return self.readint(3, 1)
+
+    def readuint24(self):
+        return self.readint(3, 0)
+
+    def readint16(self):
+        return self._unpack(_int16)
+
+    def readuint16(self):
+        return self._unpack(_uint16)
+
+    def readchar(self):
+        return self._unpack(_char)
+
+    def readuchar(self):
+        try:
+            result = self.data[self.pos]
+        except IndexError:
+            self._need(1)
+            result = self.data[self.pos]
+        self.pos += 1
+        return result
+
+    def readstring(self, bytes):
+        l = self.readuchar()
+        assert l <= bytes-1, "inconsistency in file: string too long"
+        return self.read(bytes-1)[:l]
+
+    def close(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class mmapreader(bufferreader):
+
+    """reader operating on a memory mapped file
+
+    The file may grow while it is being read (like a dvi file written by
+    TeX running in parallel). The mapping is renewed when the data read
+    exceeds the currently mapped size."""
+
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.pos = 0
+        self._map()
+
+    def _map(self):
+        size = os.fstat(self.file.fileno()).st_size
+        if size:
+            try:
+                self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError):
+                # mmap is not available for this file, read it into memory instead
+                self.file.seek(0)
+                self.data = self.file.read()
+        else:
+            self.data = b""
+        self.size = len(self.data)
+
+    def update(self):
+        if os.fstat(self.file.fileno()).st_size > self.size:
+            self._unmap()
+            self._map()
+
+    def _need(self, bytes):
+        if self.pos + bytes > self.size:
+            self.update()
+            if self.pos + bytes > self.size:
+                raise struct.error("unexpected end of data")
+
+    def _unmap(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        self.size = 0
+
+    def close(self):
+        self._unmap()
+        self.file.close()
+
+
 class PStokenizer:
     """cursor to read a string token by token"""
 
@@ -18,8 +18,8 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
-import atexit, errno, functools, glob, inspect, io, itertools, logging, os
-import queue, re, shutil, sys, tempfile, textwrap, threading
+import atexit, collections, concurrent.futures, errno, functools, glob, hashlib, inspect, io, itertools, logging, os
+import pickle, queue, re, shutil, sys, tempfile, textwrap, threading, weakref
 
 from pyx import config, unit, box, baseclasses, trafo, version, attr, style, path, canvas
 from pyx import bbox as bboxmodule
@@ -834,10 +834,12 @@ class textextbox_pt(textbox_pt):
         self.height = height_pt*unit.x_pt   #: height of the text (PyX length)
         self.depth = depth_pt*unit.x_pt     #: height of the text (PyX length)
 
+        self.extents_pt = left_pt, right_pt, height_pt, depth_pt
         self.do_finish = do_finish
         self.fontmap = fontmap
         self.singlecharmode = singlecharmode
         self.fillstyles = fillstyles
+        self.cachestore = None
 
         self.texttrafo = trafo.scale(unit.scale["x"]).translated_pt(x_pt, y_pt)
         box.rect_pt.__init__(self, x_pt - left_pt*unit.scale["x"], y_pt - depth_pt*unit.scale["x"],
@@ -858,6 +860,21 @@ class textextbox_pt(textbox_pt):
     def readdvipage(self, dvifile, page):
         self._dvicanvas = dvifile.readpage([ord("P"), ord("y"), ord("X"), page, 0, 0, 0, 0, 0, 0],
                                            fontmap=self.fontmap, singlecharmode=self.singlecharmode, attrs=[self.texttrafo] + self.fillstyles)
+        if self.cachestore is not None:
+            self.cachestore(self.extents_pt, self._dvicanvas.items, self._dvicanvas.markers)
+
+    def setdvipage(self, items, markers):
+        """Set the page content as if it had been read by :meth:`readdvipage`.
+
+        :param items: canvas items of the dvi page
+        :type items: list of :class:`baseclasses.canvasitem`
+        :param dict markers: marker positions of the dvi page
+
+        """
+        self._dvicanvas = canvas.canvas([self.texttrafo] + self.fillstyles)
+        self._dvicanvas.markers = markers
+        for item in items:
+            self._dvicanvas.insert(item)
 
     @property
     def dvicanvas(self):
@@ -907,6 +924,82 @@ class textextbox_pt(textbox_pt):
         bbox += box.rect.bbox(self)
 
 
+class lazytextbox_pt(textbox_pt):
+
+    def __init__(self, runner, text, texmessages, fontmap, singlecharmode):
+        """Text output typeset on demand.
+
+        Instances of this class are returned by :class:`MultiRunner` instances
+        in lazy mode. The text is typeset, when the text output is accessed in
+        any way, i.e. for its extent, the bbox, markers, or the output
+        generation. The instance then turns into the text output itself.
+
+        .. :param runner: the runner to typeset the text
+        .. :type runner: :class:`MultiRunner`
+        .. :param tuple text: x and y position in pts, text, and textattrs
+        .. :param texmessages: additional message parsers
+        .. :type texmessages: list of :class:`texmessage` parsers
+        .. :param fontmap: force a fontmap to be used
+        .. :type fontmap: None or fontmap
+        .. :param bool singlecharmode: position each character separately
+
+        """
+        self.lazyrunner = runner
+        self.lazytext = text
+        self.lazyoptions = texmessages, fontmap, singlecharmode
+        self.lazycollect = None
+
+    def force(self):
+        """Typeset the text.
+
+        The instance becomes the text output created by the runner by sharing
+        its class and state.
+
+        """
+        if self.__class__ is not lazytextbox_pt:
+            return
+        if self.lazycollect is None:
+            self.lazyrunner.submitlazy()
+        collector, i = self.lazycollect
+        box = collector()[i]
+        self.__dict__ = box.__dict__
+        self.__class__ = box.__class__
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name.startswith("lazy"):
+            raise AttributeError(name)
+        lazytextbox_pt.force(self)
+        return getattr(self, name)
+
+    def transform(self, *args, **kwargs):
+        lazytextbox_pt.force(self)
+        return self.transform(*args, **kwargs)
+
+    def bbox(self):
+        lazytextbox_pt.force(self)
+        return self.bbox()
+
+    def marker(self, name):
+        lazytextbox_pt.force(self)
+        return self.marker(name)
+
+    def textpath(self):
+        lazytextbox_pt.force(self)
+        return self.textpath()
+
+    def processPS(self, file, writer, context, registry, bbox):
+        lazytextbox_pt.force(self)
+        return self.processPS(file, writer, context, registry, bbox)
+
+    def processPDF(self, file, writer, context, registry, bbox):
+        lazytextbox_pt.force(self)
+        return self.processPDF(file, writer, context, registry, bbox)
+
+    def processSVG(self, xml, writer, context, registry, bbox):
+        lazytextbox_pt.force(self)
+        return self.processSVG(xml, writer, context, registry, bbox)
+
+
 class _marker:
     pass
 
@@ -945,6 +1038,55 @@ class TexDoneError(Exception):
     pass
 
 
+def apply_textattrs(expr, textattrs):
+    """Split textattrs and apply the TeX related ones to an expression.
+
+    :param expr: text to be typeset
+    :type expr: str or :class:`MultiEngineText`
+    :param textattrs: styles and attributes to be applied to the text
+    :type textattrs: list of  :class:`textattr, :class:`trafo.trafo_pt`,
+        and :class:`style.fillstyle`
+    :returns: the expression to be passed to TeX, the trafos and the
+        fillstyles
+    :rtype: tuple of str, list of :class:`trafo.trafo_pt` and list of
+        :class:`style.fillstyle`
+
+    """
+    textattrs = attr.mergeattrs(textattrs) # perform cleans
+    attr.checkattrs(textattrs, [textattr, trafo.trafo_pt, style.fillstyle])
+    trafos = attr.getattrs(textattrs, [trafo.trafo_pt])
+    fillstyles = attr.getattrs(textattrs, [style.fillstyle])
+    textattrs = attr.getattrs(textattrs, [textattr])
+    if isinstance(expr, MultiEngineText):
+        expr = expr.tex
+    for ta in textattrs[::-1]:
+        expr = ta.apply(expr)
+    return expr, trafos, fillstyles
+
+
+# SingleRunner instances having started a TeX interpreter and MultiRunner
+# instances in lazy mode, to be finished by finishrunners
+_startedrunners = weakref.WeakSet()
+_lazyrunners = weakref.WeakSet()
+
+def finishrunners():
+    """Finish all running TeX interpreters.
+
+    The pending texts of lazy text boxes are passed to the TeX interpreters
+    and all TeX interpreters are finished afterwards, which makes the dvi
+    pages of all text boxes available. This is needed prior to forking the
+    process, as the forked process cannot communicate with the TeX
+    interpreters of the parent. A :class:`MultiRunner` restarts its TeX
+    interpreter when it is used again.
+
+    """
+    for runner in list(_lazyrunners):
+        runner.submitlazy()
+    for runner in list(_startedrunners):
+        if runner.state < STATE_DONE:
+            runner.do_finish()
+
+
 class SingleRunner:
 
     #: default :class:`texmessage` parsers at interpreter startup
@@ -1022,6 +1164,7 @@ class SingleRunner:
 
         self.needdvitextboxes = [] # when texipc-mode off
         self.dvifile = None
+        self.collector = None # pending submit_text_pt_many call
 
     def _cleanup(self):
         """Clean-up TeX interpreter and tmp directory.
@@ -1071,6 +1214,7 @@ class SingleRunner:
             expression execution
 
         """
+        self.collect()
         assert STATE_PREAMBLE <= oldstate <= STATE_TYPESET
         assert oldstate == self.state
         assert newstate >= oldstate
@@ -1097,31 +1241,110 @@ class SingleRunner:
             wait_ok = self.texoutput.done()
         else:
             wait_ok = self.texoutput.wait()
+        return self._checkoutput(expr, self.texoutput.read(), wait_ok, texmessages, oldstate, newstate, self.executeid, self.page)
+
+    def _submit_many(self, exprs):
+        """Pass several TeX expressions to be typeset at once.
+
+        :param exprs: expressions to be typeset
+        :type exprs: list of str
+        :returns: execute id and page number prior to the submission to be
+            passed to :meth:`_collect_many`
+        :rtype: tuple of two ints
+
+        All expressions are written to the TeX interpreter at once without
+        waiting for the output, which needs to be analysed by
+        :meth:`_collect_many` before the interpreter can be used again.
+
+        """
+        assert self.state == STATE_TYPESET
+        for expr in exprs:
+            expr.encode(self.texenc)
+        executeid, page = self.executeid, self.page
+        batch = []
+        for expr in exprs:
+            self.page += 1
+            self.executeid += 1
+            batch.append("\\ProcessPyXBox{%s%%\n}{%i}%%\n\\PyXInput{%i}%%\n" % (expr, self.page, self.executeid))
+        self.texoutput.expect("PyXInputMarker:executeid=%i:" % self.executeid)
+        self.texinput.write("".join(batch))
+        self.texinput.flush()
+        return executeid, page
+
+    def _collect_many(self, exprs, texmessages, executeid, page):
+        """Analyse the output of TeX expressions passed by :meth:`_submit_many`.
+
+        :param exprs: expressions being typeset
+        :type exprs: list of str
+        :param texmessages: message parsers to analyse the textual output of
+            TeX for each of the expressions
+        :type texmessages: list of :class:`texmessage` parsers
+        :param int executeid: execute id as returned by :meth:`_submit_many`
+        :param int page: page number as returned by :meth:`_submit_many`
+        :returns: extents of the typeset boxes
+        :rtype: list of lists of four floats
+
+        Only the output of the last expression is awaited. Afterwards the output
+        is split at the input markers and analysed for each expression as in
+        :meth:`_execute`.
+
+        """
+        wait_ok = self.texoutput.wait()
+        output = self.texoutput.read()
+        extents_pt = []
+        for expr in exprs:
+            executeid += 1
+            page += 1
+            marker = "PyXInputMarker:executeid=%i:" % executeid
+            unparsed, found, output = output.partition(marker)
+            extents_pt.append(self._checkoutput(expr, unparsed + found, wait_ok, texmessages, STATE_TYPESET, STATE_TYPESET, executeid, page))
+        return extents_pt
+
+    def _checkoutput(self, expr, unparsed, wait_ok, texmessages, oldstate, newstate, executeid, page):
+        """Analyse the output of a TeX expression.
+
+        :param str expr: expression passed to TeX
+        :param str unparsed: output of TeX
+        :param bool wait_ok: TeX responded within the timeout period
+        :param texmessages: message parsers to analyse the textual output of
+            TeX
+        :type texmessages: list of :class:`texmessage` parsers
+        :param int oldstate: state of the TeX interpreter prior to the
+            expression execution
+        :param int newstate: state of the TeX interpreter after to the
+            expression execution
+        :param int executeid: execute id of the expression
+        :param int page: page number of the expression (when typeset) or the
+            total number of pages (when finished)
+        :returns: the extent of the box when typeset
+        :rtype: list of four floats or None
+
+        """
         try:
-            parsed = unparsed = self.texoutput.read()
+            parsed = unparsed
             if not wait_ok:
                 raise TexResultError("TeX didn't respond as expected within the timeout period.")
             if newstate != STATE_DONE:
-                parsed, m = remove_string("PyXInputMarker:executeid=%s:" % self.executeid, parsed)
+                parsed, m = remove_string("PyXInputMarker:executeid=%s:" % executeid, parsed)
                 if not m:
                     raise TexResultError("PyXInputMarker expected")
                 if oldstate == newstate == STATE_TYPESET:
                     parsed, m = remove_pattern(PyXBoxPattern, parsed, ignore_nl=False)
                     if not m:
                         raise TexResultError("PyXBox expected")
-                    if m.group("page") != str(self.page):
+                    if m.group("page") != str(page):
                         raise TexResultError("Wrong page number in PyXBox")
                     extent_pt = [float(x)*72/72.27 for x in m.group("lt", "rt", "ht", "dp")]
-                    parsed, m = remove_string("[80.121.88.%s]" % self.page, parsed)
+                    parsed, m = remove_string("[80.121.88.%s]" % page, parsed)
                     if not m:
                         raise TexResultError("PyXPageOutMarker expected")
             else:
                 # check for "Output written on ...dvi (1 page, 220 bytes)."
-                if self.page:
+                if page:
                     parsed, m = remove_pattern(dvi_pattern, parsed)
                     if not m:
                         raise TexResultError("TeX dvifile messages expected")
-                    if m.group("page") != str(self.page):
+                    if m.group("page") != str(page):
                         raise TexResultError("wrong number of pages reported")
                 else:
                     parsed, m = remove_string("No pages of output.", parsed)
@@ -1150,6 +1373,7 @@ class SingleRunner:
         """Setup environment and start TeX interpreter."""
         assert self.state == STATE_START
         self.state = STATE_PREAMBLE
+        _startedrunners.add(self)
 
         chroot = config.get("text", "chroot", "")
         if chroot:
@@ -1223,6 +1447,14 @@ class SingleRunner:
             self.go_typeset()
         return self._execute(expr, texmessages, STATE_TYPESET, STATE_TYPESET)
 
+    def do_submit_many(self, exprs):
+        """Ensure typeset mode and submit exprs to be typeset."""
+        if self.state < STATE_PREAMBLE:
+            self.do_start()
+        if self.state < STATE_TYPESET:
+            self.go_typeset()
+        return self._submit_many(exprs)
+
     def do_finish(self, cleanup=True):
         """Teardown TeX interpreter and cleanup environment.
 
@@ -1291,26 +1523,93 @@ class SingleRunner:
         """
         if self.state == STATE_DONE:
             raise TexDoneError("typesetting process was terminated already")
-        textattrs = attr.mergeattrs(textattrs) # perform cleans
-        attr.checkattrs(textattrs, [textattr, trafo.trafo_pt, style.fillstyle])
-        trafos = attr.getattrs(textattrs, [trafo.trafo_pt])
-        fillstyles = attr.getattrs(textattrs, [style.fillstyle])
-        textattrs = attr.getattrs(textattrs, [textattr])
-        if isinstance(expr, MultiEngineText):
-            expr = expr.tex
-        for ta in textattrs[::-1]:
-            expr = ta.apply(expr)
+        expr, trafos, fillstyles = apply_textattrs(expr, textattrs)
         first = self.state < STATE_TYPESET
-        left_pt, right_pt, height_pt, depth_pt = self.do_typeset(expr, self.texmessages_run_default + self.texmessages_run + texmessages)
+        extent_pt = self.do_typeset(expr, self.texmessages_run_default + self.texmessages_run + texmessages)
         if self.texipc and first:
             self.dvifile = dvifile.DVIfile(os.path.join(self.tmpdir, "texput.dvi"), debug=self.dvitype)
+        return self._textbox(x_pt, y_pt, extent_pt, trafos, fontmap, singlecharmode, fillstyles, self.page)
+
+    def text_pt_many(self, texts, texmessages=[], fontmap=None, singlecharmode=False):
+        """Typeset several texts at once.
+
+        :param texts: texts to be typeset
+        :type texts: list of tuples of x and y position in pts, text, and
+            textattrs (see :meth:`text_pt` for details)
+        :param texmessages: additional message parsers
+        :type texmessages: list of :class:`texmessage` parsers
+        :param fontmap: force a fontmap to be used (instead of the default
+            depending on the output format)
+        :type fontmap: None or fontmap
+        :param bool singlecharmode: position each character separately
+        :returns: text outputs insertable into a canvas.
+        :rtype: list of :class:`textextbox_pt`
+        :raises: :exc:`TexDoneError`: when the TeX interpreter has been
+            terminated already.
+
+        The result is the same as calling :meth:`text_pt` for each of the
+        texts, but all texts are passed to the TeX interpreter at once and
+        thus only a single round trip to the TeX interpreter is needed.
+
+        """
+        return self.submit_text_pt_many(texts, texmessages, fontmap, singlecharmode)()
+
+    def submit_text_pt_many(self, texts, texmessages=[], fontmap=None, singlecharmode=False):
+        """Pass several texts to the TeX interpreter without waiting for the result.
+
+        The parameters are the same as for :meth:`text_pt_many`, but instead of
+        the text outputs a function is returned, which waits for the TeX
+        interpreter to finish typesetting and returns the text outputs then.
+        Meanwhile the TeX interpreter works in parallel to the Python code. Only
+        one submission can be pending at a time: It is finished automatically
+        before the TeX interpreter is used again.
+
+        :returns: function returning the text outputs
+        :rtype: function returning a list of :class:`textextbox_pt`
+
+        """
+        if self.state == STATE_DONE:
+            raise TexDoneError("typesetting process was terminated already")
+        self.collect()
+        if not texts:
+            return lambda: []
+        texts = [(x_pt, y_pt) + apply_textattrs(expr, textattrs) for x_pt, y_pt, expr, textattrs in texts]
+        exprs = [expr for x_pt, y_pt, expr, trafos, fillstyles in texts]
+        texmessages = self.texmessages_run_default + self.texmessages_run + texmessages
+        first = self.state < STATE_TYPESET
+        executeid, page = self.do_submit_many(exprs)
+        boxes = []
+
+        def collector():
+            if self.collector is collector:
+                self.collector = None
+                extents_pt = self._collect_many(exprs, texmessages, executeid, page)
+                if self.texipc and first:
+                    self.dvifile = dvifile.DVIfile(os.path.join(self.tmpdir, "texput.dvi"), debug=self.dvitype)
+                for i, ((x_pt, y_pt, expr, trafos, fillstyles), extent_pt) in enumerate(zip(texts, extents_pt)):
+                    boxes.append(self._textbox(x_pt, y_pt, extent_pt, trafos, fontmap, singlecharmode, fillstyles, page+i+1))
+            elif len(boxes) != len(texts):
+                raise TexResultError("typesetting of the submitted texts failed")
+            return boxes
+
+        self.collector = collector
+        return collector
+
+    def collect(self):
+        """Finish the pending :meth:`submit_text_pt_many` call (if any)."""
+        if self.collector is not None:
+            self.collector()
+
+    def _textbox(self, x_pt, y_pt, extent_pt, trafos, fontmap, singlecharmode, fillstyles, page):
+        """Create the text output for a typeset page."""
+        left_pt, right_pt, height_pt, depth_pt = extent_pt
         box = textextbox_pt(x_pt, y_pt, left_pt, right_pt, height_pt, depth_pt, self.do_finish, fontmap, singlecharmode, fillstyles)
         for t in trafos:
             box.reltransform(t) # TODO: should trafos really use reltransform???
                                 #       this is quite different from what we do elsewhere!!!
                                 #       see https://sourceforge.net/mailarchive/forum.php?thread_id=9137692&forum_id=23700
         if self.texipc:
-            box.readdvipage(self.dvifile, self.page)
+            box.readdvipage(self.dvifile, page)
         else:
             self.needdvitextboxes.append(box)
         return box
@@ -1329,6 +1628,30 @@ class SingleRunner:
         """
         return self.text_pt(unit.topt(x), unit.topt(y), *args, **kwargs)
 
+    def text_many(self, texts, *args, **kwargs):
+        """Typeset several texts at once.
+
+        This method is identical to :meth:`text_pt_many` with the only
+        difference of using PyX lengths to position the output.
+
+        :param texts: texts to be typeset
+        :type texts: list of tuples of x and y position (PyX lengths), text,
+            and textattrs
+
+        """
+        return self.text_pt_many([(unit.topt(x), unit.topt(y), expr, textattrs) for x, y, expr, textattrs in texts], *args, **kwargs)
+
+    def enginekey(self):
+        """Key describing the TeX setup.
+
+        The key is used by the :class:`BoxCache` to distinguish the output of
+        different setups of the TeX interpreter.
+
+        :rtype: list of str
+
+        """
+        return [self.__class__.__name__, self.texenc] + self.cmd
+
 
 class SingleTexRunner(SingleRunner):
 
@@ -1356,6 +1679,9 @@ class SingleTexRunner(SingleRunner):
         self.lfs = lfs
         self.name = "TeX"
 
+    def enginekey(self):
+        return super().enginekey() + ["lfs=%s" % self.lfs]
+
     def go_typeset(self):
         assert self.state == STATE_PREAMBLE
         self.state = STATE_TYPESET
@@ -1417,6 +1743,11 @@ class SingleLatexRunner(SingleRunner):
         self.texmessages_begindoc = texmessages_begindoc
         self.name = "LaTeX"
 
+    def enginekey(self):
+        return super().enginekey() + ["docclass=%s" % self.docclass,
+                                      "docopt=%s" % self.docopt,
+                                      "pyxgraphics=%s" % self.pyxgraphics]
+
     def go_typeset(self):
         self._execute("\\begin{document}", self.texmessages_begindoc_default + self.texmessages_begindoc, STATE_PREAMBLE, STATE_TYPESET)
 
@@ -1447,6 +1778,214 @@ class SingleLatexRunner(SingleRunner):
                           self.texmessages_docclass_default + self.texmessages_docclass, STATE_PREAMBLE, STATE_PREAMBLE)
 
 
+class _BoxPickler(pickle.Pickler):
+
+    # the canvases of a dvi page refer to the default texrunner, which must
+    # not be pickled
+    def persistent_id(self, obj):
+        if isinstance(obj, (SingleRunner, MultiRunner, TexRunnerPool, UnicodeEngine)):
+            return "texrunner"
+        return None
+
+
+class _BoxUnpickler(pickle.Unpickler):
+
+    def persistent_load(self, pid):
+        if pid == "texrunner":
+            return defaulttexrunner
+        raise pickle.UnpicklingError("unsupported persistent object")
+
+
+class BoxCache:
+
+    def __init__(self, directory=None, maxentries=1000, maxsize=50000000, fontmaps=None):
+        """Cache of typeset text boxes.
+
+        The cache stores the extents and the content of the dvi page of the
+        text boxes typeset by a :class:`MultiRunner`. On a cache hit, the text
+        box is created without accessing the TeX interpreter at all. The
+        entries are kept in memory and, when a directory is given, on disk to
+        be reused by later runs.
+
+        :param directory: directory to store the cache entries or ``None`` for
+            an in-memory cache only
+        :type directory: str or None
+        :param int maxentries: maximal number of entries kept in memory
+        :param int maxsize: maximal size of all entries on disk in bytes
+        :param fontmaps: names of the font mapping files to be watched for
+            modifications, defaults to the font mapping files configured in the
+            ``text`` section of the pyx :mod:`config`
+        :type fontmaps: list of str or None
+
+        The in-memory as well as the on-disk entries are evicted in least
+        recently used order. All entries are invalidated when the font mapping
+        files change between runs or when :meth:`invalidate` is called.
+
+        """
+        self.directory = directory
+        self.maxentries = maxentries
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.disksize = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.disksize = sum(size for filename, mtime, size in self._diskentries())
+            if fontmaps is None:
+                fontmaps = (config.getlist("text", "psfontmaps", ["psfonts.map"]) +
+                            config.getlist("text", "pdffontmaps", ["pdftex.map"]))
+            stamp = repr(self._fontmapstamp(fontmaps))
+            stampfilename = os.path.join(directory, "fontmaps")
+            try:
+                with open(stampfilename, "r", encoding="utf-8") as stampfile:
+                    valid = stampfile.read() == stamp
+            except EnvironmentError:
+                valid = False
+            if not valid:
+                self.invalidate()
+                with open(stampfilename, "w", encoding="utf-8") as stampfile:
+                    stampfile.write(stamp)
+
+    def _fontmapstamp(self, fontmaps):
+        stamp = []
+        for fontmap in fontmaps:
+            try:
+                with config.open(fontmap, [config.format.fontmap]) as fontmapfile:
+                    filename = fontmapfile.name
+                stat = os.stat(filename)
+            except (EnvironmentError, AttributeError):
+                stamp.append((fontmap, None))
+            else:
+                stamp.append((fontmap, os.path.abspath(filename), stat.st_mtime_ns, stat.st_size))
+        return stamp
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key + ".pyxbox")
+
+    def _diskentries(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".pyxbox"):
+                filename = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(filename)
+                except EnvironmentError:
+                    continue
+                yield filename, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        while len(self.entries) > self.maxentries:
+            self.entries.popitem(last=False)
+        if self.directory is not None and self.disksize > self.maxsize:
+            self.disksize = 0
+            for filename, mtime, size in sorted(self._diskentries(), key=lambda entry: entry[1], reverse=True):
+                if self.disksize + size > self.maxsize:
+                    try:
+                        os.unlink(filename)
+                    except EnvironmentError:
+                        logger.warning("Failed to remove cache entry '{}'.".format(filename))
+                else:
+                    self.disksize += size
+
+    def key(self, *args):
+        """Return the cache key for the args.
+
+        :param args: data identifying a text box (nested lists of strings,
+            numbers, booleans, and ``None``)
+        :returns: cache key
+        :rtype: str
+
+        """
+        return hashlib.sha1(repr((version.version,) + args).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cache entry for key.
+
+        :param str key: cache key as returned by :meth:`key`
+        :returns: the extents and the items and markers of the dvi page or
+            ``None`` on a cache miss
+        :rtype: tuple or None
+
+        """
+        data = self.entries.pop(key, None)
+        if data is None and self.directory is not None:
+            filename = self._filename(key)
+            try:
+                with open(filename, "rb") as cachefile:
+                    data = cachefile.read()
+                os.utime(filename)
+            except EnvironmentError:
+                pass
+        if data is None:
+            return None
+        try:
+            entry = _BoxUnpickler(io.BytesIO(data)).load()
+        except Exception as e:
+            logger.warning("Ignoring invalid text box cache entry ({}).".format(e))
+            return None
+        self.entries[key] = data
+        self._evict()
+        return entry
+
+    def store(self, key, extent_pt, items, markers):
+        """Store a cache entry.
+
+        :param str key: cache key as returned by :meth:`key`
+        :param extent_pt: left, right, height, and depth of the text box
+        :type extent_pt: tuple of four floats
+        :param items: canvas items of the dvi page
+        :type items: list of :class:`baseclasses.canvasitem`
+        :param dict markers: marker positions of the dvi page
+
+        """
+        data = io.BytesIO()
+        try:
+            _BoxPickler(data, pickle.HIGHEST_PROTOCOL).dump((extent_pt, items, markers))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning("Text box cannot be cached ({}).".format(e))
+            return
+        data = data.getvalue()
+        self.entries.pop(key, None)
+        self.entries[key] = data
+        if self.directory is not None:
+            filename = self._filename(key)
+            try:
+                oldsize = os.stat(filename).st_size
+            except EnvironmentError:
+                oldsize = 0
+            cachefile = None
+            try:
+                with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as cachefile:
+                    cachefile.write(data)
+                os.replace(cachefile.name, filename)
+            except EnvironmentError:
+                logger.warning("Could not write text box cache entry '{}'.".format(filename))
+                if cachefile is not None:
+                    try:
+                        os.unlink(cachefile.name)
+                    except EnvironmentError:
+                        pass
+            else:
+                # an existing entry (stored by another process) is replaced
+                self.disksize += len(data) - oldsize
+        self._evict()
+
+    def invalidate(self):
+        """Remove all cache entries.
+
+        This method should be called when the result of typesetting changes
+        without being reflected in the cache key, for example by modifications
+        of fonts or TeX packages.
+
+        """
+        self.entries.clear()
+        if self.directory is not None:
+            for filename, mtime, size in list(self._diskentries()):
+                try:
+                    os.unlink(filename)
+                except EnvironmentError:
+                    logger.warning("Failed to remove cache entry '{}'.".format(filename))
+            self.disksize = 0
+
+
 def reset_for_tex_done(f):
     @functools.wraps(f)
     def wrapped(self, *args, **kwargs):
@@ -1460,34 +1999,147 @@ def reset_for_tex_done(f):
 
 class MultiRunner:
 
-    def __init__(self, cls, *args, **kwargs):
+    def __init__(self, cls, *args, boxcache=None, lazy=0, **kwargs):
         """A restartable :class:`SingleRunner` class
 
         :param cls: the class being wrapped
         :type cls: :class:`SingleRunner` class
         :param list args: args at class instantiation
+        :param boxcache: cache for the typeset text boxes
+        :type boxcache: None or :class:`BoxCache`
+        :param int lazy: when non-zero, :meth:`text_pt` and :meth:`text`
+            return :class:`lazytextbox_pt` instances and the texts are passed
+            to the TeX interpreter in batches of the given size
         :param dict kwargs: keyword args at at class instantiation
 
+        When a *boxcache* is used, the TeX interpreter is started and the
+        preambles are executed at the first cache miss only.
+
         """
         self.cls = cls
         self.args = args
         self.kwargs = kwargs
+        self.boxcache = boxcache
+        self.lazy = lazy
+        self.lazyboxes = []
+        if lazy:
+            _lazyrunners.add(self)
         self.reset()
 
     def preamble(self, expr, texmessages=[]):
         "resembles :meth:`SingleRunner.preamble`"
+        self.submitlazy()
         self.preambles.append((expr, texmessages))
-        self.instance.preamble(expr, texmessages)
+        if self.boxcache is None or self.instance.state > STATE_START:
+            self.instance.preamble(expr, texmessages)
+
+    def _cachedbox(self, x_pt, y_pt, expr, textattrs, fontmap, singlecharmode):
+        """Lookup a text box in the boxcache.
+
+        :returns: cache key and the text box or ``None`` on a cache miss
+        :rtype: tuple of str and (:class:`textextbox_pt` or None)
+
+        """
+        texexpr, trafos, fillstyles = apply_textattrs(expr, textattrs)
+        key = self.boxcache.key(self.instance.enginekey(), [preamble for preamble, texmessages in self.preambles], texexpr, singlecharmode)
+        entry = self.boxcache.get(key)
+        if entry is None:
+            return key, None
+        extent_pt, items, markers = entry
+        box = textextbox_pt(x_pt, y_pt, *extent_pt, None, fontmap, singlecharmode, fillstyles)
+        box.setdvipage(items, markers)
+        for t in trafos:
+            box.reltransform(t)
+        return key, box
+
+    def _cachemiss(self):
+        """Prepare the instance to typeset a text box not found in the boxcache."""
+        if self.instance.state == STATE_START:
+            for expr, texmessages in self.preambles:
+                self.instance.preamble(expr, texmessages)
+
+    def _cachestore(self, key, box):
+        """Store the text box in the boxcache once its dvi page is available."""
+        box.cachestore = functools.partial(self.boxcache.store, key)
+        if box._dvicanvas is not None: # texipc
+            box.cachestore(box.extents_pt, box._dvicanvas.items, box._dvicanvas.markers)
 
     @reset_for_tex_done
-    def text_pt(self, *args, **kwargs):
+    def text_pt(self, x_pt, y_pt, expr, textattrs=[], texmessages=[], fontmap=None, singlecharmode=False):
         "resembles :meth:`SingleRunner.text_pt`"
-        return self.instance.text_pt(*args, **kwargs)
+        if self.lazy:
+            box = lazytextbox_pt(self, (x_pt, y_pt, expr, textattrs), texmessages, fontmap, singlecharmode)
+            self.lazyboxes.append(box)
+            if len(self.lazyboxes) >= self.lazy:
+                self.submitlazy()
+            return box
+        if self.boxcache is None or fontmap is not None:
+            return self.instance.text_pt(x_pt, y_pt, expr, textattrs, texmessages, fontmap, singlecharmode)
+        key, box = self._cachedbox(x_pt, y_pt, expr, textattrs, fontmap, singlecharmode)
+        if box is None:
+            self._cachemiss()
+            box = self.instance.text_pt(x_pt, y_pt, expr, textattrs, texmessages, fontmap, singlecharmode)
+            self._cachestore(key, box)
+        return box
+
+    def text_pt_many(self, texts, texmessages=[], fontmap=None, singlecharmode=False):
+        "resembles :meth:`SingleRunner.text_pt_many`"
+        return self.submit_text_pt_many(texts, texmessages, fontmap, singlecharmode)()
 
     @reset_for_tex_done
-    def text(self, *args, **kwargs):
+    def submit_text_pt_many(self, texts, texmessages=[], fontmap=None, singlecharmode=False):
+        "resembles :meth:`SingleRunner.submit_text_pt_many`"
+        if self.boxcache is None or fontmap is not None:
+            return self.instance.submit_text_pt_many(texts, texmessages, fontmap, singlecharmode)
+        keys = []
+        boxes = []
+        for x_pt, y_pt, expr, textattrs in texts:
+            key, box = self._cachedbox(x_pt, y_pt, expr, textattrs, fontmap, singlecharmode)
+            keys.append(key)
+            boxes.append(box)
+        missing = [i for i, box in enumerate(boxes) if box is None]
+        if not missing:
+            return lambda: boxes
+        self._cachemiss()
+        collector = self.instance.submit_text_pt_many([texts[i] for i in missing], texmessages, fontmap, singlecharmode)
+
+        def cachecollector():
+            for i, box in zip(missing, collector()):
+                if boxes[i] is None:
+                    self._cachestore(keys[i], box)
+                    boxes[i] = box
+            return boxes
+
+        return cachecollector
+
+    def submitlazy(self):
+        """Pass the pending texts of :class:`lazytextbox_pt` instances to the TeX interpreter.
+
+        The texts are submitted without waiting for the result (see
+        :meth:`SingleRunner.submit_text_pt_many`). Texts sharing the same
+        texmessages, fontmap, and singlecharmode are submitted together.
+
+        """
+        while self.lazyboxes:
+            texmessages, fontmap, singlecharmode = self.lazyboxes[0].lazyoptions
+            n = 1
+            while n < len(self.lazyboxes):
+                if self.lazyboxes[n].lazyoptions != (texmessages, fontmap, singlecharmode):
+                    break
+                n += 1
+            boxes = self.lazyboxes[:n]
+            collector = self.submit_text_pt_many([box.lazytext for box in boxes], texmessages, fontmap, singlecharmode)
+            del self.lazyboxes[:n]
+            for i, box in enumerate(boxes):
+                box.lazycollect = collector, i
+
+    def text(self, x, y, *args, **kwargs):
         "resembles :meth:`SingleRunner.text`"
-        return self.instance.text(*args, **kwargs)
+        return self.text_pt(unit.topt(x), unit.topt(y), *args, **kwargs)
+
+    def text_many(self, texts, *args, **kwargs):
+        "resembles :meth:`SingleRunner.text_many`"
+        return self.text_pt_many([(unit.topt(x), unit.topt(y), expr, textattrs) for x, y, expr, textattrs in texts], *args, **kwargs)
 
     def reset(self, reinit=False):
         """Start a new :class:`SingleRunner` instance
@@ -1499,10 +2151,13 @@ class MultiRunner:
         forbidden.
 
         """
+        if not reinit:
+            self.submitlazy()
         self.instance = self.cls(*self.args, **self.kwargs)
         if reinit:
-            for expr, texmessages in self.preambles:
-                self.instance.preamble(expr, texmessages)
+            if self.boxcache is None:
+                for expr, texmessages in self.preambles:
+                    self.instance.preamble(expr, texmessages)
         else:
             self.preambles = []
 
@@ -1531,6 +2186,102 @@ class LatexEngine(MultiRunner):
         super().__init__(SingleLatexRunner, *args, **kwargs)
 
 
+class TexRunnerPool:
+
+    def __init__(self, *args, runner=TexEngine, size=None, **kwargs):
+        """A pool of restartable TeX interpreters
+
+        :param list args: args at runner instantiation
+        :param runner: the class of the interpreters in the pool
+        :type runner: :class:`MultiRunner` class
+        :param size: number of interpreters, defaults to the number of CPUs
+        :type size: int or None
+        :param dict kwargs: keyword args at runner instantiation
+
+        The pool provides the same functional interface as a
+        :class:`MultiRunner`. Preambles are executed by all interpreters (in
+        parallel), while the texts are distributed among the interpreters.
+        Each interpreter uses its own temporary directory and each text output
+        refers to the DVI page of the interpreter it was typeset by. As
+        :meth:`text_pt_many` passes the texts to all interpreters before
+        waiting for the results, the typesetting is done in parallel. Single
+        texts are distributed in turn in lazy mode only (see the *lazy*
+        argument of :class:`MultiRunner`), which allows for their parallel
+        execution. Otherwise single texts are typeset by the first
+        interpreter, as there is nothing to be gained from starting further
+        interpreters for them. Each interpreter is restarted (replaying the
+        preambles) when needed, just like a single :class:`MultiRunner`.
+
+        """
+        if size is None:
+            size = os.cpu_count() or 1
+        self.runners = [runner(*args, **kwargs) for i in range(size)]
+        self.nextrunner = 0
+
+    def _map(self, f):
+        """Call f for all runners in parallel threads."""
+        with concurrent.futures.ThreadPoolExecutor(len(self.runners)) as executor:
+            return list(executor.map(f, self.runners))
+
+    def _runner(self):
+        """Return the next runner in turn."""
+        runner = self.runners[self.nextrunner]
+        self.nextrunner = (self.nextrunner + 1) % len(self.runners)
+        return runner
+
+    def _singlerunner(self):
+        """Return the runner for a single text."""
+        if self.runners[0].lazy:
+            return self._runner()
+        return self.runners[0]
+
+    def preamble(self, expr, texmessages=[]):
+        "resembles :meth:`MultiRunner.preamble`"
+        self._map(lambda runner: runner.preamble(expr, texmessages))
+
+    def text_pt(self, *args, **kwargs):
+        "resembles :meth:`MultiRunner.text_pt`"
+        return self._singlerunner().text_pt(*args, **kwargs)
+
+    def text(self, *args, **kwargs):
+        "resembles :meth:`MultiRunner.text`"
+        return self._singlerunner().text(*args, **kwargs)
+
+    def text_pt_many(self, texts, *args, **kwargs):
+        "resembles :meth:`MultiRunner.text_pt_many`"
+        return self.submit_text_pt_many(texts, *args, **kwargs)()
+
+    def text_many(self, texts, *args, **kwargs):
+        "resembles :meth:`MultiRunner.text_many`"
+        return self.text_pt_many([(unit.topt(x), unit.topt(y), expr, textattrs) for x, y, expr, textattrs in texts], *args, **kwargs)
+
+    def submit_text_pt_many(self, texts, *args, **kwargs):
+        """Distribute the texts among the interpreters.
+
+        The texts are split into consecutive chunks, which are submitted to
+        the interpreters without waiting for the results (see
+        :meth:`MultiRunner.submit_text_pt_many`).
+
+        """
+        texts = list(texts)
+        if not texts:
+            return lambda: []
+        chunksize = -(-len(texts) // len(self.runners))
+        collectors = [self._runner().submit_text_pt_many(texts[i:i+chunksize], *args, **kwargs)
+                      for i in range(0, len(texts), chunksize)]
+        return lambda: [box for collector in collectors for box in collector()]
+
+    def submitlazy(self):
+        "resembles :meth:`MultiRunner.submitlazy`"
+        for runner in self.runners:
+            runner.submitlazy()
+
+    def reset(self, reinit=False):
+        "resembles :meth:`MultiRunner.reset`"
+        for runner in self.runners:
+            runner.reset(reinit=reinit)
+
+
 from pyx import deco
 from pyx.font import T1font
 from pyx.font.t1file import T1File
@@ -1709,9 +2460,15 @@ class UnicodeEngine:
 
         return output
 
+    def text_pt_many(self, texts, *args, **kwargs):
+        return [self.text_pt(x_pt, y_pt, text, textattrs, *args, **kwargs) for x_pt, y_pt, text, textattrs in texts]
+
     def text(self, x, y, *args, **kwargs):
         return self.text_pt(unit.topt(x), unit.topt(y), *args, **kwargs)
 
+    def text_many(self, texts, *args, **kwargs):
+        return self.text_pt_many([(unit.topt(x), unit.topt(y), text, textattrs) for x, y, text, textattrs in texts], *args, **kwargs)
+
 
 # from pyx.font.otffile import OpenTypeFont
 # 
@@ -1754,6 +2511,12 @@ text_pt = None
 #: default_runner.text (bound method)
 text = None
 
+#: default_runner.text_pt_many (bound method)
+text_pt_many = None
+
+#: default_runner.text_many (bound method)
+text_many = None
+
 #: default_runner.reset (bound method)
 reset = None
 
@@ -1774,7 +2537,7 @@ def set(engine=None, cls=None, mode=None, *args, **kwargs):
 
     """
     # note: default_runner and defaulttexrunner are deprecated
-    global default_engine, default_runner, defaulttexrunner, reset, preamble, text, text_pt
+    global default_engine, default_runner, defaulttexrunner, reset, preamble, text, text_pt, text_many, text_pt_many
     if mode is not None:
         logger.warning("mode setting is deprecated, use the engine argument instead")
         assert cls is None
@@ -1788,10 +2551,12 @@ def set(engine=None, cls=None, mode=None, *args, **kwargs):
     preamble = default_runner.preamble
     text_pt = default_runner.text_pt
     text = default_runner.text
+    text_pt_many = default_runner.text_pt_many
+    text_many = default_runner.text_many
     reset = default_runner.reset
 
 # initialize default_runner
-set({"TexEngine": TexEngine, "LatexEngine": LatexEngine, "UnicodeEngine": UnicodeEngine}[config.get('text', 'default_engine', 'TexEngine')])
+set({"TexEngine": TexEngine, "LatexEngine": LatexEngine, "TexRunnerPool": TexRunnerPool, "UnicodeEngine": UnicodeEngine}[config.get('text', 'default_engine', 'TexEngine')])
 
 
 def escapestring(s, replace={" ": "~",
@@ -20,6 +20,15 @@
 # along with PyX; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA
 
+import base64, binascii, logging, multiprocessing
+try:
+    import zlib
+    haszlib = True
+except ImportError:
+    haszlib = False
+logger = logging.getLogger("pyx")
+
+
 class writer:
 
     def __init__(self, file, encoding="ascii", errors="surrogateescape"):
@@ -41,3 +50,133 @@ class writer:
 
     def __exit__(self, exc_type, exc_value, traceback):
         return self.file.__exit__(exc_type, exc_value, traceback)
+
+
+# Encoder pipeline stages: The data is passed from stage to stage in chunks,
+# such that large data (like images) is never kept in several encodings at
+# once. The stages accept a bytes like object or an iterable of chunks.
+
+# the chunk size is a multiple of 60 bytes, i.e. of the bytes per ascii85 line
+_chunksize = 60*1024
+
+def chunks(data, chunksize=_chunksize):
+    """iterate over data in chunks"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = memoryview(data).cast("B")
+        for i in range(0, len(data), chunksize):
+            yield data[i:i+chunksize]
+    else:
+        yield from data
+
+
+def deflate(data, level=6):
+    """iterate over the zlib compressed chunks of data"""
+    compressor = zlib.compressobj(level)
+    for chunk in chunks(data):
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _blocks(data, blocksize):
+    """iterate over data in blocks of a multiple of blocksize bytes
+
+    Only the last block might be shorter."""
+    rest = b""
+    for chunk in chunks(data):
+        if rest:
+            chunk = rest + chunk
+        tail = len(chunk) % blocksize
+        if tail:
+            chunk, rest = chunk[:len(chunk)-tail], bytes(chunk[len(chunk)-tail:])
+        else:
+            rest = b""
+        if chunk:
+            yield chunk
+    if rest:
+        yield rest
+
+
+def ascii85lines(datalen):
+    """number of lines written by ascii85stream for datalen bytes of data"""
+    if datalen < 4:
+        return 1
+    return (datalen + 56)//60
+
+
+def ascii85stream(file, data):
+    """Encodes data in ASCII85 and writes it to the writer file.
+
+    The number of lines written to the stream is known just from the length
+    of the data by means of the ascii85lines function. Note that the tailing
+    newline character of the last line is not added by this function, but it
+    is taken into account in the ascii85lines function."""
+    first = True
+    for block in _blocks(data, 60):
+        # the encoding of 60 bytes fills a line of 75 characters; we do not
+        # use the "z" abbreviation to keep the line lengths fixed
+        encoded = base64.a85encode(block).replace(b"z", b"!!!!!")
+        for i in range(0, len(encoded), 75):
+            # a final incomplete group of less than 4 bytes (encoded into at most
+            # 4 characters) is appended to the preceding line
+            if not first and len(encoded) - i > 4:
+                file.write_bytes(b"\n")
+            file.write_bytes(encoded[i:i+75])
+            first = False
+
+
+_asciihexlinelength = 64
+
+def asciihexlines(datalen):
+    """number of lines written by asciihexstream for datalen bytes of data"""
+    return (datalen*2 + _asciihexlinelength - 1) // _asciihexlinelength
+
+
+def asciihexstream(file, data):
+    """Encodes data in ASCIIHex and writes it in lines to the writer file."""
+    for block in _blocks(data, _asciihexlinelength//2):
+        encoded = binascii.b2a_hex(block)
+        for i in range(0, len(encoded), _asciihexlinelength):
+            file.write_bytes(encoded[i:i+_asciihexlinelength])
+            file.write_bytes(b"\n")
+
+
+# pages and processing function of parallelpages inherited by the forked
+# worker processes
+_pages = _process = None
+
+def _processpage(pageno):
+    return _process(pageno, _pages[pageno])
+
+
+def parallelpages(pages, process, workers=None):
+    """iterate over pages yielding tuples (pageno, page, result)
+
+    For workers being None, result is always None. Otherwise, the result of
+    process(pageno, page) is calculated in workers processes forked from the
+    current process. This avoids pickling the pages, only the results need to
+    be pickled. As the result of the processing of the page is not available
+    to the current process, process may return None to request the processing
+    of the page in the current process instead. All pages are fetched prior
+    to the forking and all TeX interpreters are finished (see
+    text.finishrunners), since the worker processes cannot communicate with
+    the TeX interpreters of the current process."""
+    global _pages, _process
+    if workers is not None and "fork" not in multiprocessing.get_all_start_methods():
+        logger.warning("parallel processing of pages disabled as forking of processes is not available")
+        workers = None
+    if workers is None:
+        for pageno, page in enumerate(pages):
+            yield pageno, page, None
+        return
+    pages = list(pages)
+    from pyx import text
+    text.finishrunners()
+    _pages, _process = pages, process
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for pageno, result in enumerate(pool.imap(_processpage, range(len(pages)))):
+                yield pageno, pages[pageno], result
+    finally:
+        _pages = _process = None
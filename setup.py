@@ -44,8 +44,11 @@ ext_modules = []
 pykpathsea_ext_module = Extension("pyx.pykpathsea",
                                   sources=["pyx/pykpathsea.c"],
                                   libraries=["kpathsea"])
+# the t1code module is optional: when it fails to build, PyX falls back
+# to the pure Python implementation in pyx/font/t1code.py
 t1code_ext_module = Extension("pyx.font._t1code",
-                              sources=["pyx/font/_t1code.c"])
+                              sources=["pyx/font/_t1code.c"],
+                              optional=True)
 if cfg.has_option("PyX", "build_pykpathsea") and cfg.getboolean("PyX", "build_pykpathsea"):
     ext_modules.append(pykpathsea_ext_module)
 if cfg.has_option("PyX", "build_t1code") and cfg.getboolean("PyX", "build_t1code"):
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+import sys
+sys.path[:0] = [".."]
+
+import array, os, timeit
+
+from pyx.font import t1code
+try:
+    from pyx.font import _t1code
+except ImportError:
+    _t1code = None
+
+
+class previous:
+    """the previous pure Python implementation computing the key update
+    arithmetically for each byte (for reference)"""
+
+    __name__ = "previous"
+
+    c1_16, c1_8 = divmod(t1code.c1, 0x100)
+
+    def decoder(self, code, r, n):
+        plain = array.array("B")
+        for x in array.array("B", code):
+            plain.append(x ^ (r >> 8))
+            r = ((((x + r) * self.c1_16) & 0xff) * 0x100 + (x + r) * self.c1_8 + t1code.c2) & 0xffff
+        return plain.tobytes()[n:]
+
+    def encoder(self, data, r, random):
+        code = array.array("B")
+        for x in array.array("B", random+data):
+            code.append(x ^ (r>>8))
+            r = ((((code[-1] + r) * self.c1_16) & 0xff) * 0x100 + (code[-1] + r) * self.c1_8 + t1code.c2) & 0xffff
+        return code.tobytes()
+
+
+def testspeed(module, data):
+    code = module.encoder(data, 55665, b"PyX!")
+    assert module.decoder(code, 55665, 4) == data
+    enc = min(timeit.repeat(lambda: module.encoder(data, 55665, b"PyX!"), number=1, repeat=5))
+    dec = min(timeit.repeat(lambda: module.decoder(code, 55665, 4), number=1, repeat=5))
+    print("%-20s encode %8.2f MB/s   decode %8.2f MB/s" % (module.__name__, len(data)/enc/1e6, len(data)/dec/1e6))
+
+
+data = os.urandom(1000000)
+assert previous().encoder(data, 55665, b"PyX!") == t1code.encoder(data, 55665, b"PyX!")
+testspeed(previous(), data)
+testspeed(t1code, data)
+if _t1code is not None:
+    assert _t1code.encoder(data, 55665, b"PyX!") == t1code.encoder(data, 55665, b"PyX!")
+    testspeed(_t1code, data)
+else:
+    print("C extension module pyx.font._t1code not available")
@@ -0,0 +1,81 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import concurrent.futures, io, unittest
+
+from pyx import bitmap, canvas, document, trafo
+
+
+class BitmapTestCase(unittest.TestCase):
+
+    def imagedata(self, mode, interleavealpha):
+        data = bytes(range(len(mode))) * 6
+        b = bitmap.bitmap_trafo(trafo.identity, bitmap.image(3, 2, mode, data), compressmode=None)
+        return b.imagedata(interleavealpha)
+
+    def testInterleave(self):
+        self.assertEqual(bitmap.interleave([b"ab", b"cd", b"ef"]), b"acebdf")
+
+    def testAlpha(self):
+        self.assertEqual(self.imagedata("RGBA", False)[:3], ("RGB", b"\0\1\2" * 6, b"\3" * 6))
+        self.assertEqual(self.imagedata("RGBA", True)[:3], ("RGB", b"\3\0\1\2" * 6, True))
+        self.assertEqual(self.imagedata("ARGB", False)[:3], ("RGB", b"\1\2\3" * 6, b"\0" * 6))
+        self.assertEqual(self.imagedata("ARGB", True)[:3], ("RGB", b"\0\1\2\3" * 6, True))
+        self.assertEqual(self.imagedata("LA", False)[:3], ("L", b"\0" * 6, b"\1" * 6))
+
+    def testCache(self):
+        data = bytes(range(256)) * 3
+        b1 = bitmap.bitmap_trafo(trafo.identity, bitmap.image(16, 16, "RGB", data))
+        b2 = bitmap.bitmap_trafo(trafo.identity, bitmap.image(16, 16, "RGB", bytes(data)))
+        b3 = bitmap.bitmap_trafo(trafo.identity, bitmap.image(16, 16, "RGB", data[::-1]))
+        self.assertEqual(b1.imagehash(), b2.imagehash())
+        self.assertNotEqual(b1.imagehash(), b3.imagehash())
+        self.assertTrue(b1.imagedata(False)[1] is b2.imagedata(False)[1])
+        self.assertTrue(b1.imagedata(False)[1] is not b1.imagedata(True)[1])
+
+    def testCacheEviction(self):
+        cache = bitmap.encodedimagecache(maxsize=10)
+        cache.store("a", ("L", b"x"*6, None, None, None))
+        cache.store("b", ("L", b"x"*6, None, None, None))
+        cache.store("c", ("L", b"x"*20, None, None, None))
+        self.assertEqual(list(cache.entries), ["b"])
+        self.assertEqual(cache.size, 6)
+        cache.store("b", ("L", b"x"*6, None, None, None))
+        self.assertEqual(cache.size, 6)
+        cache.clear()
+        self.assertEqual((list(cache.entries), cache.size), ([], 0))
+
+    def testCacheThreads(self):
+        cache = bitmap.encodedimagecache(maxsize=100)
+        def access(i):
+            for j in range(2000):
+                key = (i + j) % 30
+                if cache.get(key) is None:
+                    cache.store(key, ("L", b"x"*(key % 7 + 1), None, None, None))
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(access, range(8)))
+        self.assertEqual(cache.size, sum(cache.entrysize(entry) for entry in cache.entries.values()))
+        self.assertTrue(cache.size <= 100)
+
+    def testPDFdedup(self):
+        pages = []
+        for i in range(3):
+            c = canvas.canvas()
+            c.insert(bitmap.bitmap(0, 0, bitmap.image(2, 2, "L", b"\0\1\2\3"), width=1))
+            pages.append(document.page(c))
+        f = io.BytesIO()
+        document.document(pages).writePDFfile(f)
+        self.assertEqual(f.getvalue().count(b"/Subtype /Image"), 1)
+
+    def testPDFdedupParameters(self):
+        c = canvas.canvas()
+        for level in [1, 9, 9]:
+            c.insert(bitmap.bitmap(0, 0, bitmap.image(2, 2, "L", b"\0\1\2\3"), width=1, flatecompresslevel=level))
+        f = io.BytesIO()
+        document.document([document.page(c)]).writePDFfile(f)
+        self.assertEqual(f.getvalue().count(b"/Subtype /Image"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, os, shutil, tempfile
+
+from pyx import canvas, path, text, unit
+
+
+class BoxCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def page(self):
+        c = canvas.canvas()
+        c.fill(path.rect_pt(0, 0, 1, 2))
+        return c.items, {"m": (1*unit.t_pt, 2*unit.t_pt)}
+
+    def testMemory(self):
+        cache = text.BoxCache(maxentries=2)
+        keys = [cache.key(["TeX"], [], "box%i" % i, False) for i in range(3)]
+        self.assertEqual(len(set(keys)), 3)
+        for key in keys:
+            cache.store(key, (1, 2, 3, 4), *self.page())
+        self.assertEqual(cache.get(keys[0]), None)
+        extent_pt, items, markers = cache.get(keys[2])
+        self.assertEqual(extent_pt, (1, 2, 3, 4))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(sorted(markers), ["m"])
+        self.assertTrue(items[0] is not cache.get(keys[2])[1][0])
+
+    def testDisk(self):
+        cache = text.BoxCache(self.tmpdir, fontmaps=[])
+        key = cache.key(["TeX"], [], "box", False)
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        cache = text.BoxCache(self.tmpdir, fontmaps=[])
+        self.assertEqual(cache.get(key)[0], (1, 2, 3, 4))
+        cache.invalidate()
+        self.assertEqual(cache.get(key), None)
+
+    def testDiskSize(self):
+        cache1 = text.BoxCache(self.tmpdir, fontmaps=[])
+        key = cache1.key(["TeX"], [], "box", False)
+        cache1.store(key, (1, 2, 3, 4), *self.page())
+        cache2 = text.BoxCache(self.tmpdir, fontmaps=[])
+        cache2.store(key, (1, 2, 3, 4), *self.page())
+        cache2.store(key, (1, 2, 3, 4), *self.page())
+        self.assertEqual(cache2.disksize, sum(size for filename, mtime, size in cache2._diskentries()))
+
+    def testDiskWriteFailure(self):
+        cache = text.BoxCache(self.tmpdir, fontmaps=[])
+        key = cache.key(["TeX"], [], "box", False)
+        os.mkdir(cache._filename(key)) # the entry cannot be replaced
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        self.assertEqual([name for name in os.listdir(self.tmpdir) if name.endswith(".tmp")], [])
+        self.assertEqual(cache.disksize, 0)
+
+    def testDiskEviction(self):
+        cache = text.BoxCache(self.tmpdir, maxentries=0, maxsize=1, fontmaps=[])
+        key = cache.key(["TeX"], [], "box", False)
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        self.assertEqual(cache.get(key), None)
+
+    def testFontmapInvalidation(self):
+        fontmap = os.path.join(self.tmpdir, "test.map")
+        with open(fontmap, "w") as f:
+            f.write("cmr10 CMR10 <cmr10.pfb\n")
+        cache = text.BoxCache(self.tmpdir, fontmaps=[fontmap])
+        key = cache.key(["TeX"], [], "box", False)
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        self.assertEqual(text.BoxCache(self.tmpdir, fontmaps=[fontmap]).get(key)[0], (1, 2, 3, 4))
+        with open(fontmap, "a") as f:
+            f.write("cmr12 CMR12 <cmr12.pfb\n")
+        self.assertEqual(text.BoxCache(self.tmpdir, fontmaps=[fontmap]).get(key), None)
+
+    def testCachedTextbox(self):
+        cache = text.BoxCache()
+        runner = text.TexEngine(boxcache=cache)
+        key = cache.key(runner.instance.enginekey(), [], "cached", False)
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        box = runner.text_pt(10, 20, "cached")
+        self.assertEqual(runner.instance.state, text.STATE_START)
+        self.assertAlmostEqual(unit.topt(box.width), 3*unit.scale["x"])
+        self.assertEqual(len(box.dvicanvas.items), 1)
+        self.assertAlmostEqual(unit.topt(box.marker("m")[0]), 10+unit.scale["x"])
+
+    def testCachedTextboxExtent(self):
+        cache = text.BoxCache()
+        runner = text.TexEngine(boxcache=cache)
+        key = cache.key(runner.instance.enginekey(), [], "cached", False)
+        cache.store(key, (1, 2, 3, 4), *self.page())
+        box = runner.text_pt(10, 20, "cached")
+        self.assertAlmostEqual(box.extent_pt(1, 0), 3*unit.scale["x"])
+        self.assertAlmostEqual(box.extent_pt(0, 1), 7*unit.scale["x"])
+        self.assertAlmostEqual(unit.topt(box.extent(1, 0)), 3*unit.scale["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
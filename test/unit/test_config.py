@@ -0,0 +1,95 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, os, shutil, tempfile
+
+from pyx import config
+
+
+fakekpsewhich = """#!/bin/sh
+echo "$@" >> %(dir)s/calls
+format=$2
+shift 2
+for f in "$@"; do
+  [ -f "%(dir)s/$f.$format" ] && echo "%(dir)s/$f.$format"
+done
+"""
+
+
+@unittest.skipIf(os.name != "posix", "requires a posix shell")
+class KpsewhichTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmpdir, "kpsewhich"), "w") as f:
+            f.write(fakekpsewhich % {"dir": self.tmpdir})
+        os.chmod(os.path.join(self.tmpdir, "kpsewhich"), 0o755)
+        for filename in ["cmr10.tfm", "cmr12.tfm", "cmmi10.vf"]:
+            open(os.path.join(self.tmpdir, filename), "w").close()
+        self.locator = config.kpsewhich()
+        self.locator.kpsewhich = os.path.join(self.tmpdir, "kpsewhich")
+        self.filelocatorcache = config.filelocatorcache
+        config.filelocatorcache = config.locatorcache(None)
+
+    def tearDown(self):
+        config.filelocatorcache = self.filelocatorcache
+        shutil.rmtree(self.tmpdir)
+
+    def calls(self):
+        with open(os.path.join(self.tmpdir, "calls")) as f:
+            return f.read().splitlines()
+
+    def testFind(self):
+        self.assertEqual(self.locator.find(["cmr10", "cmmi10", "cmr12"], "tfm", ["", ".tfm"]),
+                         [os.path.join(self.tmpdir, "cmr10.tfm"), None, os.path.join(self.tmpdir, "cmr12.tfm")])
+        self.assertEqual(self.calls(), ["--format tfm cmr10 cmmi10 cmr12"])
+
+    def testPrefetch(self):
+        self.locator.prefetch(["cmr10", "cmr12", "cmr17"], ("tfm", ), ["", ".tfm"])
+        with self.locator.openers("cmr12", ("tfm", ), ["", ".tfm"])[0]() as f:
+            self.assertEqual(f.name, os.path.join(self.tmpdir, "cmr12.tfm"))
+        self.assertEqual(self.locator.openers("cmr17", ("tfm", ), ["", ".tfm"]), [])
+        self.assertEqual(len(self.calls()), 1)
+        self.assertEqual(config.filelocatorcache.get("cmr17", ("tfm", )), None)
+
+    def testPersistentMisses(self):
+        filename = os.path.join(self.tmpdir, "filelocator.pickle")
+        cache = config.locatorcache(filename)
+        cache.store("cmr10", ("tfm", ), "kpsewhich", os.path.join(self.tmpdir, "cmr10.tfm"))
+        cache.store("cmr17", ("tfm", ), None)
+        self.assertEqual(cache.get("cmr17", ("tfm", )), None)
+        cache.save()
+        cache = config.locatorcache(filename)
+        self.assertEqual(cache.get("cmr10", ("tfm", )), ("kpsewhich", os.path.join(self.tmpdir, "cmr10.tfm")))
+        # a font installed meanwhile must be found by the locators again
+        self.assertIs(cache.get("cmr17", ("tfm", )), config._marker)
+
+
+    def testPrecedence(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir)
+        try:
+            os.mkdir("global")
+            for name in ["pyxlocal", "pyxglobal"]:
+                with open(os.path.join("global", name + ".tfm"), "w") as f:
+                    f.write("global")
+                config.filelocatorcache.store(name, ("tfm", ), "kpsewhich", os.path.abspath(os.path.join("global", name + ".tfm")))
+            with open("pyxlocal.tfm", "w") as f:
+                f.write("local")
+            # the local file takes precedence over the cached file of kpsewhich
+            with config.open("pyxlocal", [config.format.tfm]) as f:
+                self.assertEqual(f.read(), b"local")
+            with config.open("pyxglobal", [config.format.tfm]) as f:
+                self.assertEqual(f.read(), b"global")
+        finally:
+            for name in ["pyxlocal", "pyxglobal"]:
+                config.opener_cache.pop((name, ("tfm", )), None)
+            os.chdir(cwd)
+
+    def testOptIn(self):
+        self.assertIs(config.locatorcache().filename(), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,30 @@ if sys.path[0] != "../..":
 
 import unittest
 
-import io
-from pyx.graph import data
+import io, math, os, shutil, tempfile
+from pyx import unit
+from pyx.graph import axis, data, graph as graphmodule
+
+
+class _axisdata:
+
+    def __init__(self, min, max):
+        self.min = min
+        self.max = max
+
+
+class _anchoredaxis:
+
+    def __init__(self, axis, min, max):
+        self.axis = axis
+        self.data = _axisdata(min, max)
+
+
+class _graph:
+
+    def __init__(self, axis, min, max):
+        self.axes = {"x": _anchoredaxis(axis, min, max)}
+
 
 class DataTestCase(unittest.TestCase):
 
@@ -80,6 +102,55 @@ class DataTestCase(unittest.TestCase):
         self.assertEqual(mydata.columns["row"], [4, 6, 8])
         self.assertEqual(mydata.title, "title")
 
+    def testFileColumns(self):
+        mydata = data.file(io.StringIO("# x y\n1 2\n\n# comment\n3 4e1\n5 -inf\n"))
+        self.assertEqual(mydata.columns, {"x": [1.0, 3.0, 5.0], "y": [2.0, 40.0, -float("inf")]})
+        self.assertEqual(mydata.orgdata.columndata[0], [1, 2, 3])
+        mydata = data.file(io.StringIO("# x y\n1 2\n3\n5 1_0\n"))
+        self.assertEqual(mydata.columns, {"x": [1.0, 3.0, 5.0], "y": [2.0, None, 10.0]})
+        mydata = data.file(io.StringIO("# x y\n1\n"))
+        self.assertEqual(mydata.columns, {"x": [1.0]})
+
+    def testFileChunks(self):
+        lines = ["# x y", "1 2", "3 4", "% comment", "5 6", "7 eight", "9", "11 12"]
+        entry = data.file(io.StringIO("")).readcolumns(
+                    iter(lines), data.file.defaultcommentpattern, data.file.defaultstringpattern,
+                    data.file.defaultcolumnpattern, 1, 1, 1, chunksize=2)
+        self.assertEqual(entry, (["x", "y"], [[2, 3, 4, 5], [3.0, 5.0, 7.0, 9.0], [4.0, 6.0, "eight", None]]))
+        entry = data.file(io.StringIO("")).readcolumns(
+                    (line for line in lines[:5]), data.file.defaultcommentpattern, data.file.defaultstringpattern,
+                    data.file.defaultcolumnpattern, 0, 0, 2, chunksize=1)
+        self.assertEqual(entry, (["x", "y"], [[1, 3], [1.0, 5.0], [2.0, 6.0]]))
+
+    def testFileCache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "test.dat")
+            with open(filename, "w") as f:
+                f.write("# x y\n1 2\n3 four\n")
+            cache = data.filedatacache(os.path.join(tmpdir, "cache"), maxentries=1)
+            key = cache.key(filename, "options")
+            self.assertEqual(cache.get(key), None)
+            entry = data.file(io.StringIO("")).readcolumns(
+                        open(filename).read().splitlines(), data.file.defaultcommentpattern,
+                        data.file.defaultstringpattern, data.file.defaultcolumnpattern, 0, 0, 1)
+            self.assertEqual(entry, (["x", "y"], [[1, 2], [1.0, 3.0], [2.0, "four"]]))
+            cache.store(key, entry)
+            cache.store(cache.key(filename, "other options"), entry)
+            self.assertEqual(list(cache.entries.keys()), [cache.key(filename, "other options")])
+            cache = data.filedatacache(os.path.join(tmpdir, "cache"))
+            self.assertEqual(cache.get(key), entry)
+            os.utime(filename, ns=(0, 0))
+            self.assertEqual(cache.get(cache.key(filename, "options")), None)
+
+            mydata = data.file(filename, x="x", y="y")
+            self.assertEqual(mydata.orgdata.title, filename)
+            self.assertEqual(mydata.columns["y"], [2.0, "four"])
+            self.assertTrue(data.filecache.get(data.filecache.key(filename, mydata.getcachekey(
+                data.file.defaultcommentpattern, data.file.defaultstringpattern, data.file.defaultcolumnpattern, 0, 0, 1))) is not None)
+        finally:
+            shutil.rmtree(tmpdir)
+
     def testSec(self):
         testfile = io.StringIO("""[sec1]
 opt1=a1
@@ -109,6 +180,77 @@ opt3=a3""")
             self.assertEqual(mydata.columns["x"][i], i)
             self.assertEqual(mydata.columns["y"][i], -i)
 
+    def assertColumnsAlmostEqual(self, columns1, columns2):
+        self.assertEqual(sorted(columns1.keys()), sorted(columns2.keys()))
+        for key in columns1:
+            self.assertEqual(len(columns1[key]), len(columns2[key]))
+            for value1, value2 in zip(columns1[key], columns2[key]):
+                if value1 is None or value2 is None:
+                    self.assertEqual(value1, value2)
+                else:
+                    self.assertAlmostEqual(value1, value2)
+
+    def testFunctionVectorized(self):
+        if not data.has_numpy:
+            self.skipTest("numpy is not available")
+        for expression in ["y(x)=sin(x)*exp(-x)", "y(x)=sqrt(x)", "y(x)=1/x", "y(x)=log(x)", "y(x)=2",
+                           "y(x)=abs(x)+sgn(x)+norm(x, 1)", "y(x)=splitatvalue(x, 0)[1]", "y(x)=x**0.5"]:
+            for axistype, min, max in [(axis.linear(), -2, 3), (axis.logarithmic(), 0.1, 100)]:
+                graph = _graph(axistype, min, max)
+                columns = data.function(expression, points=51).dynamiccolumns(graph, {})
+                vectorizedcolumns = data.function(expression, points=51, vectorized=True).dynamiccolumns(graph, {})
+                self.assertColumnsAlmostEqual(vectorizedcolumns, columns)
+        columns = data.function("y(x)=sqrt(x)", points=5, vectorized=True).dynamiccolumns(_graph(axis.linear(), -2, 2), {})
+        self.assertEqual(columns["y"][:2], [None, None])
+        self.assertAlmostEqual(columns["y"][4], math.sqrt(2))
+        columns = data.functionxy(math.sin, min=0, max=1, points=3, vectorized=True).dynamiccolumns(_graph(axis.linear(), 0, 1), {})
+        self.assertAlmostEqual(columns["y"][1], math.sin(0.5))
+
+    def testParamfunctionVectorized(self):
+        if not data.has_numpy:
+            self.skipTest("numpy is not available")
+        mydata = data.paramfunction("k", 0, 9, "x, y = k, -k", points=10, vectorized=True)
+        self.assertEqual(mydata.columns["x"], list(range(10)))
+        self.assertEqual(mydata.columns["y"], [-i for i in range(10)])
+        mydata = data.paramfunction("k", -1, 1, "x, y, z = cos(k), sin(k)/k, 1", points=4, vectorized=True)
+        self.assertAlmostEqual(mydata.columns["y"][3], math.sin(1))
+        self.assertEqual(mydata.columns["z"], [1]*4)
+        self.assertRaises(ZeroDivisionError, data.paramfunction, "k", -1, 1, "x, y = k, 1/k", points=5, vectorized=True)
+        mydata = data.paramfunctionxy(lambda t: (math.cos(t), math.sin(t)), 0, 1, points=3, vectorized=True)
+        self.assertAlmostEqual(mydata.columns["y"][1], math.sin(0.5))
+
+    def adaptivecolumns(self, d, **axes):
+        g = graphmodule.graphxy(width=10, **axes)
+        plotitem = g.plot(d)
+        g.doranges()
+        return plotitem.dynamiccolumns
+
+    def testFunctionAdaptive(self):
+        columns = self.adaptivecolumns(data.function("y(x)=2*x", min=-1, max=1, points=5, tolerance=0.1*unit.t_pt))
+        self.assertEqual(columns["x"], [-1, -0.5, 0, 0.5, 1])
+        columns = self.adaptivecolumns(data.function("y(x)=exp(-(x/0.01)**2)", min=-1, max=1, points=11, tolerance=0.1*unit.t_pt))
+        self.assertEqual(columns["x"], sorted(columns["x"]))
+        self.assertTrue(20 < len(columns["x"]) < 100)
+        self.assertEqual(len([x for x in columns["x"] if abs(x) > 0.15]), 10)
+        self.assertAlmostEqual(max(columns["y"]), 1, 3)
+        columns = self.adaptivecolumns(data.function("y(x)=sqrt(x)", min=-1, max=1, points=4, tolerance=0.1*unit.t_pt, maxdepth=6))
+        self.assertEqual(len(columns["x"]), len(columns["y"]))
+        self.assertTrue(max([x for x, y in zip(columns["x"], columns["y"]) if y is None]) > -0.01)
+        columns = self.adaptivecolumns(data.function("y(x)=log(x)", points=3, tolerance=0.1*unit.t_pt), x=axis.logarithmic(min=0.01, max=100))
+        self.assertEqual(len(columns["x"]), 3)
+        self.assertAlmostEqual(columns["x"][1], 1)
+        columns = self.adaptivecolumns(data.function("y(x)=2*x", min=0, max=9, tolerance=0.1*unit.t_pt))
+        self.assertEqual(columns["x"], list(range(10)))
+
+    def testParamfunctionAdaptive(self):
+        mydata = data.paramfunction("k", 0, 2*math.pi, "x, y = cos(k), sin(k)", points=5, tolerance=0.1*unit.t_pt)
+        self.assertEqual(mydata.columns, {})
+        self.assertEqual(mydata.columnnames, ["x", "y"])
+        columns = self.adaptivecolumns(mydata)
+        self.assertTrue(len(columns["x"]) > 50)
+        for x, y in zip(columns["x"], columns["y"]):
+            self.assertAlmostEqual(x*x+y*y, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, math
+
+from pyx import unit
+from pyx.graph import axis, data, decimate, graphxy, style
+
+
+def segmentdistance(point, start, end):
+    return decimate._segmentdistance_pt(point, start, end)
+
+
+class DecimateTestCase(unittest.TestCase):
+
+    def points(self, n=1000):
+        return [(0.1*i, 20*math.sin(0.01*i) + (i % 7)*0.01) for i in range(n)]
+
+    def assertWithinTolerance(self, points, indices, tolerance):
+        for first, last in zip(indices[:-1], indices[1:]):
+            for point in points[first+1:last]:
+                self.assertTrue(segmentdistance(point, points[first], points[last]) <= tolerance)
+
+    def testDouglasPeucker(self):
+        points = self.points()
+        indices = decimate.douglaspeucker(0.1*unit.t_pt).select(points)
+        self.assertEqual(indices, sorted(indices))
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(points)-1)
+        self.assertTrue(len(indices) < len(points)/5)
+        self.assertWithinTolerance(points, indices, 0.1)
+        self.assertEqual(decimate.douglaspeucker().select([(0, 0), (1, 1), (2, 2), (3, 3)]), [0, 3])
+
+    def testDouglasPeuckerPython(self):
+        points = self.points(300)
+        has_numpy = decimate.has_numpy
+        decimate.has_numpy = False
+        try:
+            indices = decimate.douglaspeucker(0.05*unit.t_pt).select(points)
+        finally:
+            decimate.has_numpy = has_numpy
+        self.assertEqual(indices, decimate.douglaspeucker(0.05*unit.t_pt).select(points))
+        self.assertWithinTolerance(points, indices, 0.05)
+
+    def testInvalid(self):
+        points = [(0, 0), (1, 0), (2, 0), None, (3, 0), (4, 0), (5, 0), None]
+        self.assertEqual(decimate.douglaspeucker().select(points), [0, 2, 3, 4, 6, 7])
+        self.assertEqual(decimate.minmax().select(points), [0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(decimate.minmax(10*unit.t_pt).select(points), [0, 2, 3, 4, 6, 7])
+
+    def testMinMax(self):
+        points = [(0.01*i, math.sin(i)) for i in range(1000)]
+        indices = decimate.minmax(1*unit.t_pt).select(points)
+        self.assertEqual(indices, sorted(indices))
+        self.assertTrue(len(indices) <= 40)
+        for column in range(10):
+            group = [y for x, y in points if math.floor(x) == column]
+            kept = [points[i][1] for i in indices if math.floor(points[i][0]) == column]
+            self.assertEqual(min(group), min(kept))
+            self.assertEqual(max(group), max(kept))
+
+    def testPlotitem(self):
+        xs = [0.001*i for i in range(1001)]
+        ys = [x*x for x in xs]
+        for decimation, maxpoints in [(None, 1001), (decimate.douglaspeucker(), 100)]:
+            g = graphxy(width=10, x=axis.lin(painter=None), y=axis.lin(painter=None))
+            plotitem = g.plot(data.values(x=xs, y=ys), [style.line()], decimate=decimation)
+            g.dolayout()
+            g.doplot()
+            n = len(plotitem.path.normpath().normsubpaths[0].normsubpathitems) + 1
+            self.assertTrue(n <= maxpoints)
+            if decimation is None:
+                self.assertEqual(n, 1001)
+
+
+if __name__ == "__main__":
+    unittest.main()
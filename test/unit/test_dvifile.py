@@ -2,8 +2,9 @@ import sys
 if sys.path[0] != "../..":
     sys.path.insert(0, "../..")
 
-import io, os, re, unittest
+import io, os, re, shutil, struct, tempfile, unittest
 
+from pyx import reader
 from pyx.dvi import dvifile
 
 
@@ -59,21 +60,93 @@ class DvifileTestCase(unittest.TestCase):
         assert pyxdvifilelineno == len(pyxdvifilelines)
 
     def testDvitypeSample2e(self):
-        os.system("latex sample2e.tex > /dev/null 2> /dev/null")
-        self.dvitypetester("sample2e.dvi")
-        os.system("rm sample2e.*")
+        try:
+            os.system("latex sample2e.tex > /dev/null 2> /dev/null")
+            self.dvitypetester("sample2e.dvi")
+        finally:
+            os.system("rm -f sample2e.*")
 
     def testDvitypeBigScale(self):
-        with open("bigscale.tex", "w") as texfile:
-            texfile.write("\\nopagenumbers\n"
-                          "\\font\\myfont=cmr10 at 145.678pt\\myfont\n"
-                          "i\\par\n"
-                          "\\font\\myfont=cmr10 at 457.12346pt\\myfont\n"
-                          "m\\par\n"
-                          "\\bye\n")
-        os.system("tex bigscale.tex > /dev/null 2> /dev/null")
-        self.dvitypetester("bigscale.dvi")
-        os.system("rm bigscale.*")
+        try:
+            with open("bigscale.tex", "w") as texfile:
+                texfile.write("\\nopagenumbers\n"
+                              "\\font\\myfont=cmr10 at 145.678pt\\myfont\n"
+                              "i\\par\n"
+                              "\\font\\myfont=cmr10 at 457.12346pt\\myfont\n"
+                              "m\\par\n"
+                              "\\bye\n")
+            os.system("tex bigscale.tex > /dev/null 2> /dev/null")
+            self.dvitypetester("bigscale.dvi")
+        finally:
+            os.system("rm -f bigscale.*")
+
+
+def dvipage(page, prev, width):
+    """dvi page with pageid PyX<page> containing a rule of the given width"""
+    return (struct.pack(">B10ll", 139, ord("P"), ord("y"), ord("X"), page, 0, 0, 0, 0, 0, 0, prev) +
+            bytes([138]) + struct.pack(">Bll", 132, 65536, width) + bytes([140]))
+
+def dvidata(widths, post=True):
+    data = struct.pack(">BBLLLB", 247, 2, 25400000, 473628672, 1000, 0)
+    bop = -1
+    for page, width in enumerate(widths):
+        data += bytes([138])
+        bop, data = len(data), data + dvipage(page+1, bop, width)
+    if post:
+        postpos = len(data)
+        data += struct.pack(">BlLLLllHH", 248, bop, 25400000, 473628672, 1000, 0, 0, 1, len(widths))
+        data += struct.pack(">BLB", 249, postpos, 2)
+        data += bytes([223] * (4 + (-len(data)) % 4))
+    return data
+
+
+class DvifileIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "test.dvi")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def pageid(self, page):
+        return [ord("P"), ord("y"), ord("X"), page, 0, 0, 0, 0, 0, 0]
+
+    def width(self, page):
+        bbox = page.bbox()
+        return round(bbox.width_pt() / (72 / 72.27 / 65536))
+
+    def testBufferreader(self):
+        r = reader.bufferreader(struct.pack(">BbHhlL", 1, -2, 3, -4, 5, 6) + b"\x80\x00\x01\x05hello")
+        self.assertEqual([r.readuchar(), r.readchar(), r.readuint16(), r.readint16(), r.readint32(), r.readuint32()],
+                         [1, -2, 3, -4, 5, 6])
+        self.assertEqual(r.readint24(), -0x7fffff)
+        self.assertEqual(r.readstring(6), b"hello")
+        self.assertTrue(r.eof())
+        self.assertRaises(struct.error, r.readuchar)
+        self.assertRaises(struct.error, r.readint32)
+
+    def testIndex(self):
+        with open(self.filename, "wb") as f:
+            f.write(dvidata([100, 200, 300]))
+        df = dvifile.DVIfile(self.filename)
+        self.assertEqual(self.width(df.readpage(self.pageid(3))), 300)
+        self.assertEqual(self.width(df.readpage(self.pageid(1))), 100)
+        self.assertEqual(self.width(df.readpage(None)), 200)
+        self.assertEqual(sorted(df.pageoffsets), [tuple(self.pageid(page)) for page in [1, 2, 3]])
+        self.assertEqual(self.width(df.readpage(self.pageid(1))), 100)
+        self.assertRaises(dvifile.DVIError, df.readpage, self.pageid(5))
+
+    def testGrowing(self):
+        data = dvidata([100, 200], post=False)
+        with open(self.filename, "wb") as f:
+            f.write(data[:-len(dvipage(2, 0, 200))-1])
+        df = dvifile.DVIfile(self.filename)
+        self.assertEqual(self.width(df.readpage(self.pageid(1))), 100)
+        self.assertEqual(df.pageoffsets, {})
+        with open(self.filename, "wb") as f:
+            f.write(data)
+        self.assertEqual(self.width(df.readpage(self.pageid(2))), 200)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, os, shutil, tempfile
+
+from pyx.dvi import mapfile
+
+
+class MapfileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.mapfilename = os.path.join(self.tmpdir, "test.map")
+        with open(self.mapfilename, "w") as f:
+            f.write("% comment\n"
+                    "cmr10 CMR10 <cmr10.pfb\n"
+                    "cmr12 CMR12 <cmr12.pfb\n"
+                    "cmr12 CMR12X <cmr12.ttf\n"
+                    "<cmti10.pfb cmti10 CMTI10\n"
+                    'cmsl10 CMR10 " .167 SlantFont " <cmr10.pfb\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def check(self, fontmap):
+        self.assertEqual(fontmap["cmr10"].basepsname, "CMR10")
+        # the TrueType font in the later line is skipped
+        self.assertEqual(fontmap["cmr12"].basepsname, "CMR12")
+        self.assertEqual(fontmap["cmti10"].fontfilename, "cmti10.pfb")
+        self.assertEqual(fontmap["cmsl10"].slant, 0.167)
+        self.assertTrue("cmr10" in fontmap)
+        self.assertFalse("cmr17" in fontmap)
+
+    def testNoCache(self):
+        self.check(mapfile.readfontmap([self.mapfilename], cachedir=None))
+
+    def testCache(self):
+        self.check(mapfile.readfontmap([self.mapfilename], cachedir=self.tmpdir))
+        self.assertEqual(len([name for name in os.listdir(self.tmpdir) if name.endswith(".pickle")]), 1)
+        self.check(mapfile.readfontmap([self.mapfilename], cachedir=self.tmpdir))
+        with open(self.mapfilename, "a") as f:
+            f.write("cmr17 CMR17 <cmr17.pfb\n")
+        self.assertTrue("cmr17" in mapfile.readfontmap([self.mapfilename], cachedir=self.tmpdir))
+
+
+if __name__ == "__main__":
+    unittest.main()
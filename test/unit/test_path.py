@@ -7,6 +7,7 @@ import unittest
 from pyx import *
 from pyx.path import *
 from pyx.normpath import normpathparam
+import pyx.normpath
 import math
 set(epsilon=1e-7)
 
@@ -135,6 +136,46 @@ class NormpathTestCase(unittest.TestCase):
         for arclen, arclen2 in zip(arclens, p.paramtoarclen(p.arclentoparam(arclens))):
             self.assertAlmostEqual(unit.tom(arclen), unit.tom(arclen2), 4)
 
+    def testarclentable(self):
+        nsp = normsubpath([normline_pt(0, 0, 10, 0),
+                           normcurve_pt(10, 0, 15, 0, 20, 5, 20, 10)])
+        self.assertAlmostEqual(nsp.arclentoparam_pt([5])[0], 0.5)
+        self.assertAlmostEqual(nsp.paramtoarclen_pt([2, 1])[1], 10)
+        nsp.append(normline_pt(20, 10, 20, 20))
+        arclen_pt = nsp.arclen_pt()
+        self.assertAlmostEqual(nsp.paramtoarclen_pt([2.5])[0], arclen_pt - 5)
+        self.assertAlmostEqual(nsp.arclentoparam_pt([arclen_pt - 5])[0], 2.5)
+        nsp.close()
+        self.assertAlmostEqual(nsp.arclen_pt(), arclen_pt + math.hypot(20, 20))
+        nsp.epsilon = 1
+        self.assertTrue(0 < arclen_pt + math.hypot(20, 20) - nsp.arclen_pt() < 1)
+
+    @unittest.skipUnless(pyx.normpath.has_numpy, "numpy not available")
+    def testnumpy(self):
+        nsp = normsubpath([normline_pt(0, 0, 3, 0),
+                           normcurve_pt(3, 0, 3, 2, 4, 4, 3, 6),
+                           normcurve_pt(3, 6, 2, 7, 1, 6, 0, 6),
+                           normline_pt(0, 6, 0, 0)], closed=1)
+        params = [-0.5 + 0.1*i for i in range(50)]
+        arclens_pt = [-2 + 0.5*i for i in range(50)]
+        results = []
+        for usenumpy in [True, False]:
+            pyx.normpath.set(usenumpy=usenumpy)
+            results.append((nsp.at_pt(params), nsp.curvature_pt(params),
+                             [t.matrix for t in nsp.rotation(params)],
+                             [t.vector for t in nsp.trafo(params)],
+                             nsp.arclentoparam_pt(arclens_pt)))
+        pyx.normpath.set(usenumpy=True)
+        ats, curvatures, rotations, trafos, arclenparams = results[0]
+        ats2, curvatures2, rotations2, trafos2, arclenparams2 = results[1]
+        for i in range(50):
+            self.assertAlmostEqual(ats[i][0], ats2[i][0])
+            self.assertAlmostEqual(ats[i][1], ats2[i][1])
+            self.assertAlmostEqual(curvatures[i], curvatures2[i])
+            self.assertAlmostEqual(rotations[i][0][1], rotations2[i][0][1])
+            self.assertAlmostEqual(trafos[i][0], trafos2[i][0])
+            self.assertAlmostEqual(arclenparams[i], arclenparams2[i], 5)
+
     def testsplit(self):
         p = normline_pt(0, 0, 10, 0)
         self.assertRaises(ValueError, p.segments, [])
@@ -379,5 +420,25 @@ class NormpathTestCase(unittest.TestCase):
         self.assertAlmostEqual(intersect[0][3], 3.5)
 
 
+    def testmultilinetoarray(self):
+        import io
+        points_pt = [(1, 0), (1, 2), (3, 4)]
+        p1 = path(moveto_pt(0, 0), multilineto_pt(points_pt), closepath())
+        p2 = path(moveto_pt(0, 0), multilinetoarray_pt(points_pt), closepath())
+        self.assertEqual(str(p1.bbox()), str(p2.bbox()))
+        self.assertEqual(p1.returnSVGdata(), p2.returnSVGdata())
+        for method in ["outputPS", "outputPDF"]:
+            file1, file2 = io.StringIO(), io.StringIO()
+            getattr(p1, method)(file1, None)
+            getattr(p2, method)(file2, None)
+            self.assertEqual(file1.getvalue(), file2.getvalue())
+        self.assertAlmostEqualNormpath(p1.normpath(), p2.normpath())
+        self.assertEqual(len(p2.normpath(epsilon=None)[0]), 3)
+        file1, file2 = io.StringIO(), io.StringIO()
+        p1.normpath(epsilon=None).reversed().outputPDF(file1, None)
+        p2.normpath(epsilon=None).reversed().outputPDF(file2, None)
+        self.assertEqual(file1.getvalue(), file2.getvalue())
+
+
 if __name__ == "__main__":
     unittest.main()
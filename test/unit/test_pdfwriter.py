@@ -0,0 +1,85 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, io, os, re
+
+from pyx import bitmap, canvas, color, document, path, text
+from test_textrunner import stubrunner
+
+
+class PDFwriterTestCase(unittest.TestCase):
+
+    def pages(self, n):
+        for i in range(n):
+            c = canvas.canvas()
+            c.stroke(path.circle(0, 0, 1+i), [color.rgb.red, color.transparency(0.5)])
+            yield document.page(c)
+
+    def write(self, pages, **kwargs):
+        f = io.BytesIO()
+        kwargs.setdefault("compress", False)
+        document.document(pages).writePDFfile(f, **kwargs)
+        return f.getvalue()
+
+    def checkxref(self, pdf):
+        xrefpos = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+        lines = pdf[xrefpos:].split(b"\n")
+        self.assertEqual(lines[0], b"xref")
+        size = int(lines[1].split()[1])
+        for refno in range(1, size):
+            filepos = int(lines[2+refno].split()[0])
+            self.assertTrue(pdf[filepos:].startswith(b"%i 0 obj\n" % refno))
+        return size
+
+    def testStreaming(self):
+        pdf = self.write(list(self.pages(3)))
+        streamedpdf = self.write(self.pages(3), streaming=True)
+        self.assertEqual(self.checkxref(pdf), self.checkxref(streamedpdf))
+        self.assertEqual(pdf.count(b"/Type /Page\n"), 3)
+        self.assertEqual(streamedpdf.count(b"/Type /Page\n"), 3)
+        # the shared transparency state is written only once
+        self.assertEqual(streamedpdf.count(b"/Type /ExtGState"), 1)
+
+    def testWorkers(self):
+        creationdate = re.compile(rb"/CreationDate \(.*\)")
+        for kwargs in [{}, {"streaming": True}]:
+            pdf = self.write(self.pages(5), **kwargs)
+            parallelpdf = self.write(self.pages(5), workers=2, **kwargs)
+            self.assertEqual(creationdate.sub(b"", pdf), creationdate.sub(b"", parallelpdf))
+
+    def testWorkersText(self):
+        creationdate = re.compile(rb"/CreationDate \(.*\)")
+        def pages(runner):
+            for i in range(5):
+                c = canvas.canvas()
+                c.insert(runner.text_pt(0, 0, "x"*(i+1)))
+                yield document.page(c)
+        for lazy in [0, 2]:
+            pdf = self.write(pages(text.MultiRunner(stubrunner, lazy=lazy)))
+            runner = text.MultiRunner(stubrunner, lazy=lazy)
+            parallelpdf = self.write(pages(runner), workers=2)
+            # the texts are typeset and the TeX interpreter is finished
+            # prior to the forking of the workers
+            self.assertEqual(runner.instance.state, text.STATE_DONE)
+            self.assertEqual(runner.instance.tex.exprs, ["x"*(i+1) for i in range(5)])
+            self.assertEqual(creationdate.sub(b"", pdf), creationdate.sub(b"", parallelpdf))
+
+    def testCompressWorkers(self):
+        creationdate = re.compile(rb"/CreationDate \(.*\)")
+        images = [bitmap.image(20, 10, "RGBA", os.urandom(800)) for i in range(3)]
+        def pages():
+            for i, p in enumerate(self.pages(4)):
+                p.canvas.insert(bitmap.bitmap(0, 0, images[i % 3], width=1))
+                yield p
+        for kwargs in [{}, {"streaming": True}, {"workers": 2}]:
+            bitmap.imagedatacache.clear()
+            pdf = self.write(pages(), compress=True, **kwargs)
+            bitmap.imagedatacache.clear()
+            parallelpdf = self.write(pages(), compress=True, compress_workers=4, **kwargs)
+            self.assertEqual(creationdate.sub(b"", pdf), creationdate.sub(b"", parallelpdf))
+            self.assertEqual(pdf.count(b"/Subtype /Image"), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, io, math
+
+from pyx.graph import axis, data, graphxy, style
+
+
+class BatchedStyleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.batched = [(cls, cls.batched) for cls in [style.pos, style.line, style.symbol, style.impulses]]
+
+    def tearDown(self):
+        for cls, batched in self.batched:
+            cls.batched = batched
+
+    def setbatched(self, batched):
+        for cls, b in self.batched:
+            cls.batched = batched
+
+    def output(self, styles, yaxis):
+        xs = [0.01*i for i in range(200)]
+        ys = [math.sin(10*x) + 1.5 for x in xs]
+        ys[50] = None
+        ys[60] = "invalid"
+        g = graphxy(width=8, x=axis.lin(painter=None), y=yaxis)
+        g.plot(data.values(x=xs, y=ys), styles)
+        g.plot(data.function("y(x)=exp(x)", min=0, max=2, points=50))
+        f = io.BytesIO()
+        g.writePDFfile(f)
+        return f.getvalue()
+
+    def testOutput(self):
+        for styles in [[style.line()], [style.symbol(), style.line()], [style.impulses(fromvalue=None)]]:
+            for yaxis in [axis.lin(painter=None, min=0.8, max=2.2), axis.log(painter=None, reverse=1)]:
+                self.setbatched(0)
+                expected = self.output(styles, yaxis)
+                self.setbatched(1)
+                self.assertEqual(self.output(styles, yaxis), expected)
+
+    def testFallback(self):
+        class recordingsymbol(style.symbol):
+            def drawpoint(self, privatedata, sharedata, graph, point):
+                privatedata.count = getattr(privatedata, "count", 0) + 1
+                style.symbol.drawpoint(self, privatedata, sharedata, graph, point)
+            def drawpoints(self, privatedata, sharedata, graph, columns):
+                privatedata.batchcount = getattr(privatedata, "batchcount", 0) + len(sharedata.vposlist)
+                style.symbol.drawpoints(self, privatedata, sharedata, graph, columns)
+        for styles, batched in [([recordingsymbol()], True),
+                                ([style.range(), recordingsymbol()], False)]:
+            g = graphxy(width=8, x=axis.lin(painter=None), y=axis.lin(painter=None))
+            plotitem = g.plot(data.values(x=[1, 2, 3], y=[1, 4, 9]), styles)
+            g.dolayout()
+            g.doplot()
+            if batched:
+                self.assertEqual(plotitem.batchcount, 3)
+                self.assertRaises(AttributeError, getattr, plotitem, "count")
+            else:
+                self.assertEqual(plotitem.count, 3)
+                self.assertRaises(AttributeError, getattr, plotitem, "batchcount")
+
+    def testConvertlist(self):
+        g = graphxy(width=8, x=axis.lin(painter=None, min=0, max=2), y=axis.log(painter=None, min=1, max=100))
+        g.dolayout()
+        self.assertEqual(g.axes["x"].convertlist([0, 1, None, "x", 4]), [0, 0.5, None, None, 2])
+        self.assertEqual(g.axes["y"].convertlist([1, 10, 0, -1, None]), [0, g.axes["y"].convert(10), None, None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest
+
+from pyx.font import t1code
+try:
+    from pyx.font import _t1code
+except ImportError:
+    _t1code = None
+
+
+class T1codeTestCase(unittest.TestCase):
+
+    plain = b"dup /Private 8 dict dup begin"
+
+    def check(self, module):
+        code = module.encoder(self.plain, 55665, b"PyX!")
+        self.assertEqual(len(code), len(self.plain) + 4)
+        self.assertEqual(code[:4], bytes([0x89, 0x2d, 0xb0, 0xc4]))
+        self.assertEqual(module.decoder(code, 55665, 4), self.plain)
+        self.assertEqual(module.decoder(memoryview(code), 55665, 4), self.plain)
+        self.assertEqual(module.encoder(b"", 4330, b""), b"")
+        self.assertEqual(module.decoder(b"", 4330, 4), b"")
+        self.assertEqual(module.decoder(code, 4330, 0)[:4], module.decoder(code[:4], 4330, 0))
+
+    def testPython(self):
+        self.check(t1code)
+
+    @unittest.skipIf(_t1code is None, "C extension module not available")
+    def testC(self):
+        self.check(_t1code)
+        data = bytes(range(256)) * 10
+        for r in [0, 4330, 55665, 0xffff]:
+            code = _t1code.encoder(data, r, b"abcd")
+            self.assertEqual(code, t1code.encoder(data, r, b"abcd"))
+            self.assertEqual(_t1code.decoder(code, r, 3), t1code.decoder(code, r, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, shutil, tempfile
+
+from pyx.font import t1file
+
+
+def charstring(*codes):
+    return t1file.encoder(bytes(codes), t1file.T1File.charstringr, b"PyX!")
+
+# hsbw 0 500 endchar
+glyphcode = charstring(139, 248, 136, 13, 14)
+# return
+subrcode = charstring(11)
+
+def syntheticfont():
+    data1 = ("%!PS-AdobeFont-1.0: Test 001.000\n"
+             "/FontName /Test def\n"
+             "/FontMatrix [0.001 0 0 0.001 0 0] readonly def\n"
+             "/Encoding StandardEncoding def\n"
+             "currentfile eexec\n")
+    data2 = [b"dup /Private 8 dict dup begin\n",
+             b"/Subrs 1 array\n",
+             b"dup 0 %d RD " % len(subrcode), subrcode, b" NP\n",
+             b"ND\n",
+             b"2 index /CharStrings 4 dict dup begin\n"]
+    for glyph in [".notdef", "A", "B", "C"]:
+        data2.extend([b"/%s %d RD " % (glyph.encode("ascii"), len(glyphcode)), glyphcode, b" ND\n"])
+    data2.append(b"end\nend\nreadonly put\nput\ndup /FontName get exch definefont pop\nmark currentfile closefile\n")
+    data3 = "0"*512 + "\ncleartomark\n"
+    return t1file.T1File(data1, t1file.encoder(b"".join(data2), t1file.T1File.eexecr, b"PyX!"), data3)
+
+
+class SubsetCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testStrip(self):
+        stripped = syntheticfont().getstrippedfont({"A"}, [])
+        stripped._data2decode()
+        self.assertEqual(stripped.glyphlist, [".notdef", "A"])
+
+    def testMemory(self):
+        cache = t1file.subsetcache()
+        font = syntheticfont()
+        glyphs = {"B", "A"}
+        stripped = cache.getstrippedfont(font, glyphs, [])
+        self.assertEqual(glyphs, {"A", "B"})
+        self.assertTrue(cache.getstrippedfont(font, ["A", "B"], []) is stripped)
+        self.assertTrue(cache.getstrippedfont(syntheticfont(), {"A", "B"}, []) is stripped)
+        self.assertTrue(cache.getstrippedfont(font, {"A"}, []) is not stripped)
+        self.assertTrue(cache.getstrippedfont(font, {"A", "B"}, [65]) is not stripped)
+
+    def testDisk(self):
+        font = syntheticfont()
+        stripped = t1file.subsetcache(self.tmpdir).getstrippedfont(font, {"C"}, [])
+        cached = t1file.subsetcache(self.tmpdir).getstrippedfont(font, {"C"}, [])
+        self.assertTrue(cached is not stripped)
+        self.assertEqual(cached.data1, stripped.data1)
+        self.assertEqual(cached.getdata2eexec(), stripped.getdata2eexec())
+        self.assertEqual(cached.data3, stripped.data3)
+
+    def testDiskEviction(self):
+        cache = t1file.subsetcache(self.tmpdir, maxsize=1)
+        cache.getstrippedfont(syntheticfont(), {"C"}, [])
+        self.assertEqual(list(cache._diskentries()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
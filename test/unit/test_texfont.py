@@ -0,0 +1,85 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, os, shutil, struct, tempfile
+
+from pyx.dvi import texfont
+
+
+def tfmdata(checksum=1234, designsize=10<<20):
+    # a minimal TFM file containing the single character "A"
+    bc = ec = 65
+    nw, nh, nd, ni = 2, 1, 1, 1
+    lh = 2
+    lf = 6 + lh + (ec-bc+1) + nw + nh + nd + ni
+    return (struct.pack(">12h", lf, lh, bc, ec, nw, nh, nd, ni, 0, 0, 0, 0) +
+            struct.pack(">ii", checksum, designsize) +
+            struct.pack(">i", 1 << 24) +
+            struct.pack(">ii", 0, 1 << 19) +
+            struct.pack(">iii", 0, 0, 0))
+
+
+class MetricCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fontname = os.path.join(self.tmpdir, "testfont")
+        with open(self.fontname + ".tfm", "wb") as f:
+            f.write(tfmdata())
+        self.metrics = texfont.metrics
+
+    def tearDown(self):
+        texfont.metrics = self.metrics
+        shutil.rmtree(self.tmpdir)
+
+    def loadfont(self):
+        return texfont.loadfont(self.fontname, 1234, 10<<20, 10<<20, 1.0, 1.0)
+
+    def testShared(self):
+        texfont.metrics = texfont.metriccache()
+        font1 = self.loadfont()
+        font2 = self.loadfont()
+        self.assertFalse(isinstance(font1, texfont.virtualfont))
+        self.assertTrue(font1.TFMfile is font2.TFMfile)
+        self.assertEqual(font1.getwidth_dvi(65), 10 << 19)
+        self.assertTrue(texfont.metrics.hasfont(self.fontname, 1234))
+        self.assertFalse(texfont.metrics.hasfont(self.fontname, 4321))
+
+    def testPersistent(self):
+        cachefilename = os.path.join(self.tmpdir, "metrics.pickle")
+        texfont.metrics = texfont.metriccache(cachefilename)
+        self.loadfont()
+        texfont.metrics.save()
+        os.remove(self.fontname + ".tfm")
+        texfont.metrics = texfont.metriccache(cachefilename)
+        self.assertEqual(self.loadfont().getwidth_dvi(65), 10 << 19)
+
+    def testPersistentMisses(self):
+        cachefilename = os.path.join(self.tmpdir, "metrics.pickle")
+        texfont.metrics = texfont.metriccache(cachefilename)
+        texfont.metrics.lsRs = []
+        self.loadfont()
+        self.assertTrue(texfont.metrics.hasfont(self.fontname, 1234))
+        texfont.metrics.save()
+        texfont.metrics = texfont.metriccache(cachefilename)
+        self.assertTrue((self.fontname, 1234) in texfont.metrics.TFMfiles)
+        self.assertFalse((self.fontname, 1234) in texfont.metrics.VFdatas)
+
+    def testStamp(self):
+        cachefilename = os.path.join(self.tmpdir, "metrics.pickle")
+        lsR = os.path.join(self.tmpdir, "ls-R")
+        with open(lsR, "w") as f:
+            f.write("% ls-R -- filename database for kpathsea; do not change this line.\n")
+        texfont.metrics = texfont.metriccache(cachefilename)
+        texfont.metrics.lsRs = [lsR]
+        self.loadfont()
+        texfont.metrics.save()
+        self.assertTrue((self.fontname, 1234) in texfont.metriccache(cachefilename).TFMfiles)
+        with open(lsR, "a") as f:
+            f.write("./:\ntestfont.tfm\n")
+        self.assertEqual(texfont.metriccache(cachefilename).TFMfiles, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import unittest, re
+
+from pyx import canvas, path, text, unit
+
+
+class faketex:
+    """Fake TeX interpreter answering the input of a SingleRunner.
+
+    A typeset box gets a right extent of the length of its expression in TeX
+    points. The instance also serves as the dvifile to read the pages from.
+    """
+
+    def __init__(self):
+        self.output = ""
+        self.preambles = []
+        self.exprs = []
+        self.pages = {}
+
+    def write(self, s):
+        for chunk, executeid in re.findall(r"(.*?)\\PyXInput\{(\d+)\}%\n", s, re.S):
+            m = re.match(r"\\ProcessPyXBox\{(.*)%\n\}\{(\d+)\}%\n$", chunk, re.S)
+            if m:
+                expr, page = m.groups()
+                self.exprs.append(expr)
+                self.pages[int(page)] = expr
+                self.output += "PyXBox:page=%s,lt=0pt,rt=%ipt,ht=1pt,dp=0pt:\n[80.121.88.%s]\n" % (page, len(expr), page)
+            else:
+                self.preambles.append(chunk[:-2])
+            self.output += "PyXInputMarker:executeid=%s:\n" % executeid
+
+    def flush(self):
+        pass
+
+    def expect(self, s):
+        pass
+
+    def wait(self):
+        return True
+
+    def read(self):
+        output, self.output = self.output, ""
+        return output
+
+    def readpage(self, pageid, fontmap, singlecharmode, attrs):
+        c = canvas.canvas(attrs)
+        c.markers = {}
+        c.expr = self.pages[pageid[3]]
+        return c
+
+
+class stubrunner(text.SingleTexRunner):
+    """SingleTexRunner talking to a faketex instance."""
+
+    def do_start(self):
+        self.texinput = self.texoutput = self.tex = faketex()
+        self.state = text.STATE_PREAMBLE
+        text._startedrunners.add(self)
+
+    def do_finish(self, cleanup=True):
+        if self.state == text.STATE_DONE:
+            return
+        self.collect()
+        self.state = text.STATE_DONE
+        for page, box in enumerate(self.needdvitextboxes):
+            box.readdvipage(self.tex, page+1)
+
+
+def right_pt(expr):
+    return len(expr)*72/72.27
+
+
+class TextPtManyTestCase(unittest.TestCase):
+
+    def checkbox(self, box, x_pt, y_pt, expr):
+        self.assertAlmostEqual(box.extents_pt[1], right_pt(expr))
+        self.assertAlmostEqual(unit.topt(box.right), right_pt(expr)*unit.scale["x"])
+        self.assertEqual(box.texttrafo.vector, (x_pt, y_pt))
+        self.assertEqual(box.dvicanvas.expr, expr)
+
+    def testOrder(self):
+        runner = stubrunner()
+        texts = [(i, 2*i, "x"*(i+1), []) for i in range(5)]
+        boxes = runner.text_pt_many(texts)
+        self.assertEqual(runner.tex.exprs, [expr for x_pt, y_pt, expr, textattrs in texts])
+        self.assertEqual(len(boxes), 5)
+        for box, (x_pt, y_pt, expr, textattrs) in zip(boxes, texts):
+            self.checkbox(box, x_pt, y_pt, expr)
+
+    def testPages(self):
+        runner = stubrunner()
+        box1 = runner.text_pt(0, 0, "a")
+        boxes = runner.text_pt_many([(0, 0, "bb", []), (0, 0, "ccc", [])])
+        box4 = runner.text_pt(0, 0, "dddd")
+        self.assertEqual(runner.text_pt_many([]), [])
+        for box, expr in zip([box1] + boxes + [box4], ["a", "bb", "ccc", "dddd"]):
+            self.checkbox(box, 0, 0, expr)
+
+    def testSubmit(self):
+        runner = stubrunner()
+        collector = runner.submit_text_pt_many([(0, 0, "a", []), (0, 0, "bb", [])])
+        box = runner.text_pt(0, 0, "ccc") # collects the pending submission
+        boxes = collector()
+        self.assertEqual(collector(), boxes)
+        for box, expr in zip(boxes + [box], ["a", "bb", "ccc"]):
+            self.checkbox(box, 0, 0, expr)
+
+    def testTextMany(self):
+        runner = stubrunner()
+        boxes = runner.text_many([(1*unit.t_cm, 2*unit.t_cm, "a", [])])
+        self.checkbox(boxes[0], unit.topt(1*unit.t_cm), unit.topt(2*unit.t_cm), "a")
+
+    def testBoxCache(self):
+        cache = text.BoxCache()
+        runner = text.MultiRunner(stubrunner, boxcache=cache)
+        c = canvas.canvas()
+        c.fill(path.rect_pt(0, 0, 1, 1))
+        for expr in ["a", "ccc"]:
+            cache.store(cache.key(runner.instance.enginekey(), [], expr, False), (0, 1, 2, 3), c.items, {})
+        texts = [(i, 0, expr, []) for i, expr in enumerate(["a", "bb", "ccc", "dddd"])]
+        boxes = runner.text_pt_many(texts)
+        self.assertEqual(runner.instance.tex.exprs, ["bb", "dddd"])
+        for box, (x_pt, y_pt, expr, textattrs) in zip(boxes, texts):
+            if expr in ["a", "ccc"]:
+                self.assertEqual(box.extents_pt, (0, 1, 2, 3))
+                self.assertEqual(len(box.dvicanvas.items), 1)
+            else:
+                self.checkbox(box, x_pt, y_pt, expr)
+        # the typeset boxes are stored in the cache now
+        self.assertEqual([box.extents_pt[1] for box in runner.text_pt_many(texts)],
+                         [1, right_pt("bb"), 1, right_pt("dddd")])
+
+
+class LazyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = text.BoxCache()
+        c = canvas.canvas()
+        c.fill(path.rect_pt(0, 0, 1, 1))
+        runner = text.MultiRunner(stubrunner)
+        self.cache.store(self.cache.key(runner.instance.enginekey(), [], "cached", False), (1, 2, 3, 4), c.items, {"m": (1*unit.t_pt, 1*unit.t_pt)})
+
+    def eagerbox(self):
+        return text.MultiRunner(stubrunner, boxcache=self.cache).text_pt(1, 2, "cached")
+
+    def testForce(self):
+        runner = text.MultiRunner(stubrunner, boxcache=self.cache, lazy=10)
+        box = runner.text_pt(1, 2, "cached")
+        self.assertIs(type(box), text.lazytextbox_pt)
+        self.assertEqual(runner.lazyboxes, [box])
+        self.assertEqual([unit.topt(x) for x in box.marker("m")],
+                         [unit.topt(x) for x in self.eagerbox().marker("m")])
+        self.assertIs(type(box), text.textextbox_pt)
+        self.assertEqual(runner.lazyboxes, [])
+        self.assertFalse([name for name in box.__dict__ if name.startswith("lazy")])
+        self.assertEqual(box.extents_pt, (1, 2, 3, 4))
+
+    def testEager(self):
+        lazyrunner = text.MultiRunner(stubrunner, boxcache=self.cache, lazy=10)
+        for op in [lambda box: box.reltransform(text.trafo.rotate(30)),
+                   lambda box: box.linealign(1*unit.t_cm, 1, 0),
+                   lambda box: None]:
+            lazy = lazyrunner.text_pt(1, 2, "cached")
+            eager = self.eagerbox()
+            op(lazy)
+            op(eager)
+            for name in ["llx_pt", "lly_pt", "urx_pt", "ury_pt"]:
+                self.assertAlmostEqual(getattr(lazy.bbox(), name), getattr(eager.bbox(), name))
+            self.assertIs(type(lazy), text.textextbox_pt)
+            self.assertEqual(lazy.texttrafo.vector, eager.texttrafo.vector)
+
+    def testBatches(self):
+        runner = text.MultiRunner(stubrunner, lazy=2)
+        boxes = [runner.text_pt(0, 0, expr) for expr in ["a", "bb", "ccc"]]
+        # the first two texts are submitted, but not yet collected
+        self.assertEqual(runner.instance.tex.exprs, ["a", "bb"])
+        self.assertIsNot(runner.instance.collector, None)
+        self.assertEqual(runner.lazyboxes, boxes[2:])
+        runner.instance.collect()
+        self.assertIs(runner.instance.collector, None)
+        self.assertTrue(all(type(box) is text.lazytextbox_pt for box in boxes))
+        for box, expr in zip(boxes, ["a", "bb", "ccc"]):
+            self.assertAlmostEqual(box.extents_pt[1], right_pt(expr))
+        self.assertEqual(runner.instance.tex.exprs, ["a", "bb", "ccc"])
+        for box, expr in zip(boxes, ["a", "bb", "ccc"]):
+            self.assertEqual(box.dvicanvas.expr, expr)
+
+    def testReset(self):
+        runner = text.MultiRunner(stubrunner, lazy=10)
+        box = runner.text_pt(0, 0, "a")
+        instance = runner.instance
+        runner.reset()
+        # pending texts are submitted to the old instance
+        self.assertEqual(instance.tex.exprs, ["a"])
+        self.assertEqual(runner.lazyboxes, [])
+        self.assertAlmostEqual(box.extents_pt[1], right_pt("a"))
+        self.assertEqual(box.dvicanvas.expr, "a")
+
+
+class TexRunnerPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = self.createpool()
+
+    def createpool(self, **kwargs):
+        return text.TexRunnerPool(runner=lambda **kwargs: text.MultiRunner(stubrunner, **kwargs), size=3, **kwargs)
+
+    def exprs(self, pool=None):
+        return [runner.instance.tex.exprs if runner.instance.state > text.STATE_START else None
+                for runner in (pool or self.pool).runners]
+
+    def testSingle(self):
+        boxes = [self.pool.text_pt(0, 0, expr) for expr in ["a", "bb", "ccc"]]
+        # only the first interpreter is started
+        self.assertEqual(self.exprs(), [["a", "bb", "ccc"], None, None])
+        for box, expr in zip(boxes, ["a", "bb", "ccc"]):
+            self.assertEqual(box.dvicanvas.expr, expr)
+
+    def testRoundRobin(self):
+        pool = self.createpool(lazy=1)
+        boxes = [pool.text_pt(0, 0, expr) for expr in ["a", "bb", "ccc", "dddd"]]
+        self.assertEqual(self.exprs(pool), [["a", "dddd"], ["bb"], ["ccc"]])
+        for box, expr in zip(boxes, ["a", "bb", "ccc", "dddd"]):
+            self.assertEqual(box.dvicanvas.expr, expr)
+
+    def testChunks(self):
+        exprs = ["x"*(i+1) for i in range(7)]
+        boxes = self.pool.text_pt_many([(i, 0, expr, []) for i, expr in enumerate(exprs)])
+        self.assertEqual(self.exprs(), [exprs[0:3], exprs[3:6], exprs[6:]])
+        self.assertEqual(len(boxes), 7)
+        for i, (box, expr) in enumerate(zip(boxes, exprs)):
+            self.assertAlmostEqual(box.extents_pt[1], right_pt(expr))
+            self.assertEqual(box.texttrafo.vector, (i, 0))
+            self.assertEqual(box.dvicanvas.expr, expr)
+        self.assertEqual(self.pool.text_pt_many([]), [])
+        boxes = self.pool.text_pt_many((i, 0, expr, []) for i, expr in enumerate(exprs))
+        self.assertEqual([box.extents_pt[1] for box in boxes], [right_pt(expr) for expr in exprs])
+
+    def testPreambleReset(self):
+        self.pool.preamble("\\relax")
+        self.assertEqual([runner.instance.tex.preambles for runner in self.pool.runners], [["\\relax"]]*3)
+        instances = [runner.instance for runner in self.pool.runners]
+        self.pool.reset(reinit=True)
+        self.assertFalse(set(instances) & set(runner.instance for runner in self.pool.runners))
+        self.assertEqual([runner.instance.tex.preambles for runner in self.pool.runners], [["\\relax"]]*3)
+        self.pool.reset()
+        self.assertEqual([runner.preambles for runner in self.pool.runners], [[]]*3)
+        self.assertEqual([runner.instance.state for runner in self.pool.runners], [text.STATE_START]*3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+if sys.path[0] != "../..":
+    sys.path.insert(0, "../..")
+
+import base64, binascii, io, os, unittest, zlib
+
+from pyx import writer
+
+
+class EncoderTestCase(unittest.TestCase):
+
+    def encode(self, encoder, data):
+        w = writer.writer(io.BytesIO())
+        encoder(w, data)
+        return w.file.getvalue()
+
+    def testAscii85(self):
+        for datalen in [0, 1, 3, 4, 59, 60, 61, 63, 64, 65, 1000, 3*writer._chunksize+5]:
+            data = os.urandom(datalen)
+            encoded = self.encode(writer.ascii85stream, data)
+            self.assertEqual(base64.a85decode(encoded), data)
+            self.assertNotIn(b"z", encoded)
+            if datalen:
+                self.assertEqual(encoded.count(b"\n") + 1, writer.ascii85lines(datalen))
+            # chunks of arbitrary length lead to the same output
+            self.assertEqual(self.encode(writer.ascii85stream, [data[i:i+7] for i in range(0, datalen, 7)]), encoded)
+
+    def testAscii85Zeros(self):
+        self.assertEqual(self.encode(writer.ascii85stream, bytes(5)), b"!!!!!!!")
+
+    def testAsciiHex(self):
+        for datalen in [0, 1, 31, 32, 33, 1000]:
+            data = os.urandom(datalen)
+            encoded = self.encode(writer.asciihexstream, [data[i:i+7] for i in range(0, datalen, 7)])
+            self.assertEqual(binascii.a2b_hex(encoded.replace(b"\n", b"")), data)
+            self.assertEqual(encoded.count(b"\n"), writer.asciihexlines(datalen))
+
+    def testDeflate(self):
+        data = os.urandom(1000) * 200
+        self.assertEqual(zlib.decompress(b"".join(writer.deflate(data))), data)
+        self.assertEqual(zlib.decompress(b"".join(writer.deflate(writer.chunks(data, 1000)))), data)
+
+
+if __name__ == "__main__":
+    unittest.main()